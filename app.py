@@ -1,5 +1,4 @@
 import streamlit as st
-import google.generativeai as genai
 import sys
 from pathlib import Path
 import traceback
@@ -12,14 +11,26 @@ st.set_page_config(page_title="Assistente Jurídico IA", layout="wide", initial_
 
 # Configura caminhos para que os módulos em 'utils' e 'services' possam ser importados
 # Isso é essencial quando a estrutura do projeto é modular.
-sys.path.append(str(Path(__file__).parent))
+# O Streamlit executa este arquivo a cada interação: o caminho só é incluído uma vez.
+if str(Path(__file__).parent) not in sys.path:
+    sys.path.append(str(Path(__file__).parent))
 
 # Tenta importar os módulos. Se houver algum erro, exibe uma mensagem e para o app.
+# O SDK do Gemini, o PyPDF2 e o python-docx não são importados aqui: cada um é carregado
+# quando é usado pela primeira vez, o que deixa a primeira página bem mais rápida.
 try:
-    from utils.document_parser import parse_legal_document
-    from utils.legal_api import fetch_jurisprudence
-    from services.defense_strategy import generate_defense
-    from services.accusation_strategy import generate_accusation
+    from utils.document_parser import iter_legal_document
+    from utils.parse_cache import get_parse_cache
+    from utils.document_store import PREVIEW_CHARS, get_document_store
+    from utils.legal_api import fetch_jurisprudence, fetch_similar_jurisprudence
+    from utils.juris_cache import get_juris_cache
+    from services.defense_strategy import generate_defense, stream_defense
+    from services.accusation_strategy import generate_accusation, stream_accusation
+    from services.document_analysis import generate_analysis, stream_analysis
+    from services.llm_cache import CachedModel, get_response_cache
+    from services.gemini_model import LazyGenerativeModel, prewarm_sdk
+    from services.llm_scheduler import QuotaExceededError, ScheduledModel, get_llm_scheduler
+    from utils.metrics import get_metrics
 except ImportError as e:
     st.error(f"Erro de importação de módulo: {str(e)}")
     st.info("Verifique se os arquivos nas pastas 'utils' e 'services' existem e se seus nomes estão corretos.")
@@ -27,32 +38,82 @@ except ImportError as e:
     st.stop()
 
 # --- BLOCÔNICO DE CONFIGURAÇÃO DA CHAVE DE API DO GOOGLE GEMINI ---
-API_KEY = None
-try:
-    # Tenta carregar a chave do Streamlit Secrets (ideal para Streamlit Cloud)
-    # st.secrets é um dicionário, e "GOOGLE_API_KEY" é o NOME da chave que você configurou.
-    API_KEY = st.secrets["GOOGLE_API_KEY"]
-except KeyError:
-    # Se não estiver em st.secrets (ex: rodando localmente), tenta carregar do arquivo .env
-    load_dotenv() # Carrega as variáveis do arquivo .env da raiz do projeto
-    # os.getenv() pega o valor da variável de ambiente com o NOME especificado.
-    API_KEY = os.getenv("GOOGLE_API_KEY")
+@st.cache_resource(show_spinner=False)
+def _carregar_chave_api():
+    """Lê a chave uma vez por processo (e não a cada interação com a página)."""
+    try:
+        # Tenta carregar a chave do Streamlit Secrets (ideal para Streamlit Cloud)
+        # st.secrets é um dicionário, e "GOOGLE_API_KEY" é o NOME da chave que você configurou.
+        return st.secrets["GOOGLE_API_KEY"]
+    except (KeyError, FileNotFoundError): # FileNotFoundError: não existe secrets.toml
+        # Se não estiver em st.secrets (ex: rodando localmente), tenta carregar do arquivo .env
+        load_dotenv() # Carrega as variáveis do arquivo .env da raiz do projeto
+        # os.getenv() pega o valor da variável de ambiente com o NOME especificado.
+        return os.getenv("GOOGLE_API_KEY")
+
+
+@st.cache_resource(show_spinner=False)
+def _carregar_modelo(api_key: str) -> CachedModel:
+    """
+    Modelo compartilhado por todas as sessões do processo.
+    O modelo é envolvido pelo cache de respostas: o mesmo prompt não é pago duas vezes.
+    Chamadas que não estão no cache passam pela fila do processo (services/llm_scheduler.py),
+    que respeita os limites por minuto da API e dá prioridade às sessões interativas.
+    O SDK só é configurado na primeira chamada à IA (ver services/gemini_model.py).
+    """
+    return CachedModel(ScheduledModel(LazyGenerativeModel(api_key), get_llm_scheduler()), get_response_cache())
+
+
+@st.cache_resource(show_spinner=False)
+def _pre_aquecer_sdk():
+    # Carrega o SDK em segundo plano enquanto o usuário interage com a primeira página.
+    return prewarm_sdk()
+
+
+API_KEY = _carregar_chave_api()
 
 # Verifica se a chave foi carregada. Se não, exibe um erro e impede o app de rodar.
 if not API_KEY:
+    _carregar_chave_api.clear() # Tenta ler de novo na próxima interação (ex: depois de criar o .env)
     st.error("Erro crítico: A chave da API do Google Gemini não foi encontrada.")
     st.error("Por favor, configure-a corretamente:")
     st.error("- **No Streamlit Cloud:** Vá em 'Manage app' -> 'Secrets' e adicione `GOOGLE_API_KEY=\"SUA_CHAVE_AQUI\"`")
     st.error("- **Localmente:** Crie um arquivo `.env` na raiz do seu projeto com `GOOGLE_API_KEY=\"SUA_CHAVE_AQUI\"`")
     st.stop() # Interrompe a execução do Streamlit se a chave não for encontrada
 
-# Configura o SDK do Google Gemini com a chave de API
-genai.configure(api_key=API_KEY)
-# Define o modelo de IA a ser usado. 'gemini-1.5-flash' é rápido e econômico.
-model = genai.GenerativeModel('gemini-1.5-flash')
+model = _carregar_modelo(API_KEY)
+_pre_aquecer_sdk()
 # --- FIM DO BLOCÔNICO DE CONFIGURAÇÃO ---
 
 
+def _descrever_tempos(stream) -> str:
+    """Resumo dos tempos de uma resposta em streaming (tempo até o primeiro trecho e total)."""
+    if stream.time_to_first_token is None:
+        return f"Resposta sem conteúdo após {stream.total_time:.1f}s."
+    return f"Primeiro trecho em {stream.time_to_first_token:.1f}s · resposta completa em {stream.total_time:.1f}s."
+
+
+def _guardar_documento(text: str):
+    """
+    Guarda o texto no armazenamento compartilhado; a sessão mantém apenas o handle.
+    A mesma peça carregada por outras sessões (ou de novo nesta) não é duplicada.
+    """
+    handle = get_document_store().put(text)
+    atual = st.session_state.get("document")
+    if atual is not None and atual.key == handle.key:
+        handle.release()
+        return atual
+    if atual is not None:
+        atual.release() # Sem esperar o Streamlit descartar o estado da interação anterior
+    st.session_state.document = handle
+    return handle
+
+
+def _exibir_previa(documento) -> None:
+    # Só o início do documento é descomprimido para a prévia
+    st.text(documento.preview(PREVIEW_CHARS) + ("..." if len(documento) > PREVIEW_CHARS else "")) # Limita exibição para não sobrecarregar
+
+
 def main():
     # Título principal do aplicativo na página
     st.title("🤖 Assistente Jurídico Inteligente")
@@ -67,6 +128,48 @@ def main():
             "Ex: 'foco na ausência de provas', 'alegar cerceamento de defesa'"
         )
 
+        # Força nova chamada à IA mesmo que a resposta já esteja no cache (a nova resposta é gravada)
+        ignorar_cache = st.checkbox("Ignorar respostas em cache da IA", value=False)
+        modelo_ia = model.with_bypass() if ignorar_cache else model
+        # Exibe as respostas da IA à medida que são geradas, em vez de esperar o texto completo
+        resposta_em_tempo_real = st.checkbox("Exibir respostas da IA em tempo real", value=True)
+        # Como tratar documentos maiores que o orçamento de contexto do prompt
+        modo_contexto = st.radio(
+            "Documentos longos",
+            ["pack", "map_reduce"],
+            format_func={"pack": "Trechos mais relevantes (mais rápido)", "map_reduce": "Resumo de todas as partes (completo)"}.get,
+        )
+
+        # Estatísticas do cache de extração, úteis para dimensionar PARSE_CACHE_MAX_MB
+        with st.expander("Cache de documentos"):
+            st.json(get_parse_cache().stats())
+        # Textos das peças abertas nas sessões: comprimidos, sem duplicatas (DOCUMENT_STORE_MAX_MB)
+        with st.expander("Documentos em uso"):
+            st.json(get_document_store().stats())
+        # Taxa de acerto e latência economizada pelo cache de respostas da IA
+        with st.expander("Cache de respostas da IA"):
+            st.json(model.cache.stats())
+        # Buscas de jurisprudência repetidas, servidas sem consultar as fontes
+        with st.expander("Cache de jurisprudência"):
+            st.json(get_juris_cache().stats())
+        # Chamadas aguardando vaga na cota da API, compartilhada por todas as sessões
+        with st.expander("Fila de chamadas à IA"):
+            st.json(get_llm_scheduler().stats())
+
+        # Painel de administração: tempo de cada etapa (p50/p95/p99), tokens e exportação Prometheus
+        if st.checkbox("Exibir painel de métricas", value=False):
+            metricas = get_metrics()
+            if not metricas.enabled:
+                st.info("Métricas desligadas (METRICS_ENABLED=0).")
+            else:
+                resumo = metricas.snapshot()
+                st.caption("Tempos por etapa (segundos)")
+                st.dataframe(resumo["histogramas"], hide_index=True)
+                st.caption("Contadores (tokens das chamadas à IA)")
+                st.dataframe(resumo["contadores"], hide_index=True)
+                st.download_button("Exportar métricas (Prometheus)", metricas.prometheus_text(),
+                                   file_name="metricas.prom", mime="text/plain")
+
     # Criação de abas para organizar o conteúdo do aplicativo
     tab1, tab2, tab3 = st.tabs(["Análise e Upload", "Estratégia e Argumentos", "Legislação e Jurisprudência"])
 
@@ -77,53 +180,61 @@ def main():
         document_text_input = st.text_area("Ou cole o texto da peça jurídica aqui (se preferir ou para testes rápidos):", height=300)
 
         # Lógica para determinar qual texto usar (upload ou cola)
-        if uploaded_file:
+        documento = st.session_state.get("document")
+        if uploaded_file and documento is not None and st.session_state.get("document_file_id") == uploaded_file.file_id:
+            # Mesmo arquivo da interação anterior: o texto já está no armazenamento de documentos
+            st.success("Documento processado do arquivo com sucesso!")
+            with st.expander("Visualizar texto extraído do arquivo"):
+                _exibir_previa(documento)
+        elif uploaded_file:
             try:
-                # Prioriza o upload de arquivo se houver
-                text_from_file = parse_legal_document(uploaded_file)
-                st.session_state.document_text = text_from_file
-                st.success("Documento processado do arquivo com sucesso!")
+                # Prioriza o upload de arquivo se houver.
+                # A extração é feita página a página: o progresso e a prévia aparecem
+                # antes de a última página ser processada.
+                status = st.empty()
                 with st.expander("Visualizar texto extraído do arquivo"):
-                    st.text(text_from_file[:5000] + ("..." if len(text_from_file) > 5000 else "")) # Limita exibição para não sobrecarregar
+                    preview = st.empty()
+                parts = []
+                preview_text = ""
+                for page in iter_legal_document(uploaded_file):
+                    parts.append(page.text)
+                    if page.total and page.total > 1:
+                        status.progress(page.number / page.total, text=f"Extraindo página {page.number} de {page.total}...")
+                    if len(preview_text) < PREVIEW_CHARS:
+                        preview_text = (preview_text + page.text)[:PREVIEW_CHARS + 1]
+                        preview.text(preview_text[:PREVIEW_CHARS] + ("..." if len(preview_text) > PREVIEW_CHARS else "")) # Limita exibição para não sobrecarregar
+                documento = _guardar_documento("".join(parts))
+                del parts # As páginas já estão no armazenamento; não ficam na memória durante a análise
+                st.session_state.document_file_id = uploaded_file.file_id
+                status.success("Documento processado do arquivo com sucesso!")
             except Exception as e:
                 st.error(f"Erro ao processar documento carregado: {str(e)}")
                 st.info("Certifique-se de que o arquivo PDF/DOCX está bem formatado e não está corrompido.")
                 st.exception(e) # Exibe o traceback completo para depuração
         elif document_text_input: # Se não houver upload, usa o texto colado
-            st.session_state.document_text = document_text_input
+            documento = _guardar_documento(document_text_input)
+            st.session_state.document_file_id = None
             st.success("Texto colado processado com sucesso!")
             with st.expander("Visualizar texto colado"):
-                st.text(document_text_input[:5000] + ("..." if len(document_text_input) > 5000 else ""))
+                _exibir_previa(documento)
         
         # Verifica se há texto disponível para análise pela IA
-        if 'document_text' in st.session_state and st.session_state.document_text:
+        if documento:
             st.markdown("---")
             st.subheader("Análise Preliminar do Documento (IA)")
             if st.button("Analisar Texto com IA"):
                 with st.spinner("A IA está analisando o texto... Isso pode levar alguns segundos."):
                     try:
-                        # Prompt para a análise do documento pela IA
-                        prompt_analise = f"""
-                        Analise o seguinte texto jurídico. Identifique as seguintes informações:
-                        1. Um breve resumo do conteúdo (máximo 5 frases).
-                        2. O(s) ramo(s) do direito mais provável(is) (Ex: Civil, Criminal, Previdenciário, Administrativo, etc.).
-                        3. Os 5-7 pontos mais importantes ou palavras-chave relevantes (entidades, conceitos-chave).
-                        4. As partes envolvidas (Requerente/Autor, Requerido/Réu, etc.).
-                        5. O objetivo principal da peça (Ex: Cobrança, Defesa, Recurso, etc.).
-
-                        Formate a resposta de forma clara e com tópicos (use Markdown para negrito e listas):
-                        **Resumo:** [Seu resumo aqui]
-                        **Ramo(s) do Direito:** [Ramo1, Ramo2]
-                        **Pontos Chave:** [ponto1, ponto2, ponto3, ...]
-                        **Partes Envolvidas:** [Parte A: Nome, Parte B: Nome]
-                        **Objetivo da Peça:** [Objetivo]
-
-                        Texto para análise:
-                        {st.session_state.document_text}
-                        """
-                        response = model.generate_content(prompt_analise)
-                        st.markdown(response.text) # Usa markdown para formatar a resposta da IA
+                        if resposta_em_tempo_real:
+                            stream = stream_analysis(documento.text(), modelo_ia, context_mode=modo_contexto)
+                            st.write_stream(stream) # Renderiza os trechos em Markdown conforme chegam
+                            st.caption(_descrever_tempos(stream))
+                        else:
+                            analysis = generate_analysis(documento.text(), modelo_ia, context_mode=modo_contexto)
+                            st.markdown(analysis) # Usa markdown para formatar a resposta da IA
 
+                    except QuotaExceededError as e:
+                        st.warning(str(e)) # Limite de uso da API: não é falha do documento nem do app
                     except Exception as e:
                         st.error(f"Erro ao gerar análise da IA: {str(e)}")
                         st.info("Verifique se o texto é legível e se há conectividade com a API do Gemini. Tente reduzir o tamanho do texto se for muito longo.")
@@ -134,7 +245,8 @@ def main():
     # --- Aba 2: Geração de Estratégia e Argumentos ---
     with tab2:
         st.subheader("2. Geração de Estratégia e Argumentos")
-        if 'document_text' not in st.session_state or not st.session_state.document_text:
+        documento = st.session_state.get("document")
+        if not documento:
             st.warning("Por favor, carregue ou cole um documento na aba 'Análise e Upload' primeiro para gerar uma estratégia.")
         else:
             st.info(f"Gerando estratégia para **{tipo_acao}** na área **{area_juridica}**.")
@@ -144,14 +256,23 @@ def main():
                 with st.spinner(f"A IA está formulando a estratégia de {tipo_acao}... Isso pode levar alguns segundos."):
                     try:
                         # Chama as funções dos módulos 'services' para gerar a estratégia
-                        if tipo_acao == "Defesa":
-                            strategy = generate_defense(st.session_state.document_text, area_juridica, contexto_estrategia, model)
-                        else: # Acusação
-                            strategy = generate_accusation(st.session_state.document_text, area_juridica, contexto_estrategia, model)
+                        if resposta_em_tempo_real:
+                            gerar = stream_defense if tipo_acao == "Defesa" else stream_accusation
+                            stream = gerar(documento.text(), area_juridica, contexto_estrategia, modelo_ia, context_mode=modo_contexto)
+                            st.subheader(f"Estratégia de {tipo_acao} Recomendada pela IA:")
+                            st.write_stream(stream) # Renderiza os trechos em Markdown conforme chegam
+                            st.caption(_descrever_tempos(stream))
+                        else:
+                            if tipo_acao == "Defesa":
+                                strategy = generate_defense(documento.text(), area_juridica, contexto_estrategia, modelo_ia, context_mode=modo_contexto)
+                            else: # Acusação
+                                strategy = generate_accusation(documento.text(), area_juridica, contexto_estrategia, modelo_ia, context_mode=modo_contexto)
 
-                        st.subheader(f"Estratégia de {tipo_acao} Recomendada pela IA:")
-                        st.markdown(strategy) # Usa markdown para formatar a resposta da IA
+                            st.subheader(f"Estratégia de {tipo_acao} Recomendada pela IA:")
+                            st.markdown(strategy) # Usa markdown para formatar a resposta da IA
 
+                    except QuotaExceededError as e:
+                        st.warning(str(e))
                     except Exception as e:
                         st.error(f"Erro ao gerar estratégia de {tipo_acao}: {str(e)}")
                         st.info("Verifique a qualidade do texto e do prompt. Tente novamente.")
@@ -173,9 +294,11 @@ def main():
                         Se não for uma lei específica, forneça conceitos gerais relacionados ao termo.
                         Forneça a resposta em Português-BR.
                         """
-                        response_legis = model.generate_content(legis_prompt)
+                        response_legis = modelo_ia.generate_content(legis_prompt)
                         st.subheader(f"Legislação Encontrada para '{search_term_legis}' (Via IA):")
                         st.markdown(response_legis.text)
+                    except QuotaExceededError as e:
+                        st.warning(str(e))
                     except Exception as e:
                         st.error(f"Erro ao buscar legislação com IA: {str(e)}")
                         st.exception(e)
@@ -186,14 +309,22 @@ def main():
 
         # Seção para buscar Jurisprudência (usando o mock/API que você configurará em utils/legal_api.py)
         search_term_juris = st.text_input("Buscar Jurisprudência (ex: 'danos morais', 'responsabilidade civil')", key="juris_search")
+        # Similaridade: encontra precedentes com redação diferente da usada na busca (índice local)
+        busca_por_similaridade = st.checkbox("Buscar por similaridade (não depende das palavras exatas)", key="juris_similar")
         if st.button("Buscar Jurisprudência Externa", key="btn_juris_search"):
             if search_term_juris:
                 with st.spinner(f"Buscando jurisprudência para '{search_term_juris}' na área '{area_juridica}'..."):
                     try:
                         # Chama a função do seu utils/legal_api.py (que ainda é um mock ou sua API real)
-                        results = fetch_jurisprudence(search_term_juris, area_juridica)
+                        if busca_por_similaridade:
+                            results = fetch_similar_jurisprudence(search_term_juris, area_juridica)
+                        else:
+                            results = fetch_jurisprudence(search_term_juris, area_juridica)
                         if results and not results.get("error"):
                             st.subheader(f"Resultados da Jurisprudência para: '{results.get('termo', search_term_juris)}'")
+                            if results.get("fontes_com_erro"):
+                                # Resultado parcial: algumas fontes falharam ou não responderam no prazo
+                                st.warning("Fontes indisponíveis nesta busca: " + ", ".join(results["fontes_com_erro"]))
                             if results['resultados']:
                                 for res in results['resultados']:
                                     st.json(res) # Exibe o resultado como JSON formatado
@@ -209,6 +340,21 @@ def main():
             else:
                 st.warning("Por favor, digite um termo para buscar jurisprudência.")
 
+        # Precedentes semelhantes ao documento carregado na aba 'Análise e Upload'
+        if documento:
+            if st.button("Buscar precedentes semelhantes ao documento", key="btn_juris_similar_doc"):
+                with st.spinner("Comparando o documento com as ementas do índice local..."):
+                    results = fetch_similar_jurisprudence(documento.text(), area_juridica)
+                    if results.get("error"):
+                        st.error("Não foi possível buscar precedentes semelhantes.")
+                        st.code(results["error"])
+                    elif results["resultados"]:
+                        st.subheader("Precedentes mais semelhantes ao documento")
+                        for res in results["resultados"]:
+                            st.json(res)
+                    else:
+                        st.info("Nenhum precedente semelhante encontrado.")
+
 # Disclaimer final do aplicativo
 st.markdown("---")
 st.caption("⚠️ **Atenção:** Este aplicativo utiliza inteligência artificial e serve apenas como uma ferramenta de **assistência**. As informações geradas não constituem aconselhamento jurídico e devem ser sempre revisadas e validadas por um profissional do direito qualificado.")
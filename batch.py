@@ -0,0 +1,308 @@
+# batch.py
+"""
+Processamento em lote (sem Streamlit) de uma pasta de peças jurídicas.
+
+Extrai o texto em paralelo (pool de processos), gera análise, defesa e/ou acusação com
+concorrência limitada de chamadas ao LLM e grava um resultado por linha em JSONL, à medida
+que cada documento termina. O próprio arquivo de saída serve de checkpoint: rodar de novo o
+mesmo comando continua de onde parou, pulando os documentos já gravados.
+
+Uso:
+    python batch.py peticoes/ -o resultados.jsonl --tasks analysis,defense --area Civil
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from services.accusation_strategy import generate_accusation
+from services.defense_strategy import generate_defense
+from services.document_analysis import generate_analysis
+from services.gemini_model import LazyGenerativeModel
+from services.llm_cache import CachedModel, get_response_cache
+from services.llm_scheduler import PRIORITY_BATCH, ScheduledModel, get_llm_scheduler
+from utils.document_parser import parse_legal_document
+from utils.metrics import get_metrics
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt"}
+TASKS = ("analysis", "defense", "accusation")
+# Campo de cada tarefa na linha de saída.
+TASK_FIELDS = {"analysis": "analise", "defense": "defesa", "accusation": "acusacao"}
+PROGRESS_EVERY_SECONDS = 30
+
+
+def document_key(path: Path, root: Path) -> str:
+    """Identifica o documento no checkpoint: caminho relativo, tamanho e data de modificação."""
+    stat = path.stat()
+    return f"{path.relative_to(root).as_posix()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def list_documents(root: Path) -> list:
+    return sorted(
+        path for path in root.rglob("*")
+        if path.is_file() and path.suffix.lower() in SUPPORTED_EXTENSIONS
+    )
+
+
+def _truncate_partial_line(output: Path, block_size: int = 64 * 1024) -> None:
+    """Remove a última linha se ela não terminar em quebra de linha, lendo só o final do arquivo."""
+    with open(output, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        if not end:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        # Procura a última quebra de linha de trás para frente, um bloco por vez.
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            position = start
+        f.truncate(0)
+
+
+def load_checkpoint(output: Path, retry_failed: bool = False) -> set:
+    """
+    Chaves dos documentos já gravados na saída. Uma última linha incompleta (processo
+    interrompido no meio da escrita) é descartada, para que as novas linhas fiquem íntegras.
+
+    Com `retry_failed`, documentos gravados com erro voltam a ser processados; a nova linha
+    é acrescentada ao final (vale a última linha de cada chave).
+    """
+    if not output.exists():
+        return set()
+    _truncate_partial_line(output)
+    done = set()
+    with open(output, encoding="utf-8") as f:
+        for line in f: # Linha a linha: a saída de um lote grande não é carregada inteira
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if "chave" not in record:
+                continue
+            if retry_failed and "erros" in record:
+                done.discard(record["chave"])
+            else:
+                done.add(record["chave"])
+    return done
+
+
+def _init_parse_worker():
+    # Cada processo do pool já é um nível de paralelismo: sem sub-pool para PDFs grandes.
+    import utils.document_parser as document_parser
+    document_parser.PDF_WORKERS = 1
+
+
+def parse_file(path: str) -> dict:
+    """Extrai o texto de um arquivo (executado nos processos do pool)."""
+    start = time.perf_counter()
+    try:
+        if path.lower().endswith(".txt"):
+            with open(path, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+        else:
+            with open(path, "rb") as f:
+                text = parse_legal_document(f)
+        return {"text": text, "seconds": time.perf_counter() - start}
+    except Exception as e:
+        return {"error": str(e), "seconds": time.perf_counter() - start}
+
+
+def build_model(bypass_cache: bool = False):
+    """
+    Mesmo modelo do app (Gemini 1.5 Flash com cache de respostas), configurado pelo .env.
+    As chamadas passam pela fila de cota (LLM_RPM, LLM_TPM) com prioridade de lote.
+    """
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        raise SystemExit("GOOGLE_API_KEY não configurada (defina no ambiente ou no arquivo .env).")
+    scheduled = ScheduledModel(LazyGenerativeModel(api_key), get_llm_scheduler(), priority=PRIORITY_BATCH)
+    return CachedModel(scheduled, get_response_cache(), bypass=bypass_cache)
+
+
+def run_task(task: str, model, text: str, area: str, contexto: str, context_mode: str):
+    """Executa uma tarefa; devolve (resultado, erro)."""
+    try:
+        if task == "analysis":
+            return generate_analysis(text, model, context_mode=context_mode), None
+        generate = generate_defense if task == "defense" else generate_accusation
+        result = generate(text, area, contexto, model, context_mode=context_mode)
+        # As estratégias devolvem a falha como texto, em vez de levantar exceção.
+        if result.startswith("Falha ao gerar"):
+            return None, result
+        return result, None
+    except Exception as e:
+        return None, str(e)
+
+
+class BatchRunner:
+    """
+    Encadeia extração (processos) e chamadas ao LLM (threads, no máximo `llm_concurrency`
+    simultâneas). A extração fica no máximo `parse_ahead` documentos à frente do LLM, para
+    não acumular textos na memória numa pasta com milhares de arquivos.
+    """
+
+    def __init__(self, model, tasks: list, area: str = "", contexto: str = "", context_mode: str = None,
+                 parse_workers: int = None, llm_concurrency: int = 4, parse_ahead: int = None):
+        self.model = model
+        self.tasks = tasks
+        self.area = area
+        self.contexto = contexto
+        self.context_mode = context_mode
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.llm_concurrency = llm_concurrency
+        self.parse_ahead = parse_ahead or max(self.parse_workers, llm_concurrency) * 2
+
+        self.processed = 0
+        self.failed = 0
+        self._write_lock = threading.Lock()
+
+    def run(self, root: Path, output: Path, resume: bool = True, retry_failed: bool = False) -> dict:
+        done = load_checkpoint(output, retry_failed) if resume else set()
+        documents = list_documents(root)
+        pending = [(path, key) for path in documents if (key := document_key(path, root)) not in done]
+        print(f"{len(documents)} documentos, {len(documents) - len(pending)} já processados, "
+              f"{len(pending)} pendentes", file=sys.stderr)
+
+        start = time.perf_counter()
+        last_report = start
+        mode = "a" if resume else "w"
+        with open(output, mode, encoding="utf-8") as out, \
+                ProcessPoolExecutor(self.parse_workers, initializer=_init_parse_worker) as parse_pool, \
+                ThreadPoolExecutor(self.llm_concurrency) as llm_pool:
+            queue = iter(pending)
+            parsing = {}
+            documents_in_flight = {}
+
+            def submit_parses():
+                while len(parsing) + len(documents_in_flight) < self.parse_ahead:
+                    item = next(queue, None)
+                    if item is None:
+                        return
+                    parsing[parse_pool.submit(parse_file, str(item[0]))] = item
+
+            submit_parses()
+            while parsing or documents_in_flight:
+                finished, _ = wait(list(parsing) + list(documents_in_flight), timeout=PROGRESS_EVERY_SECONDS,
+                                   return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in parsing:
+                        path, key = parsing.pop(future)
+                        parsed = future.result()
+                        record = {
+                            "arquivo": path.relative_to(root).as_posix(),
+                            "chave": key,
+                            "extracao_segundos": round(parsed["seconds"], 3),
+                        }
+                        if "error" in parsed:
+                            record["erros"] = {"extracao": parsed["error"]}
+                            self._write(out, record)
+                            continue
+                        record["caracteres"] = len(parsed["text"])
+                        documents_in_flight[llm_pool.submit(self._run_tasks, parsed["text"])] = record
+                    else:
+                        record = documents_in_flight.pop(future)
+                        record.update(future.result())
+                        self._write(out, record)
+                submit_parses()
+
+                now = time.perf_counter()
+                if now - last_report >= PROGRESS_EVERY_SECONDS:
+                    last_report = now
+                    print(self._progress(now - start, len(pending)), file=sys.stderr)
+
+        elapsed = time.perf_counter() - start
+        print(self._progress(elapsed, len(pending)), file=sys.stderr)
+        return {
+            "documentos": self.processed,
+            "falhas": self.failed,
+            "segundos": round(elapsed, 1),
+            "documentos_por_minuto": round(self.processed / elapsed * 60, 1) if elapsed else 0.0,
+        }
+
+    def _run_tasks(self, text: str) -> dict:
+        # As tarefas do mesmo documento rodam em sequência; documentos diferentes, em paralelo.
+        result = {}
+        errors = {}
+        started = time.perf_counter()
+        for task in self.tasks:
+            value, error = run_task(task, self.model, text, self.area, self.contexto, self.context_mode)
+            if error:
+                errors[task] = error
+            else:
+                result[TASK_FIELDS[task]] = value
+        result["llm_segundos"] = round(time.perf_counter() - started, 3)
+        if errors:
+            result["erros"] = errors
+        return result
+
+    def _write(self, out, record: dict) -> None:
+        # Uma linha por documento, gravada em disco antes de seguir: é o checkpoint da execução.
+        with self._write_lock:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+            self.processed += 1
+            if "erros" in record:
+                self.failed += 1
+
+    def _progress(self, elapsed: float, total: int) -> str:
+        rate = self.processed / elapsed * 60 if elapsed else 0.0
+        return (f"{self.processed}/{total} documentos ({self.failed} com erro) em {elapsed:.0f}s: "
+                f"{rate:.1f} documentos/min")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Processamento em lote de peças jurídicas (PDF, DOCX, TXT)")
+    parser.add_argument("input", help="pasta com os documentos (subpastas incluídas)")
+    parser.add_argument("-o", "--output", default="resultados.jsonl", help="arquivo JSONL de saída e checkpoint")
+    parser.add_argument("--tasks", default="analysis", help=f"tarefas separadas por vírgula: {', '.join(TASKS)}")
+    parser.add_argument("--area", default="Civil", help="área jurídica usada nas estratégias")
+    parser.add_argument("--contexto", default="", help="contexto adicional para as estratégias")
+    parser.add_argument("--context-mode", choices=["pack", "map_reduce"], help="modo para documentos longos")
+    parser.add_argument("--parse-workers", type=int, help="processos de extração (padrão: número de CPUs)")
+    parser.add_argument("--llm-concurrency", type=int, default=4, help="documentos com chamadas ao LLM simultâneas")
+    parser.add_argument("--no-resume", action="store_true", help="ignora o checkpoint e recomeça a saída")
+    parser.add_argument("--retry-failed", action="store_true", help="reprocessa documentos gravados com erro")
+    parser.add_argument("--metrics-file", help="grava as métricas (formato Prometheus) ao final")
+    parser.add_argument("--no-cache", action="store_true", help="ignora respostas em cache da IA")
+    args = parser.parse_args()
+
+    tasks = [task.strip() for task in args.tasks.split(",") if task.strip()]
+    unknown = set(tasks) - set(TASKS)
+    if unknown:
+        parser.error(f"tarefas desconhecidas: {', '.join(sorted(unknown))}")
+
+    runner = BatchRunner(
+        build_model(bypass_cache=args.no_cache),
+        tasks,
+        area=args.area,
+        contexto=args.contexto,
+        context_mode=args.context_mode,
+        parse_workers=args.parse_workers,
+        llm_concurrency=args.llm_concurrency,
+    )
+    report = runner.run(Path(args.input), Path(args.output), resume=not args.no_resume,
+                        retry_failed=args.retry_failed)
+    print(json.dumps(report, ensure_ascii=False))
+    if args.metrics_file:
+        # Tempos e tokens das chamadas ao LLM (a extração roda em outros processos e não entra aqui).
+        Path(args.metrics_file).write_text(get_metrics().prometheus_text(), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
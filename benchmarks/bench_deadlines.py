@@ -0,0 +1,64 @@
+# benchmarks/bench_deadlines.py
+"""
+Mede o cálculo de prazos de uma carteira sintética: caso a caso e em lote, e a montagem dos calendários.
+
+Uso:
+    python benchmarks/bench_deadlines.py --cases 50000
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import numpy as np
+
+from utils.calculations import calculate_legal_dates, calculate_legal_dates_batch
+from utils.deadlines import DeadlineCalendar
+
+AREAS = ["Civil", "Criminal", "Previdenciário", "Trabalhista"]
+UFS = ["SP", "RJ", "MG", "RS", "BA", "PE", ""]
+TRIBUNAIS = ["TJ", "TRF", ""]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cases", type=int, default=50_000)
+    parser.add_argument("--sample", type=int, default=2_000, help="casos calculados um a um (estimativa)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    dates = np.datetime64("2020-01-01") + rng.integers(0, 6 * 365, args.cases)
+    areas = rng.choice(AREAS, args.cases)
+    ufs = rng.choice(UFS, args.cases)
+    tribunais = rng.choice(TRIBUNAIS, args.cases)
+
+    start = time.perf_counter()
+    DeadlineCalendar("SP", "TRF")
+    print(f"montagem de um calendário (2000-2100): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    start = time.perf_counter()
+    calculate_legal_dates_batch(dates, areas, uf=ufs, tribunal=tribunais)
+    print(f"lote, primeira chamada (monta {len(UFS) * len(TRIBUNAIS)} calendários): {time.perf_counter() - start:.2f}s")
+
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        batch = calculate_legal_dates_batch(dates, areas, uf=ufs, tribunal=tribunais)
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"lote: {args.cases} casos em {best * 1000:.0f} ms ({args.cases / best:,.0f} casos/s)")
+
+    sample = min(args.sample, args.cases)
+    start = time.perf_counter()
+    for i in range(sample):
+        single = calculate_legal_dates(dates[i].astype(object), areas[i], uf=ufs[i], tribunal=tribunais[i])
+        assert single["Resposta"] == batch["Resposta"][i].astype(object), i
+    per_case = (time.perf_counter() - start) / sample
+    print(f"caso a caso: {per_case * 1e6:.0f} µs por caso; {args.cases} casos levariam ~{per_case * args.cases:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
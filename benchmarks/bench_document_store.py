@@ -0,0 +1,77 @@
+# benchmarks/bench_document_store.py
+"""
+Compara a memória das sessões guardando o texto inteiro com o armazenamento compartilhado de documentos.
+
+Cada sessão abre uma peça sorteada de um conjunto menor de documentos distintos (a mesma petição
+aberta por vários usuários), como em st.session_state. Mede também o custo de cada leitura:
+texto completo, prévia e documentos que foram para o disco.
+
+Uso:
+    python benchmarks/bench_document_store.py --sessions 200 --documents 40 --pages 60
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import synthetic_lines
+from utils.document_store import DocumentStore
+
+
+def _mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def _per_call(function, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        function(key)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--documents", type=int, default=40, help="peças distintas entre as sessões")
+    parser.add_argument("--pages", type=int, default=60, help="páginas (40 linhas) por documento")
+    parser.add_argument("--max-mb", type=float, default=0.25, help="limite em memória do store (MB)")
+    args = parser.parse_args()
+
+    texts = ["\n".join(synthetic_lines(args.pages * 40, seed=i)) for i in range(args.documents)]
+    rng = random.Random(0)
+    opened = [rng.randrange(args.documents) for _ in range(args.sessions)]
+
+    # Como antes: cada sessão mantém a própria cópia do texto extraído.
+    plain = sum(len(texts[i].encode("utf-8")) for i in opened)
+    print(f"{args.sessions} sessões, {len(set(opened))} documentos distintos")
+    print(f"texto em st.session_state: {_mb(plain)}")
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        store = DocumentStore(max_memory_bytes=int(args.max_mb * 1024 * 1024), spill_dir=spill_dir)
+        start = time.perf_counter()
+        handles = [store.put(texts[i]) for i in opened]
+        elapsed = time.perf_counter() - start
+        stats = store.stats()
+        print(f"store: {_mb(stats['memory_bytes'])} em memória + "
+              f"{_mb(stats['compressed_bytes'] - stats['memory_bytes'])} no disco "
+              f"(compressão {stats['compression_ratio']:.1f}x, {stats['deduplicated']} duplicatas, "
+              f"{stats['spills']} documentos no disco); put médio {elapsed / len(handles) * 1000:.2f} ms")
+
+        resident = list(store._resident)
+        cold = [handle.key for handle in handles if handle.key not in store._resident][:20]
+        print(f"texto completo, em memória: {_per_call(store.text, resident) * 1000:.2f} ms")
+        print(f"prévia (5000 caracteres): {_per_call(store.preview, resident) * 1000:.3f} ms")
+        if cold:
+            print(f"texto completo, lido do disco: {_per_call(store.text, cold) * 1000:.2f} ms")
+
+        del handles
+        print(f"após encerrar as sessões: {store.stats()['documents']} documentos no store")
+
+
+if __name__ == "__main__":
+    main()
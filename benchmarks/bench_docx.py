@@ -0,0 +1,74 @@
+# benchmarks/bench_docx.py
+"""
+Compara o extrator incremental de DOCX com o python-docx: tempo, vazão e pico de memória.
+
+Cada medição roda em um processo novo, para que o pico de memória (RSS) de uma não
+contamine a outra.
+
+Uso:
+    python benchmarks/bench_docx.py --pages 50 500 2000
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+ENGINES = ["stream", "python-docx"]
+
+
+def _measure(engine: str, path: str) -> dict:
+    # Executado no processo filho: o motor é escolhido antes de importar o parser.
+    os.environ["DOCX_ENGINE"] = engine
+    from utils.document_parser import _iter_docx
+
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with open(path, "rb") as file:
+        chars = sum(len(block.text) for block in _iter_docx(file))
+    elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {"seconds": elapsed, "chars": chars, "peak_rss_delta_mb": (peak_kb - baseline_kb) / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, nargs="+", default=[50, 500, 2000])
+    parser.add_argument("--worker", nargs=2, metavar=("ENGINE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_measure(*args.worker)))
+        return
+
+    from benchmarks.synthetic import make_docx
+
+    print(f"{'páginas':>8} {'MB':>6} {'motor':>12} {'segundos':>9} {'páginas/s':>10} {'pico RSS (MB)':>14} {'caracteres':>11}")
+    for pages in args.pages:
+        with tempfile.NamedTemporaryFile(suffix=".docx", delete=False) as tmp:
+            tmp.write(make_docx(pages))
+        try:
+            size_mb = os.path.getsize(tmp.name) / 1e6
+            for engine in ENGINES:
+                output = subprocess.run(
+                    [sys.executable, __file__, "--worker", engine, tmp.name],
+                    check=True, capture_output=True, text=True,
+                ).stdout
+                result = json.loads(output)
+                print(
+                    f"{pages:>8} {size_mb:>6.2f} {engine:>12} {result['seconds']:>9.2f} "
+                    f"{pages / result['seconds']:>10.0f} {result['peak_rss_delta_mb']:>14.1f} {result['chars']:>11}"
+                )
+        finally:
+            os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
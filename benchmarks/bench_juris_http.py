@@ -0,0 +1,67 @@
+# benchmarks/bench_juris_http.py
+"""
+Mede a latência da busca de jurisprudência em várias fontes contra o servidor local simulado:
+consulta paralela com pool de conexões vs. consultas sequenciais com `requests.get` avulso.
+
+Uso:
+    python benchmarks/bench_juris_http.py --rounds 30 --deadline 1.0
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import requests
+
+from benchmarks.fake_juris_server import FakeJurisServer
+
+
+def _percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--deadline", type=float, default=1.0, help="prazo total da busca (s)")
+    args = parser.parse_args()
+
+    server = FakeJurisServer().start()
+    sources = [{"nome": name, "url": f"{server.base_url}/{name}"} for name in server.sources]
+    os.environ["JURIS_SOURCES"] = json.dumps(sources)
+    os.environ["JURIS_DEADLINE_SECONDS"] = str(args.deadline)
+    from utils.legal_api import fetch_jurisprudence
+
+    pooled, partial = [], 0
+    for i in range(args.rounds):
+        start = time.perf_counter()
+        result = fetch_jurisprudence(f"danos morais {i}", "Civil")
+        pooled.append(time.perf_counter() - start)
+        partial += bool(result.get("fontes_com_erro"))
+
+    naive = []
+    for i in range(min(args.rounds, 5)):
+        start = time.perf_counter()
+        for source in sources:
+            try:
+                requests.get(source["url"], params={"query": f"danos morais {i}", "limit": 3}).json()
+            except (requests.RequestException, ValueError):
+                pass
+        naive.append(time.perf_counter() - start)
+
+    print(f"{'modo':>24} {'p50 (s)':>8} {'p95 (s)':>8} {'máx (s)':>8}")
+    for label, values in (("paralelo + pool", pooled), ("sequencial requests.get", naive)):
+        print(f"{label:>24} {statistics.median(values):>8.3f} {_percentile(values, 0.95):>8.3f} {max(values):>8.3f}")
+    print(f"buscas com resultado parcial: {partial}/{args.rounds}; requisições por fonte: {server.requests}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# benchmarks/bench_juris_index.py
+"""
+Gera um dump sintético de ementas, ingere no índice local (FTS5) e mede o tempo das buscas.
+
+Uso:
+    python benchmarks/bench_juris_index.py --docs 1000000 --queries 200
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import utils.juris_index as juris_index
+from utils.juris_index import JurisIndex
+
+AREAS = ["Civil", "Criminal", "Previdenciário", "Trabalhista", "Tributário"]
+TRIBUNAIS = ["TJSP", "TJRJ", "TJMG", "TJRS", "TJPR", "STJ"]
+TEMAS = [
+    "danos morais", "responsabilidade civil", "plano de saúde", "negativação indevida",
+    "aposentadoria por invalidez", "auxílio-doença", "tráfico de drogas", "furto qualificado",
+    "rescisão contratual", "cobrança indevida", "execução fiscal", "usucapião extraordinária",
+    "alienação fiduciária", "prescrição intercorrente", "cerceamento de defesa", "pensão por morte",
+]
+COMPLEMENTOS = [
+    "Sentença mantida.", "Recurso conhecido e provido.", "Recurso não provido.",
+    "Valor da indenização reduzido.", "Inversão do ônus da prova.", "Nexo causal comprovado.",
+    "Ausência de provas da materialidade.", "Honorários majorados.", "Precedentes do STJ.",
+]
+
+
+def synthetic_records(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(count):
+        temas = rng.sample(TEMAS, 2)
+        yield {
+            "processo": f"{i:07d}-{rng.randint(10, 99)}.20{rng.randint(10, 24)}.8.26.{rng.randint(1, 9999):04d}",
+            "relator": f"Des. Relator {rng.randint(1, 500)}",
+            "ementa": f"APELAÇÃO. {temas[0].upper()}. Discussão sobre {temas[1]} e {temas[0]}. "
+                      + " ".join(rng.sample(COMPLEMENTOS, 3)),
+            "decisao": rng.choice(["Provido", "Não Provido", "Parcialmente Provido"]),
+            "area": rng.choice(AREAS),
+            "tribunal": rng.choice(TRIBUNAIS),
+        }
+
+
+def run(args, workdir: str):
+    dump = os.path.join(workdir, "dump.jsonl")
+    db = args.keep or os.path.join(workdir, "juris.sqlite3")
+    with open(dump, "w", encoding="utf-8") as f:
+        for record in synthetic_records(args.docs):
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    index = JurisIndex(db)
+    start = time.perf_counter()
+    result = index.ingest_jsonl(dump)
+    index.optimize()
+    ingest_seconds = time.perf_counter() - start
+    print(f"ingestão: {result['inserted']} documentos em {ingest_seconds:.1f}s "
+          f"({result['inserted'] / ingest_seconds:,.0f} docs/s), banco com {os.path.getsize(db) / 1e6:.0f} MB")
+
+    # Reingestão do mesmo dump: tudo deve ser ignorado (ingestão incremental).
+    start = time.perf_counter()
+    again = index.ingest_jsonl(dump)
+    print(f"reingestão: {again['inserted']} inseridos, {again['skipped']} ignorados em {time.perf_counter() - start:.1f}s")
+
+    rng = random.Random(1)
+    for label, area in (("sem área", None), ("com área", "Civil")):
+        timings = []
+        for _ in range(args.queries):
+            term = rng.choice(TEMAS + ["acao indenizatoria", "onus da prova", "honorarios"])
+            start = time.perf_counter()
+            index.search(term, area=area, limit=3)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        print(f"busca {label} (limite de candidatos {args.rank_window}): p50 {statistics.median(timings):.2f} ms, "
+              f"p95 {timings[int(0.95 * len(timings)) - 1]:.2f} ms, máx {timings[-1]:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--keep", help="caminho para manter o banco gerado (padrão: temporário)")
+    parser.add_argument("--rank-window", type=int, default=juris_index.RANK_WINDOW,
+                        help="candidatos ranqueados por busca (0 = todas as ocorrências)")
+    args = parser.parse_args()
+    juris_index.RANK_WINDOW = args.rank_window
+
+    # O diretório temporário guarda o dump e, sem --keep, também o banco: removido ao final.
+    workdir = tempfile.mkdtemp()
+    try:
+        run(args, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
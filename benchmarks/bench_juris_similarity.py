@@ -0,0 +1,81 @@
+# benchmarks/bench_juris_similarity.py
+"""
+Gera ementas sintéticas, constrói os vetores de similaridade e mede abertura e buscas.
+
+Uso:
+    python benchmarks/bench_juris_similarity.py --docs 200000 --queries 100
+    python benchmarks/bench_juris_similarity.py --db dados/jurisprudencia.sqlite3  # índice existente
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.bench_juris_index import TEMAS, synthetic_records
+from utils.juris_index import JurisIndex
+from utils.juris_similarity import SimilarityIndex, build_vectors
+
+
+def percentiles(timings: list) -> str:
+    timings = sorted(timings)
+    return (f"p50 {statistics.median(timings):.1f} ms, p95 {timings[int(0.95 * len(timings)) - 1]:.1f} ms, "
+            f"máx {timings[-1]:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch", type=int, default=32, help="consultas por lote na medição em lote")
+    parser.add_argument("--db", help="índice existente (não gera dados sintéticos)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    db = args.db
+    if not db:
+        db = os.path.join(workdir, "juris.sqlite3")
+        start = time.perf_counter()
+        JurisIndex(db).ingest(synthetic_records(args.docs))
+        print(f"ingestão: {args.docs} documentos em {time.perf_counter() - start:.1f}s")
+    index = JurisIndex(db)
+    vectors_dir = os.path.join(workdir, "vectors")
+
+    start = time.perf_counter()
+    meta = build_vectors(index, vectors_dir)
+    build_seconds = time.perf_counter() - start
+    size_mb = os.path.getsize(os.path.join(vectors_dir, meta["generation"], "vectors.f32")) / 1e6
+    print(f"construção: {meta['count']} vetores em {build_seconds:.1f}s "
+          f"({meta['count'] / build_seconds:,.0f} docs/s), matriz com {size_mb:.0f} MB")
+
+    start = time.perf_counter()
+    engine = SimilarityIndex(vectors_dir, index)
+    print(f"abertura (memmap): {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    rng = random.Random(1)
+    queries = [" ".join(rng.sample(TEMAS, 2)) + " recurso provido" for _ in range(args.queries)]
+    engine.search(queries[0])  # primeira leitura das páginas do memmap
+    for label, area in (("sem área", None), ("com área", "Civil")):
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            engine.search(query, 3, area)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"busca {label}: {percentiles(timings)}")
+
+    batches = [queries[i:i + args.batch] for i in range(0, len(queries), args.batch)]
+    start = time.perf_counter()
+    for batch in batches:
+        engine.search_many(batch, 3)
+    elapsed = time.perf_counter() - start
+    print(f"em lotes de {args.batch}: {elapsed * 1000 / len(queries):.1f} ms por consulta")
+
+
+if __name__ == "__main__":
+    main()
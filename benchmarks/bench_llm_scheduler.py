@@ -0,0 +1,136 @@
+# benchmarks/bench_llm_scheduler.py
+"""
+Simula várias sessões chamando o LLM ao mesmo tempo contra uma cota por "minuto", com e sem a fila.
+
+O modelo falso responde 429 (com "Please retry in Xs") quando a cota da janela atual acaba,
+como a API do Gemini. O "minuto" é comprimido para `--period` segundos, e a fila usa o mesmo
+período. Parte das sessões envia prompts idênticos (ex: o mesmo documento analisado por duas
+pessoas), e um lote de baixa prioridade disputa a cota com as sessões interativas.
+
+Uso:
+    python benchmarks/bench_llm_scheduler.py --sessions 30 --rpm 20 --period 2
+"""
+
+import argparse
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_model import FakeGenerativeModel
+from services.llm_scheduler import PRIORITY_BATCH, LLMScheduler, ScheduledModel
+from utils.metrics import get_metrics
+
+
+class FakeQuotaError(Exception):
+    code = 429
+
+
+class QuotaModel(FakeGenerativeModel):
+    """Modelo falso com cota de `limit` chamadas por janela fixa de `period` segundos."""
+
+    def __init__(self, limit: int, period: float, **kwargs):
+        super().__init__(**kwargs)
+        self.limit = limit
+        self.period = period
+        self.window = None
+        self.used = 0
+        self.rejected = 0
+        self._quota_lock = threading.Lock()
+
+    def generate_content(self, contents, generation_config=None, stream: bool = False, **kwargs):
+        with self._quota_lock:
+            now = time.monotonic()
+            window = int(now // self.period)
+            if window != self.window:
+                self.window, self.used = window, 0
+            if self.used >= self.limit:
+                self.rejected += 1
+                retry = (window + 1) * self.period - now
+                raise FakeQuotaError(f"429 Resource has been exhausted. Please retry in {retry:.2f}s.")
+            self.used += 1
+        return super().generate_content(contents, generation_config=generation_config, stream=stream, **kwargs)
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def simulate(model_for, sessions: int, duplicates: int, batch_jobs: int) -> dict:
+    """Dispara as sessões interativas e o lote ao mesmo tempo; devolve tempos e falhas de cada grupo."""
+    results = {"interativo": [], "lote": []}
+    failures = {"interativo": 0, "lote": 0}
+    lock = threading.Lock()
+
+    def run(group: str, prompt: str):
+        start = time.perf_counter()
+        try:
+            model_for(group).generate_content(prompt).text
+            with lock:
+                results[group].append(time.perf_counter() - start)
+        except Exception:
+            with lock:
+                failures[group] += 1
+
+    jobs = [("lote", f"documento do lote {i}") for i in range(batch_jobs)]
+    # As `duplicates` primeiras sessões analisam o mesmo documento.
+    jobs += [("interativo", "documento compartilhado" if i < duplicates else f"documento da sessão {i}")
+             for i in range(sessions)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(len(jobs)) as executor:
+        list(executor.map(lambda job: run(*job), jobs))
+    elapsed = time.perf_counter() - start
+    summary = {"segundos": elapsed}
+    for group, timings in results.items():
+        summary[group] = {
+            "ok": len(timings),
+            "falhas": failures[group],
+            "p50": statistics.median(timings) if timings else None,
+            "p95": percentile(timings, 0.95) if timings else None,
+        }
+    return summary
+
+
+def _print(label: str, summary: dict, model: QuotaModel) -> None:
+    print(f"{label}: {summary['segundos']:.1f}s no total, {len(model.prompts)} chamadas aceitas pela API, "
+          f"{model.rejected} respostas 429")
+    for group in ("interativo", "lote"):
+        data = summary[group]
+        times = f"p50 {data['p50']:.2f}s, p95 {data['p95']:.2f}s" if data["ok"] else "sem respostas"
+        print(f"  {group:>10}: {data['ok']} ok, {data['falhas']} falhas para o usuário; {times}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=30, help="chamadas interativas simultâneas")
+    parser.add_argument("--duplicates", type=int, default=6, help="sessões com o mesmo prompt")
+    parser.add_argument("--batch-jobs", type=int, default=20, help="chamadas do lote, disparadas junto")
+    parser.add_argument("--rpm", type=int, default=20, help="cota de chamadas por período")
+    parser.add_argument("--period", type=float, default=2.0, help="duração simulada de um minuto (s)")
+    parser.add_argument("--latency", type=float, default=0.2)
+    args = parser.parse_args()
+
+    # Sem a fila: cada sessão chama a API diretamente.
+    model = QuotaModel(args.rpm, args.period, latency=args.latency)
+    _print("sem fila", simulate(lambda group: model, args.sessions, args.duplicates, args.batch_jobs), model)
+
+    time.sleep(args.period)  # começa numa janela de cota nova
+    model = QuotaModel(args.rpm, args.period, latency=args.latency)
+    scheduler = LLMScheduler(rpm=args.rpm, tpm=0, max_concurrency=8, max_retries=5,
+                             queue_timeout=60, period=args.period)
+    interactive = ScheduledModel(model, scheduler)
+    batch = interactive.with_priority(PRIORITY_BATCH)
+    summary = simulate(lambda group: batch if group == "lote" else interactive,
+                       args.sessions, args.duplicates, args.batch_jobs)
+    _print("com fila", summary, model)
+    coalesced = sum(item["valor"] for item in get_metrics().snapshot()["contadores"] if item["nome"] == "llm_coalesced")
+    print(f"  chamadas idênticas unificadas: {coalesced:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# benchmarks/bench_map_reduce.py
+"""
+Mede o tempo do pipeline map-reduce de documentos longos com um modelo falso e confere
+que todas as partes do documento chegam ao prompt final.
+
+Uso:
+    python benchmarks/bench_map_reduce.py --latency 0.2 --workers 1 4 8
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_model import FakeGenerativeModel
+from benchmarks.synthetic import synthetic_lines
+import services.long_document as long_document
+from services.defense_strategy import generate_defense
+from services.long_document import CHUNK_MAX_CHARS, SINGLE_CALL_MAX_CHARS, split_document
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="latência simulada de cada chamada (s)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50_000, 200_000, 1_000_000],
+                        help="tamanhos de documento, em caracteres")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'caracteres':>11} {'partes':>7} {'workers':>8} {'chamadas':>9} {'segundos':>9} {'pico simult.':>13} {'ok':>4}")
+    for size in args.sizes:
+        lines = synthetic_lines(size // 60 + 1)
+        document = "\n".join(lines)[:size]
+        chunks = split_document(document, CHUNK_MAX_CHARS)
+        assert "".join(chunks) == document, "divisão perdeu texto"
+
+        for workers in args.workers:
+            model = FakeGenerativeModel(latency=args.latency)
+            long_document.MAP_MAX_WORKERS = workers
+            start = time.perf_counter()
+            generate_defense(document, "Civil", "", model, context_mode="map_reduce")
+            elapsed = time.perf_counter() - start
+
+            final_prompt = model.prompts[-1]
+            if size <= SINGLE_CALL_MAX_CHARS:
+                ok = document in final_prompt
+            else:
+                ok = all(f"EXTRATO {i}/{len(chunks)}" in final_prompt for i in range(1, len(chunks) + 1))
+            failures += not ok
+            print(f"{size:>11} {len(chunks):>7} {workers:>8} {len(model.prompts):>9} {elapsed:>9.2f} "
+                  f"{model.max_concurrency:>13} {'sim' if ok else 'NÃO':>4}")
+    if failures:
+        sys.exit(f"{failures} execuções sem todas as partes do documento no prompt final")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_pdf_parallel.py
+"""
+Mede a vazão (páginas/s) da extração de PDF serial e paralela, variando o número de processos.
+
+Uso:
+    python benchmarks/bench_pdf_parallel.py --pages 2000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic import make_pdf
+from utils.document_parser import _iter_pdf_pages
+
+
+def _run(path: str, workers: int) -> float:
+    start = time.perf_counter()
+    with open(path, "rb") as file:
+        pages = sum(1 for _ in _iter_pdf_pages(file, workers=workers, min_parallel_pages=1))
+    return pages / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=2000, help="número de páginas do PDF sintético")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+        tmp.write(make_pdf(args.pages))
+    try:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= args.max_workers:
+            worker_counts.append(worker_counts[-1] * 2)
+        if worker_counts[-1] != args.max_workers:
+            worker_counts.append(args.max_workers)
+
+        baseline = None
+        print(f"PDF sintético: {args.pages} páginas, {os.path.getsize(tmp.name) / 1e6:.1f} MB")
+        print(f"{'processos':>10} {'páginas/s':>12} {'speedup':>8}")
+        for workers in worker_counts:
+            rate = _run(tmp.name, workers)
+            baseline = baseline or rate
+            print(f"{workers:>10} {rate:>12.1f} {rate / baseline:>7.2f}x")
+    finally:
+        os.unlink(tmp.name)
+
+
+if __name__ == "__main__":
+    main()
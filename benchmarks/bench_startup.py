@@ -0,0 +1,124 @@
+# benchmarks/bench_startup.py
+"""
+Mede a inicialização do app: primeira execução de app.py (imports incluídos) e reexecuções.
+
+Cada medição roda num processo novo, via streamlit.testing (sem navegador). Com --before,
+a mesma medição é feita numa versão anterior do código (extraída com git archive) para comparação.
+
+Uso:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --before HEAD~1 --reruns 20
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("google.generativeai", "PyPDF2", "docx", "numpy")
+
+
+def measure(app_dir: str, reruns: int) -> dict:
+    """Executado no processo filho: tempos da primeira execução e das reexecuções."""
+    os.chdir(app_dir)
+    os.environ.setdefault("LLM_CACHE_PATH", os.path.join(tempfile.mkdtemp(), "llm.sqlite3"))
+    start = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    streamlit_import = time.perf_counter() - start
+
+    def new_app():
+        app = AppTest.from_file(os.path.join(app_dir, "app.py"), default_timeout=120)
+        app.secrets["GOOGLE_API_KEY"] = "chave-de-teste"
+        return app
+
+    app = new_app()
+    start = time.perf_counter()
+    app.run()
+    first_run = time.perf_counter() - start
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    if app.exception:
+        raise SystemExit(f"app.py falhou: {app.exception[0].message}")
+    # Espera carregamentos em segundo plano iniciados pela primeira execução terminarem.
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and thread.daemon and thread.name.endswith("prewarm"):
+            thread.join()
+
+    # Cada reexecução usa uma sessão nova: o AppTest desta versão do Streamlit não reexecuta
+    # sessões com st.radio(format_func=...). Módulos e st.cache_resource continuam carregados,
+    # como numa interação comum.
+    timings = []
+    for _ in range(reruns):
+        app = new_app()
+        start = time.perf_counter()
+        app.run()
+        timings.append(time.perf_counter() - start)
+    return {
+        "import_streamlit_ms": round(streamlit_import * 1000, 1),
+        "primeira_execucao_ms": round(first_run * 1000, 1),
+        "reexecucao_p50_ms": round(statistics.median(timings) * 1000, 1),
+        "reexecucao_max_ms": round(max(timings) * 1000, 1),
+        "modulos_pesados_na_primeira_execucao": loaded,
+    }
+
+
+def run_child(app_dir: str, reruns: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", app_dir, "--reruns", str(reruns)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def export_ref(ref: str) -> str:
+    """Extrai o código de `ref` num diretório temporário."""
+    target = tempfile.mkdtemp(prefix="startup-")
+    archive = subprocess.run(["git", "-C", str(REPO), "archive", ref], check=True, capture_output=True).stdout
+    archive_path = os.path.join(target, "tree.tar")
+    with open(archive_path, "wb") as f:
+        f.write(archive)
+    with tarfile.open(archive_path) as tar:
+        tar.extractall(target)
+    os.unlink(archive_path)
+    return target
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--before", help="versão para comparação (ex: HEAD~1)")
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3, help="processos medidos por versão (vale a mediana)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child, args.reruns)))
+        return
+
+    versions = [("atual", str(REPO))]
+    exported = None
+    if args.before:
+        exported = export_ref(args.before)
+        versions.insert(0, (args.before, exported))
+    try:
+        for label, app_dir in versions:
+            runs = [run_child(app_dir, args.reruns) for _ in range(args.repeat)]
+            first = statistics.median(run["primeira_execucao_ms"] for run in runs)
+            rerun = statistics.median(run["reexecucao_p50_ms"] for run in runs)
+            print(f"{label}: primeira execução {first:.0f} ms, reexecução p50 {rerun:.1f} ms, "
+                  f"módulos pesados carregados (inclui os de segundo plano): {', '.join(runs[-1]['modulos_pesados_na_primeira_execucao']) or 'nenhum'}")
+    finally:
+        if exported:
+            shutil.rmtree(exported, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
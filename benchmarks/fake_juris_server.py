@@ -0,0 +1,112 @@
+# benchmarks/fake_juris_server.py
+"""
+Servidor HTTP local que imita fontes de jurisprudência (TJSP, TJRJ...), para testes e benchmarks.
+
+Cada fonte é um caminho (/TJSP, /TJRJ, ...) com latência e taxa de falha próprias. As falhas
+respondem 503 com Retry-After, para exercitar as novas tentativas do cliente.
+
+Uso isolado:
+    python benchmarks/fake_juris_server.py --port 8765
+    JURIS_SOURCES='[{"nome": "TJSP", "url": "http://127.0.0.1:8765/TJSP"}]' streamlit run app.py
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Comportamento padrão de cada fonte: latência (s) e probabilidade de falha.
+DEFAULT_SOURCES = {
+    "TJSP": {"latency": 0.05, "fail_rate": 0.0},
+    "TJRJ": {"latency": 0.10, "fail_rate": 0.2},
+    "TJMG": {"latency": 0.08, "fail_rate": 0.0},
+    "DataJud": {"latency": 2.0, "fail_rate": 0.0},
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # mantém a conexão aberta (keep-alive) entre requisições
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        name = url.path.strip("/")
+        behavior = self.server.sources.get(name)
+        if behavior is None:
+            return self._send(404, {"erro": f"fonte desconhecida: {name}"})
+
+        self.server.count(name)
+        time.sleep(behavior["latency"])
+        if self.server.rng.random() < behavior["fail_rate"]:
+            return self._send(503, {"erro": "indisponível"}, {"Retry-After": "0"})
+
+        params = parse_qs(url.query)
+        term = params.get("query", [""])[0]
+        limit = int(params.get("limit", ["3"])[0])
+        docs = [
+            {
+                "numero_processo_completo": f"{name} {abs(hash((term, i))) % 100000}-11.2024.8.26.0001",
+                "nome_do_relator": f"Des. Relator {i} ({name})",
+                "texto_da_ementa_completa": f"EMENTA ({name}): {term}. Precedente sintético {i}.",
+                "tipo_da_decisao_final": "Provido" if i % 2 else "Não Provido",
+            }
+            for i in range(limit)
+        ]
+        self._send(200, {"data": {"jurisprudences": docs}})
+
+    def _send(self, status: int, payload: dict, headers: dict = None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeJurisServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, sources: dict = None, seed: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.sources = sources or DEFAULT_SOURCES
+        self.rng = random.Random(seed)
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def handle_error(self, request, client_address):
+        # Clientes que desistem por prazo fecham a conexão no meio da resposta: não é erro do servidor.
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    def count(self, name: str):
+        with self._lock:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FakeJurisServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = FakeJurisServer(args.port)
+    print(f"Servindo {', '.join(server.sources)} em {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# benchmarks/fake_model.py
+"""Modelo falso com a mesma interface de `genai.GenerativeModel`, para testes e benchmarks offline."""
+
+import re
+import threading
+import time
+
+
+class FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Responde a `generate_content` sem rede, com latência configurável.
+
+    - Prompts da fase "map" (parte i de n) recebem um extrato curto que cita o número da parte
+      e o início do trecho, o que permite verificar que todas as partes chegaram ao "reduce".
+    - Demais prompts recebem uma resposta fixa que informa o tamanho do prompt, completada até
+      `response_chars` caracteres (para simular respostas longas em streaming).
+
+    Registra os prompts recebidos e o pico de chamadas simultâneas.
+    """
+
+    _PART = re.compile(r"Parte (\d+) de (\d+):\s*(.{0,60})", re.S)
+
+    def __init__(self, latency: float = 0.05, model_name: str = "models/fake", stream_chunks: int = 8,
+                 chunk_delay: float = 0.0, response_chars: int = 0):
+        self.latency = latency
+        self.model_name = model_name
+        self.stream_chunks = stream_chunks
+        self.chunk_delay = chunk_delay
+        self.response_chars = response_chars
+        self.prompts = []
+        self.max_concurrency = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def _answer(self, prompt: str) -> str:
+        match = self._PART.search(prompt)
+        if match:
+            index, total, start = match.groups()
+            return f"EXTRATO {index}/{total}: {' '.join(start.split())}"
+        answer = f"**Resposta simulada** para um prompt de {len(prompt)} caracteres."
+        if len(answer) < self.response_chars:
+            filler = " Fundamentação simulada da estratégia."
+            answer += (filler * (self.response_chars // len(filler) + 1))[:self.response_chars - len(answer)]
+        return answer
+
+    def generate_content(self, contents, generation_config=None, stream: bool = False, **kwargs):
+        with self._lock:
+            self.prompts.append(contents)
+            self._active += 1
+            self.max_concurrency = max(self.max_concurrency, self._active)
+        try:
+            time.sleep(self.latency)
+            answer = self._answer(contents)
+        finally:
+            with self._lock:
+                self._active -= 1
+        if stream:
+            return self._stream(answer)
+        return FakeChunk(answer)
+
+    def _stream(self, answer: str):
+        size = max(1, -(-len(answer) // self.stream_chunks))
+        for start in range(0, len(answer), size):
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield FakeChunk(answer[start:start + size])
@@ -0,0 +1,352 @@
+# benchmarks/run_all.py
+"""
+Conjunto de benchmarks reprodutível: extração, fluxos com o LLM e busca de jurisprudência.
+
+Os dados são sintéticos e gerados com sementes fixas (PDF e DOCX de 10 a 5.000 páginas,
+ementas do índice local) e o LLM é o modelo falso de benchmarks/fake_model.py, com latência
+e streaming configuráveis. Nada acessa a rede. Para cada caso são gravados o tempo (mediana
+das repetições), a vazão e o pico de memória alocada pelo Python (tracemalloc, numa execução
+à parte, para não distorcer os tempos).
+
+O resultado é um JSON com o commit e a máquina, para comparar versões:
+
+    python benchmarks/run_all.py -o antes.json
+    git checkout outra-versao
+    python benchmarks/run_all.py -o depois.json --compare antes.json
+
+Uso:
+    python benchmarks/run_all.py                    # todos os grupos, tamanhos padrão
+    python benchmarks/run_all.py --quick            # tamanhos pequenos, para conferência rápida
+    python benchmarks/run_all.py --suites parse --pages 10 5000
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.append(str(REPO))
+
+SUITES = ("parse", "flows", "juris")
+DEFAULT_PAGES = [10, 100, 1000, 5000]
+QUICK_PAGES = [10, 100]
+# Tamanho do documento nos fluxos com o LLM, em páginas de texto sintético.
+DEFAULT_FLOW_PAGES = [10, 1000]
+QUICK_FLOW_PAGES = [10]
+DEFAULT_JURIS_DOCS = 100_000
+QUICK_JURIS_DOCS = 5_000
+FLOW_TASKS = ("analysis", "defense", "accusation")
+
+
+def measure(function, repeat: int) -> dict:
+    """
+    Executa `function` `repeat` vezes (tempo) e mais uma com o tracemalloc (pico de memória).
+
+    Devolve a mediana e o mínimo dos tempos, o pico em MB e o último valor devolvido.
+    """
+    timings = []
+    value = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "segundos": round(statistics.median(timings), 6),
+        "segundos_min": round(min(timings), 6),
+        "pico_memoria_mb": round(peak / 1e6, 2),
+        "valor": value,
+    }
+
+
+def _named_file(data: bytes, name: str):
+    # Mesmo formato de um upload do Streamlit: objeto de arquivo com atributo `name`.
+    file = io.BytesIO(data)
+    file.name = name
+    return file
+
+
+def run_parse(pages_list: list, repeat: int) -> list:
+    """Extração de PDF e DOCX sintéticos, sem o cache de extração."""
+    from benchmarks.synthetic import make_docx, make_pdf
+    import utils.document_parser as document_parser
+
+    results = []
+    for extension, make in (("pdf", make_pdf), ("docx", make_docx)):
+        # Importa as bibliotecas de extração antes do primeiro caso medido.
+        document_parser.parse_legal_document(_named_file(make(1), f"peca.{extension}"), use_cache=False)
+        for pages in pages_list:
+            data = make(pages)
+
+            def parse():
+                return len(document_parser.parse_legal_document(_named_file(data, f"peca.{extension}"), use_cache=False))
+
+            result = measure(parse, repeat)
+            chars = result.pop("valor")
+            results.append({
+                "grupo": "parse",
+                "caso": f"{extension}-{pages}p",
+                "paginas": pages,
+                "arquivo_mb": round(len(data) / 1e6, 2),
+                "caracteres": chars,
+                **result,
+                "paginas_por_segundo": round(pages / result["segundos"], 1),
+                "mb_por_segundo": round(len(data) / 1e6 / result["segundos"], 2),
+            })
+            print(_line(results[-1]), file=sys.stderr)
+    return results
+
+
+def run_flows(pages_list: list, repeat: int, latency: float, chunk_delay: float, response_chars: int,
+              context_modes: list, workdir: str) -> list:
+    """
+    Análise, defesa e acusação de ponta a ponta com o modelo falso, com e sem streaming.
+
+    O modelo passa pelo mesmo CachedModel do app, com o cache ignorado (bypass), para que
+    cada repetição chegue ao modelo. `llm_chamadas` permite separar a latência simulada do
+    custo próprio do código (montagem do contexto e do prompt, cache, métricas).
+    """
+    from benchmarks.fake_model import FakeGenerativeModel
+    from benchmarks.synthetic import synthetic_lines
+    from services.accusation_strategy import generate_accusation, stream_accusation
+    from services.defense_strategy import generate_defense, stream_defense
+    from services.document_analysis import generate_analysis, stream_analysis
+    from services.llm_cache import CachedModel, ResponseCache
+
+    cache = ResponseCache(os.path.join(workdir, "flows-llm.sqlite3"))
+    flows = {
+        "analysis": (lambda text, model, mode: generate_analysis(text, model, context_mode=mode),
+                     lambda text, model, mode: stream_analysis(text, model, context_mode=mode)),
+        "defense": (lambda text, model, mode: generate_defense(text, "Civil", "", model, context_mode=mode),
+                    lambda text, model, mode: stream_defense(text, "Civil", "", model, context_mode=mode)),
+        "accusation": (lambda text, model, mode: generate_accusation(text, "Civil", "", model, context_mode=mode),
+                       lambda text, model, mode: stream_accusation(text, "Civil", "", model, context_mode=mode)),
+    }
+
+    results = []
+    for pages in pages_list:
+        text = "\n".join(synthetic_lines(pages * 40))
+        for mode in context_modes:
+            for task in FLOW_TASKS:
+                generate, stream = flows[task]
+                for streaming in (False, True):
+                    fake = FakeGenerativeModel(latency=latency, chunk_delay=chunk_delay, response_chars=response_chars)
+                    model = CachedModel(fake, cache, bypass=True)
+                    first_chunk = []
+
+                    def run():
+                        if not streaming:
+                            answer = generate(text, model, mode)
+                        else:
+                            text_stream = stream(text, model, mode)
+                            answer = "".join(text_stream)
+                            first_chunk.append(text_stream.time_to_first_token)
+                        if answer.startswith("Falha ao gerar"):
+                            raise Exception(answer)
+                        return len(answer)
+
+                    result = measure(run, repeat)
+                    result.pop("valor")
+                    entry = {
+                        "grupo": "flows",
+                        "caso": f"{task}-{mode}-{'stream' if streaming else 'completo'}-{pages}p",
+                        "documento_caracteres": len(text),
+                        "llm_chamadas": len(fake.prompts) // (repeat + 1),
+                        "pico_simultaneas": fake.max_concurrency,
+                        **result,
+                    }
+                    if streaming:
+                        # Sem a execução com tracemalloc, que é a última.
+                        entry["primeiro_trecho_segundos"] = round(statistics.median(first_chunk[:repeat]), 6)
+                    results.append(entry)
+                    print(_line(entry), file=sys.stderr)
+    return results
+
+
+def run_juris(docs: int, queries: int, repeat: int, workdir: str) -> list:
+    """
+    Busca de jurisprudência pelo índice local (FTS5) com `docs` ementas sintéticas:
+    sem cache, com o cache de buscas aquecido e pela similaridade local.
+    """
+    from benchmarks.bench_juris_index import TEMAS, synthetic_records
+    from utils.juris_index import JurisIndex
+
+    db = os.path.join(workdir, "juris.sqlite3")
+    start = time.perf_counter()
+    index = JurisIndex(db)
+    index.ingest(synthetic_records(docs))
+    index.optimize()
+    ingest_seconds = time.perf_counter() - start
+    os.environ["JURIS_INDEX_PATH"] = db
+    os.environ["JURIS_VECTORS_DIR"] = os.path.join(workdir, "vectors")
+    from utils.juris_similarity import build_vectors
+    from utils.legal_api import fetch_jurisprudence, fetch_similar_jurisprudence
+
+    start = time.perf_counter()
+    build_vectors(index, os.environ["JURIS_VECTORS_DIR"])
+    vectors_seconds = time.perf_counter() - start
+
+    rng = random.Random(1)
+    terms = [" ".join(rng.sample(TEMAS, 2)) for _ in range(queries)]
+    areas = [rng.choice([None, "Civil", "Criminal"]) for _ in range(queries)]
+    results = [{
+        "grupo": "juris",
+        "caso": f"ingestao-{docs}",
+        "segundos": round(ingest_seconds, 3),
+        "vetores_segundos": round(vectors_seconds, 3),
+        "docs_por_segundo": round(docs / ingest_seconds, 1),
+    }]
+    print(_line(results[-1]), file=sys.stderr)
+
+    cases = (
+        ("indice-sem-cache", lambda term, area: fetch_jurisprudence(term, area, use_cache=False)),
+        ("indice-com-cache", lambda term, area: fetch_jurisprudence(term, area)),
+        ("similaridade", lambda term, area: fetch_similar_jurisprudence(term, area)),
+    )
+    for name, search in cases:
+        def run():
+            found = 0
+            for term, area in zip(terms, areas):
+                found += len(search(term, area).get("resultados", []))
+            return found
+
+        run()  # abre os índices, lê as páginas usadas e, no caso com cache, preenche o cache
+        result = measure(run, repeat)
+        found = result.pop("valor")
+        results.append({
+            "grupo": "juris",
+            "caso": f"{name}-{docs}",
+            "consultas": queries,
+            "resultados": found,
+            **result,
+            "ms_por_consulta": round(result["segundos"] * 1000 / queries, 3),
+        })
+        print(_line(results[-1]), file=sys.stderr)
+    return results
+
+
+def _line(entry: dict) -> str:
+    extras = ", ".join(f"{key}={value}" for key, value in entry.items() if key not in ("grupo", "caso"))
+    return f"[{entry['grupo']}] {entry['caso']}: {extras}"
+
+
+def environment() -> dict:
+    """Commit, máquina e versões: o que é preciso para saber se dois resultados são comparáveis."""
+    def git(*args):
+        try:
+            return subprocess.run(["git", "-C", str(REPO), *args], check=True, capture_output=True,
+                                  text=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "alteracoes_locais": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(report: dict, baseline_path: str) -> None:
+    """
+    Imprime, para cada caso presente nos dois resultados, a razão atual/anterior da mediana e
+    do mínimo dos tempos. Em máquinas compartilhadas o mínimo costuma variar menos.
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {(entry["grupo"], entry["caso"]): entry for entry in baseline["resultados"]}
+    print(f"\nComparação com {baseline_path} (commit {str(baseline['ambiente'].get('commit'))[:10]}):")
+    changed = [key for key in ("latency", "chunk_delay", "response_chars", "queries")
+               if report["parametros"].get(key) != baseline.get("parametros", {}).get(key)]
+    if changed:
+        print(f"Atenção: parâmetros diferentes entre as execuções ({', '.join(changed)}); os tempos não são comparáveis.")
+    print(f"{'caso':>42} {'antes (s)':>10} {'agora (s)':>10} {'razão':>7} {'r. mín':>7} {'memória (MB)':>17}")
+    for entry in report["resultados"]:
+        before = previous.get((entry["grupo"], entry["caso"]))
+        if not before or not before.get("segundos"):
+            continue
+        ratio = entry["segundos"] / before["segundos"]
+        min_ratio = ""
+        if entry.get("segundos_min") and before.get("segundos_min"):
+            min_ratio = f"{entry['segundos_min'] / before['segundos_min']:.2f}x"
+        memory = ""
+        if "pico_memoria_mb" in entry and "pico_memoria_mb" in before:
+            memory = f"{before['pico_memoria_mb']:.1f} -> {entry['pico_memoria_mb']:.1f}"
+        print(f"{entry['grupo'] + '/' + entry['caso']:>42} {before['segundos']:>10.4f} {entry['segundos']:>10.4f} "
+              f"{ratio:>6.2f}x {min_ratio:>7} {memory:>17}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--quick", action="store_true", help="tamanhos pequenos (conferência rápida)")
+    parser.add_argument("--pages", type=int, nargs="+", help="páginas dos PDF/DOCX sintéticos")
+    parser.add_argument("--flow-pages", type=int, nargs="+", help="páginas do documento nos fluxos com o LLM")
+    parser.add_argument("--context-modes", nargs="+", choices=["pack", "map_reduce"], default=["pack", "map_reduce"])
+    parser.add_argument("--latency", type=float, default=0.05, help="latência simulada de cada chamada ao LLM (s)")
+    parser.add_argument("--chunk-delay", type=float, default=0.005, help="intervalo entre trechos no streaming (s)")
+    parser.add_argument("--response-chars", type=int, default=3000, help="tamanho das respostas simuladas")
+    parser.add_argument("--juris-docs", type=int, help="ementas no índice local")
+    parser.add_argument("--queries", type=int, default=50, help="consultas de jurisprudência por repetição")
+    parser.add_argument("--repeat", type=int, default=3, help="repetições medidas de cada caso (vale a mediana)")
+    parser.add_argument("-o", "--output", help="arquivo JSON de saída (padrão: bench-<commit>.json)")
+    parser.add_argument("--compare", help="JSON de uma execução anterior, para comparação")
+    args = parser.parse_args()
+
+    # Configuração fixa, definida antes dos imports dos módulos medidos, para que o resultado
+    # não dependa do .env da máquina: cache do LLM temporário, sem fontes remotas e métricas
+    # ligadas como no app, mas sem log. Os bancos e vetores gerados são apagados ao final.
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        os.environ["LLM_CACHE_PATH"] = os.path.join(workdir, "llm.sqlite3")
+        os.environ["JURIS_SOURCES"] = ""
+        os.environ["METRICS_ENABLED"] = "1"
+        os.environ["METRICS_LOG_JSON"] = "0"
+
+        env = environment()
+        results = []
+        started = time.perf_counter()
+        if "parse" in args.suites:
+            results += run_parse(args.pages or (QUICK_PAGES if args.quick else DEFAULT_PAGES), args.repeat)
+        if "flows" in args.suites:
+            results += run_flows(args.flow_pages or (QUICK_FLOW_PAGES if args.quick else DEFAULT_FLOW_PAGES),
+                                 args.repeat, args.latency, args.chunk_delay, args.response_chars,
+                                 args.context_modes, workdir)
+        if "juris" in args.suites:
+            results += run_juris(args.juris_docs or (QUICK_JURIS_DOCS if args.quick else DEFAULT_JURIS_DOCS),
+                                 args.queries, args.repeat, workdir)
+        duration = time.perf_counter() - started
+
+    output = args.output or f"bench-{(env['commit'] or 'sem-git')[:10]}.json"
+    report = {
+        "ambiente": env,
+        "parametros": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "duracao_segundos": round(duration, 1),
+        "resultados": results,
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Resultados gravados em {output}", file=sys.stderr)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
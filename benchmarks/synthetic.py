@@ -0,0 +1,126 @@
+# benchmarks/synthetic.py
+"""Geração de documentos jurídicos sintéticos para os benchmarks (sem dependências externas)."""
+
+import random
+
+# Frases usadas para compor as páginas; o conteúdo imita uma petição cível comum.
+FRASES = [
+    "O Requerente ajuizou a presente ação de cobrança em face do Requerido",
+    "conforme documentos juntados aos autos e notificação extrajudicial",
+    "requer a condenação ao pagamento de R$ 15.432,10 a título de danos materiais",
+    "bem como indenização por danos morais em valor a ser arbitrado",
+    "nos termos do art. 186 e art. 927 do Código Civil",
+    "a contestação foi apresentada fora do prazo legal previsto no art. 335 do CPC",
+    "a audiência de conciliação realizada em 12/03/2024 restou infrutífera",
+    "o laudo pericial concluiu pela existência de nexo causal",
+    "DOS FATOS",
+    "DO DIREITO",
+    "DOS PEDIDOS",
+]
+
+
+def synthetic_lines(count: int, seed: int = 0) -> list:
+    """Gera `count` linhas de texto jurídico pseudoaleatório, de forma reprodutível."""
+    rng = random.Random(seed)
+    return [f"{rng.choice(FRASES)} ({index})." for index in range(count)]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = 0) -> bytes:
+    """
+    Monta um PDF válido com `pages` páginas de texto (fonte Helvetica padrão, sem compressão).
+
+    O arquivo é escrito diretamente no formato PDF 1.4, para não depender de bibliotecas
+    de geração de PDF.
+    """
+    lines = synthetic_lines(pages * lines_per_page, seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # /Pages, preenchido após conhecer os objetos de página
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    kids = []
+    for page in range(pages):
+        page_lines = lines[page * lines_per_page:(page + 1) * lines_per_page]
+        operators = " ".join(f"({_pdf_escape(line)}) '" for line in page_lines)
+        content = f"BT /F1 10 Tf 40 810 Td 12 TL {operators} ET".encode("cp1252", errors="replace")
+        page_id = len(objects) + 1
+        kids.append(f"{page_id} 0 R")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {pages} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_offset = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(out)
+
+
+_DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/header1.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"/>
+</Types>"""
+
+_DOCX_ROOT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+_DOCX_DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/header" Target="header1.xml"/>
+</Relationships>"""
+
+_W_NS = 'xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" ' \
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+
+
+def _docx_paragraph(text: str) -> str:
+    escaped = text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return f"<w:p><w:r><w:t xml:space=\"preserve\">{escaped}</w:t></w:r></w:p>"
+
+
+def make_docx(pages: int, paragraphs_per_page: int = 12, seed: int = 0) -> bytes:
+    """
+    Monta um DOCX mínimo e válido com cerca de `pages` páginas de parágrafos, uma tabela
+    de valores a cada página e um cabeçalho, abrível tanto pelo python-docx quanto pelo Word.
+    """
+    import io
+    import zipfile
+
+    lines = synthetic_lines(pages * paragraphs_per_page, seed)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _DOCX_ROOT_RELS)
+        archive.writestr("word/_rels/document.xml.rels", _DOCX_DOCUMENT_RELS)
+        archive.writestr(
+            "word/header1.xml",
+            f"<w:hdr {_W_NS}>{_docx_paragraph('PODER JUDICIÁRIO - TRIBUNAL DE JUSTIÇA')}</w:hdr>",
+        )
+        body = []
+        for page in range(pages):
+            for line in lines[page * paragraphs_per_page:(page + 1) * paragraphs_per_page]:
+                body.append(_docx_paragraph(line))
+            cells = ["Parcela", f"R$ {1000 + page},00", f"{(page % 28) + 1:02d}/05/2024"]
+            row = "".join(f"<w:tc>{_docx_paragraph(cell)}</w:tc>" for cell in cells)
+            body.append(f"<w:tbl><w:tr>{row}</w:tr></w:tbl>")
+        body.append('<w:sectPr><w:headerReference w:type="default" r:id="rId1"/></w:sectPr>')
+        archive.writestr("word/document.xml", f"<w:document {_W_NS}><w:body>{''.join(body)}</w:body></w:document>")
+    return buffer.getvalue()
@@ -1,14 +1,20 @@
 # services/accusation_strategy.py
 
-# Add this import if it's not already there
-import google.generativeai as genai
+from typing import TYPE_CHECKING
 
-def generate_accusation(document_text: str, area: str, contexto_estrategia: str, model: genai.GenerativeModel) -> str:
-    """
-    Gera uma estratégia de acusação com base no texto jurídico, área, contexto e usando um LLM.
-    """
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
+from services.llm_stream import TextStream, stream_text
+from services.context_packer import select_document_context
+from services.llm_scheduler import QuotaExceededError
+
+def _accusation_focus(area: str, contexto_estrategia: str) -> str:
+    return f"uma estratégia de acusação na área {area}. Contexto da estratégia: {contexto_estrategia or 'não informado'}"
+
+def _build_accusation_prompt(document_text: str, area: str, contexto_estrategia: str) -> str:
     # Adjusted the prompt to incorporate contexto_estrategia
-    prompt = f"""
+    return f"""
     Como promotor de {area}, analise este caso e elabore uma estratégia de acusação com:
 
     1. 3 elementos do crime/ilícito.
@@ -19,14 +25,41 @@ def generate_accusation(document_text: str, area: str, contexto_estrategia: str,
     Considere o seguinte ponto principal ou contexto adicional para a estratégia de acusação: "{contexto_estrategia if contexto_estrategia else 'Não há contexto adicional fornecido.'}"
 
     Documento para análise:
-    {document_text[:15000]} # Limit context to avoid token overload
+    {document_text}
 
     Por favor, apresente a estratégia de forma clara, com tópicos e linguagem jurídica apropriada.
     """
 
+def generate_accusation(document_text: str, area: str, contexto_estrategia: str, model: "genai.GenerativeModel", context_mode: str = None) -> str:
+    """
+    Gera uma estratégia de acusação com base no texto jurídico, área, contexto e usando um LLM.
+    `context_mode` define o tratamento de documentos longos: "pack" ou "map_reduce" (padrão: LLM_CONTEXT_MODE).
+    """
     try:
+        # Documentos longos: trechos mais relevantes ou extratos de todas as partes (context_mode)
+        context = select_document_context(
+            model, document_text, "accusation", _accusation_focus(area, contexto_estrategia),
+            area=area, contexto_estrategia=contexto_estrategia, mode=context_mode,
+        )
+        prompt = _build_accusation_prompt(context, area, contexto_estrategia)
         response = model.generate_content(prompt)
         return response.text
+    except QuotaExceededError:
+        raise # Limite de uso da API: o app exibe um aviso próprio
     except Exception as e:
         # It's good practice to return a user-friendly message or re-raise a specific exception
         return f"Falha ao gerar acusação: {str(e)}"
+
+def stream_accusation(document_text: str, area: str, contexto_estrategia: str, model: "genai.GenerativeModel", context_mode: str = None) -> TextStream:
+    """
+    Versão em streaming de `generate_accusation`: devolve os trechos da estratégia à medida que o LLM os gera.
+    """
+    def prompt():
+        # Executado ao iniciar o streaming: a preparação do contexto conta no tempo até o primeiro trecho
+        context = select_document_context(
+            model, document_text, "accusation", _accusation_focus(area, contexto_estrategia),
+            area=area, contexto_estrategia=contexto_estrategia, mode=context_mode,
+        )
+        return _build_accusation_prompt(context, area, contexto_estrategia)
+
+    return stream_text(model, prompt, error_prefix="Falha ao gerar acusação")
@@ -0,0 +1,167 @@
+# services/context_packer.py
+
+import math
+import os
+import threading
+from collections import Counter, OrderedDict
+
+from services.long_document import prepare_document_context, split_document
+from utils.document_store import document_key
+from utils.metrics import timer
+from utils.text_processing import tokenize
+
+# Orçamento de tokens do documento dentro do prompt final.
+CONTEXT_TOKEN_BUDGET = int(os.getenv("LLM_CONTEXT_TOKEN_BUDGET", 15000))
+# Estratégia para documentos acima do orçamento: "pack" (trechos mais relevantes) ou
+# "map_reduce" (extratos de todas as partes, ver services/long_document.py).
+CONTEXT_MODE = os.getenv("LLM_CONTEXT_MODE", "pack")
+# Estimativa de caracteres por token para textos em português (Gemini fica em torno de 4).
+CHARS_PER_TOKEN = 4
+# Tamanho máximo dos trechos ranqueados.
+PASSAGE_MAX_CHARS = 1500
+# Quantos índices de documentos ficam em memória.
+INDEX_CACHE_SIZE = 32
+
+# Termos acrescentados à consulta conforme a tarefa, para favorecer os trechos que ela usa.
+TASK_TERMS = {
+    "analysis": "resumo partes autor requerente reu requerido pedido objetivo acao valor data",
+    "defense": "defesa acusacao vulnerabilidade nulidade prescricao prova contestacao preliminar "
+               "cerceamento ilegitimidade recurso",
+    "accusation": "acusacao autoria materialidade crime ilicito dano culpa dolo prova testemunha "
+                  "laudo nexo",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa local e instantânea do número de tokens (sem chamada à API)."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class PassageIndex:
+    """
+    Índice BM25 dos trechos de um documento, construído uma única vez por documento.
+
+    Os trechos vêm de `split_document` (cortes em seções, parágrafos e linhas), então
+    a concatenação deles reproduz o documento original.
+    """
+
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self, text: str, passage_max_chars: int = PASSAGE_MAX_CHARS):
+        self.passages = split_document(text, passage_max_chars)
+        self.tokens = [estimate_tokens(passage) for passage in self.passages]
+        self.term_freqs = [Counter(tokenize(passage)) for passage in self.passages]
+        self.lengths = [sum(freqs.values()) for freqs in self.term_freqs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        doc_freq = Counter()
+        for freqs in self.term_freqs:
+            doc_freq.update(freqs.keys())
+        total = len(self.passages)
+        self.idf = {
+            term: math.log(1 + (total - count + 0.5) / (count + 0.5))
+            for term, count in doc_freq.items()
+        }
+
+    def scores(self, query: str) -> list:
+        """Pontuação BM25 de cada trecho para a consulta."""
+        terms = [term for term in set(tokenize(query)) if term in self.idf]
+        result = []
+        for freqs, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_length) if self.avg_length else self.k1
+            score = 0.0
+            for term in terms:
+                freq = freqs.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            result.append(score)
+        return result
+
+    def pack(self, query: str, budget_tokens: int) -> str:
+        """
+        Preenche o orçamento com os trechos mais relevantes e os devolve na ordem original.
+        Trechos omitidos entre os escolhidos são marcados com "[...]".
+        """
+        scores = self.scores(query)
+        # Empate (ex: consulta sem termos no documento): prefere o início do documento.
+        ranking = sorted(range(len(self.passages)), key=lambda i: (-scores[i], i))
+        chosen = set()
+        used = 0
+        for index in ranking:
+            if used + self.tokens[index] <= budget_tokens:
+                chosen.add(index)
+                used += self.tokens[index]
+
+        parts = []
+        previous = -1
+        for index in sorted(chosen):
+            if index != previous + 1:
+                parts.append("\n[...]\n")
+            parts.append(self.passages[index])
+            previous = index
+        if previous != len(self.passages) - 1:
+            parts.append("\n[...]")
+        return "".join(parts)
+
+
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+def get_passage_index(text: str) -> PassageIndex:
+    """
+    Índice do documento, reaproveitado entre análise, defesa e acusação.
+
+    A chave é a mesma do armazenamento de documentos (utils/document_store.py), e não a do cache
+    de extração, que usa os bytes do arquivo: o texto colado não passa por aquele cache. O índice
+    fica fora do store porque só é montado para documentos acima do orçamento de contexto e não
+    é comprimível; o LRU de INDEX_CACHE_SIZE entradas já limita a memória.
+    """
+    key = document_key(text)
+    with _index_cache_lock:
+        index = _index_cache.get(key)
+        if index is not None:
+            _index_cache.move_to_end(key)
+            return index
+    index = PassageIndex(text)
+    with _index_cache_lock:
+        _index_cache[key] = index
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    return index
+
+
+def pack_context(document_text: str, query: str, budget_tokens: int = None) -> str:
+    """Devolve o documento inteiro se couber no orçamento; senão, os trechos mais relevantes para `query`."""
+    budget_tokens = budget_tokens or CONTEXT_TOKEN_BUDGET
+    if estimate_tokens(document_text) <= budget_tokens:
+        return document_text
+    packed = get_passage_index(document_text).pack(query, budget_tokens)
+    return (
+        "(Documento extenso: abaixo estão os trechos mais relevantes, na ordem original; "
+        "partes omitidas estão indicadas por [...].)\n\n" + packed
+    )
+
+
+def build_task_query(task: str, area: str = "", contexto_estrategia: str = "") -> str:
+    """Consulta usada no ranking: área, contexto da estratégia e termos típicos da tarefa."""
+    return " ".join(part for part in (area, contexto_estrategia, TASK_TERMS.get(task, "")) if part)
+
+
+def select_document_context(model, document_text: str, task: str, focus: str, area: str = "",
+                            contexto_estrategia: str = "", mode: str = None) -> str:
+    """
+    Texto do documento a ser colocado no prompt, conforme o modo:
+    - "pack": trechos mais relevantes dentro de LLM_CONTEXT_TOKEN_BUDGET (uma única chamada ao LLM);
+    - "map_reduce": extratos de todas as partes (uma chamada por parte, mais a final).
+    """
+    mode = mode or CONTEXT_MODE
+    if mode not in ("pack", "map_reduce"):
+        raise ValueError(f"Modo de contexto desconhecido: {mode}")
+    with timer("prompt_context", task=task, mode=mode) as measured:
+        if mode == "map_reduce":
+            context = prepare_document_context(model, document_text, focus)
+        else:
+            context = pack_context(document_text, build_task_query(task, area, contexto_estrategia))
+        measured.set(documento_caracteres=len(document_text), contexto_caracteres=len(context))
+    return context
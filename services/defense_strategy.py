@@ -1,16 +1,21 @@
 # services/defense_strategy.py
 
-# Se ainda não estiver importado, adicione:
-import google.generativeai as genai
+from typing import TYPE_CHECKING
 
-def generate_defense(document_text: str, area: str, contexto_estrategia: str, model: genai.GenerativeModel) -> str:
-    """
-    Gera uma estratégia de defesa com base no texto jurídico, área, contexto e usando um LLM.
-    """
+if TYPE_CHECKING:
+    # Só para as anotações de tipo; o SDK é carregado no primeiro uso do modelo (services/gemini_model.py).
+    import google.generativeai as genai
+
+from services.llm_stream import TextStream, stream_text
+from services.context_packer import select_document_context
+from services.llm_scheduler import QuotaExceededError
+
+def _defense_focus(area: str, contexto_estrategia: str) -> str:
+    return f"uma estratégia de defesa na área {area}. Contexto da estratégia: {contexto_estrategia or 'não informado'}"
+
+def _build_defense_prompt(document_text: str, area: str, contexto_estrategia: str) -> str:
     # Ajustei o prompt para incorporar o contexto_estrategia
-    # e especifiquei o tipo do modelo como genai.GenerativeModel para clareza (type hinting)
-    
-    prompt = f"""
+    return f"""
     Como especialista em direito {area}, analise este caso e:
 
     1. Liste 3 vulnerabilidades na acusação.
@@ -21,15 +26,43 @@ def generate_defense(document_text: str, area: str, contexto_estrategia: str, mo
     Considere o seguinte ponto principal ou contexto adicional para a estratégia de defesa: "{contexto_estrategia if contexto_estrategia else 'Não há contexto adicional fornecido.'}"
 
     Documento para análise:
-    {document_text[:15000]} # Limite de contexto para evitar sobrecarga do token
+    {document_text}
 
     Por favor, apresente a estratégia de forma clara, com tópicos e linguagem jurídica apropriada.
     """
 
+def generate_defense(document_text: str, area: str, contexto_estrategia: str, model: "genai.GenerativeModel", context_mode: str = None) -> str:
+    """
+    Gera uma estratégia de defesa com base no texto jurídico, área, contexto e usando um LLM.
+    `context_mode` define o tratamento de documentos longos: "pack" ou "map_reduce" (padrão: LLM_CONTEXT_MODE).
+    """
+    # Especifiquei o tipo do modelo como genai.GenerativeModel para clareza (type hinting)
     try:
+        # Documentos longos: trechos mais relevantes ou extratos de todas as partes (context_mode)
+        context = select_document_context(
+            model, document_text, "defense", _defense_focus(area, contexto_estrategia),
+            area=area, contexto_estrategia=contexto_estrategia, mode=context_mode,
+        )
+        prompt = _build_defense_prompt(context, area, contexto_estrategia)
         response = model.generate_content(prompt)
         return response.text
+    except QuotaExceededError:
+        raise # Limite de uso da API: o app exibe um aviso próprio
     except Exception as e:
         # É uma boa prática capturar exceções aqui e relançar uma exceção mais específica
         # ou retornar uma mensagem de erro tratada para o Streamlit.
         return f"Falha ao gerar defesa: {str(e)}"
+
+def stream_defense(document_text: str, area: str, contexto_estrategia: str, model: "genai.GenerativeModel", context_mode: str = None) -> TextStream:
+    """
+    Versão em streaming de `generate_defense`: devolve os trechos da estratégia à medida que o LLM os gera.
+    """
+    def prompt():
+        # Executado ao iniciar o streaming: a preparação do contexto conta no tempo até o primeiro trecho
+        context = select_document_context(
+            model, document_text, "defense", _defense_focus(area, contexto_estrategia),
+            area=area, contexto_estrategia=contexto_estrategia, mode=context_mode,
+        )
+        return _build_defense_prompt(context, area, contexto_estrategia)
+
+    return stream_text(model, prompt, error_prefix="Falha ao gerar defesa")
@@ -0,0 +1,51 @@
+# services/document_analysis.py
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import google.generativeai as genai
+
+from services.llm_stream import TextStream, stream_text
+from services.context_packer import select_document_context
+
+# Foco da fase "map" quando o documento é longo e o modo de contexto é "map_reduce".
+ANALYSIS_FOCUS = "uma análise preliminar (resumo, ramo do direito, pontos-chave, partes e objetivo da peça)"
+
+def _build_analysis_prompt(document_text: str) -> str:
+    # Prompt para a análise do documento pela IA
+    return f"""
+    Analise o seguinte texto jurídico. Identifique as seguintes informações:
+    1. Um breve resumo do conteúdo (máximo 5 frases).
+    2. O(s) ramo(s) do direito mais provável(is) (Ex: Civil, Criminal, Previdenciário, Administrativo, etc.).
+    3. Os 5-7 pontos mais importantes ou palavras-chave relevantes (entidades, conceitos-chave).
+    4. As partes envolvidas (Requerente/Autor, Requerido/Réu, etc.).
+    5. O objetivo principal da peça (Ex: Cobrança, Defesa, Recurso, etc.).
+
+    Formate a resposta de forma clara e com tópicos (use Markdown para negrito e listas):
+    **Resumo:** [Seu resumo aqui]
+    **Ramo(s) do Direito:** [Ramo1, Ramo2]
+    **Pontos Chave:** [ponto1, ponto2, ponto3, ...]
+    **Partes Envolvidas:** [Parte A: Nome, Parte B: Nome]
+    **Objetivo da Peça:** [Objetivo]
+
+    Texto para análise:
+    {document_text}
+    """
+
+def generate_analysis(document_text: str, model: "genai.GenerativeModel", context_mode: str = None) -> str:
+    """
+    Gera a análise preliminar do documento (resumo, ramo, pontos-chave, partes e objetivo).
+    Erros da API são propagados, para que a interface mostre o detalhe.
+    """
+    context = select_document_context(model, document_text, "analysis", ANALYSIS_FOCUS, mode=context_mode)
+    return model.generate_content(_build_analysis_prompt(context)).text
+
+def stream_analysis(document_text: str, model: "genai.GenerativeModel", context_mode: str = None) -> TextStream:
+    """
+    Versão em streaming de `generate_analysis`.
+    """
+    def prompt():
+        context = select_document_context(model, document_text, "analysis", ANALYSIS_FOCUS, mode=context_mode)
+        return _build_analysis_prompt(context)
+
+    return stream_text(model, prompt)
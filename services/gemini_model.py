@@ -0,0 +1,47 @@
+# services/gemini_model.py
+
+import threading
+
+# Modelo usado pelo app e pelo processamento em lote. 'gemini-1.5-flash' é rápido e econômico.
+DEFAULT_MODEL_NAME = "gemini-1.5-flash"
+
+
+class LazyGenerativeModel:
+    """
+    Substituto de `genai.GenerativeModel` que só importa e configura o SDK no primeiro uso.
+
+    Importar google.generativeai leva perto de um segundo; com este objeto, a primeira página
+    do app é exibida sem esperar por isso. Atributos e métodos são repassados ao modelo real.
+    """
+
+    def __init__(self, api_key: str, model_name: str = DEFAULT_MODEL_NAME, **model_kwargs):
+        self._api_key = api_key
+        self._model_name = model_name
+        self._model_kwargs = model_kwargs
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._model is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self._api_key)
+                self._model = genai.GenerativeModel(self._model_name, **self._model_kwargs)
+            return self._model
+
+    def __getattr__(self, name):
+        # Só é chamado para atributos que não existem neste objeto (ex: generate_content, model_name).
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+
+def prewarm_sdk() -> threading.Thread:
+    """Importa o SDK do Gemini em segundo plano, para que o primeiro uso do modelo não espere."""
+    def load():
+        import google.generativeai  # noqa: F401
+
+    thread = threading.Thread(target=load, name="gemini-sdk-prewarm", daemon=True)
+    thread.start()
+    return thread
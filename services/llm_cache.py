@@ -0,0 +1,300 @@
+# services/llm_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from utils.metrics import get_metrics
+
+# Local padrão do banco de respostas (relativo à raiz do projeto).
+DEFAULT_CACHE_PATH = Path(__file__).resolve().parent.parent / ".cache" / "llm_responses.sqlite3"
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+# Caracteres por token, para estimar o uso quando o SDK não informa (versões antigas não têm usage_metadata).
+CHARS_PER_TOKEN = 4
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Normaliza espaços do prompt, para que diferenças de indentação não gerem chaves diferentes."""
+    return " ".join(prompt.split())
+
+
+def cache_key(model_name: str, generation_config, prompt: str, **options) -> str:
+    """Chave do cache: modelo, configuração de geração, demais opções e hash do prompt normalizado."""
+    prompt_hash = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+    payload = json.dumps(
+        [model_name, generation_config, options, prompt_hash],
+        sort_keys=True,
+        default=repr,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Armazena respostas do LLM em SQLite, com validade (TTL) e despejo LRU por tamanho total.
+
+    Uma única conexão é compartilhada entre as threads do processo, protegida por lock.
+    Vários processos podem usar o mesmo arquivo (o SQLite cuida do bloqueio).
+    """
+
+    def __init__(self, path, ttl_seconds: float = DEFAULT_TTL_SECONDS, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                text TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                latency REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+        self._conn.commit()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_latency = 0.0
+
+    def get(self, key: str):
+        """Retorna o texto armazenado e ainda válido para `key`, ou None."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT text, latency, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[2] > self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            self.saved_latency += row[1]
+            return row[0]
+
+    def put(self, key: str, text: str, latency: float) -> None:
+        """Grava a resposta e a latência da chamada original, despejando as menos usadas se preciso."""
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, text, size, latency, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, text, size, latency, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        # Deve ser chamado com o lock adquirido.
+        expired = self._conn.execute(
+            "DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        self.evictions += expired
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        """Taxa de acerto e latência economizada (segundos de chamadas ao LLM evitadas)."""
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "saved_latency_seconds": round(self.saved_latency, 3),
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "path": str(self.path),
+            }
+
+
+def _usage_tokens(response, prompt: str, text: str):
+    """
+    (tokens do prompt, tokens da resposta, origem): do `usage_metadata` da resposta quando o SDK
+    informa; senão, estimados pelo tamanho do texto.
+    """
+    usage = getattr(response, "usage_metadata", None) if response is not None else None
+    if usage is not None and getattr(usage, "prompt_token_count", None) is not None:
+        return usage.prompt_token_count, getattr(usage, "candidates_token_count", 0) or 0, "sdk"
+    return len(prompt) // CHARS_PER_TOKEN + 1, len(text) // CHARS_PER_TOKEN, "estimativa"
+
+
+class CachedResponse:
+    """Resposta servida pelo cache; expõe `.text` como a resposta do SDK."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.cached = True
+
+
+class CachedModel:
+    """
+    Envolve um `genai.GenerativeModel`, consultando o `ResponseCache` antes de chamar a API.
+
+    Pode ser passado no lugar do modelo para `generate_defense`, `generate_accusation` etc.
+    Apenas prompts em texto são cacheados; outros conteúdos vão direto ao modelo.
+    """
+
+    def __init__(self, model, cache: ResponseCache, bypass: bool = False):
+        self.model = model
+        self.cache = cache
+        self.bypass = bypass
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.model, "model_name", type(self.model).__name__)
+
+    def with_bypass(self) -> "CachedModel":
+        """Mesmo modelo e cache, mas ignorando respostas armazenadas (as novas são gravadas)."""
+        return CachedModel(self.model, self.cache, bypass=True)
+
+    def generate_content(self, contents, *, generation_config=None, bypass_cache: bool = None,
+                         stream: bool = False, **kwargs):
+        if not isinstance(contents, str):
+            return self.model.generate_content(contents, generation_config=generation_config, stream=stream, **kwargs)
+
+        bypass = self.bypass if bypass_cache is None else bypass_cache
+        # A configuração padrão do modelo também entra na chave, junto com a da chamada.
+        # O modo streaming não entra: a resposta completa é a mesma nos dois modos.
+        config = [getattr(self.model, "_generation_config", None), generation_config]
+        key = cache_key(self.model_name, config, contents, **kwargs)
+        start = time.perf_counter()
+        if not bypass:
+            text = self.cache.get(key)
+            if text is not None:
+                self._record_call(time.perf_counter() - start, "hit", stream, contents, text, None)
+                response = CachedResponse(text)
+                return [response] if stream else response
+        cache_status = "bypass" if bypass else "miss"
+
+        if stream:
+            return self._stream_and_store(key, contents, generation_config, cache_status, **kwargs)
+
+        try:
+            response = self.model.generate_content(contents, generation_config=generation_config, **kwargs)
+        except Exception:
+            self._record_call(time.perf_counter() - start, cache_status, False, contents, "", None, status="erro")
+            raise
+        latency = time.perf_counter() - start
+        try:
+            text = response.text
+        except ValueError:
+            # Resposta bloqueada ou sem texto: não é cacheada, quem chamou trata o erro.
+            self._record_call(latency, cache_status, False, contents, "", response, status="sem_texto")
+            return response
+        self._record_call(latency, cache_status, False, contents, text, response)
+        self.cache.put(key, text, latency)
+        return response
+
+    def _stream_and_store(self, key: str, contents: str, generation_config, cache_status: str, **kwargs):
+        # Repassa os fragmentos à medida que chegam; só grava no cache se o stream terminar.
+        start = time.perf_counter()
+        first_chunk = None
+        parts = []
+        chunk = None
+        status = "erro"
+        try:
+            for chunk in self.model.generate_content(contents, generation_config=generation_config, stream=True, **kwargs):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+                try:
+                    parts.append(chunk.text)
+                except ValueError:
+                    pass
+                yield chunk
+            status = "ok"
+        except GeneratorExit:
+            status = "interrompido"
+            raise
+        finally:
+            # O tempo total inclui o de quem consome os fragmentos (ex: a renderização na página).
+            self._record_call(time.perf_counter() - start, cache_status, True, contents, "".join(parts), chunk,
+                              status=status, first_chunk_seconds=first_chunk)
+        text = "".join(parts)
+        if text:
+            self.cache.put(key, text, time.perf_counter() - start)
+
+    def _record_call(self, seconds: float, cache_status: str, stream: bool, prompt: str, text: str, response,
+                     status: str = "ok", first_chunk_seconds: float = None) -> None:
+        # Latência e tokens de cada chamada. Respostas do cache não consomem tokens da API.
+        metrics = get_metrics()
+        if not metrics.enabled:
+            return
+        model_name = self.model_name
+        metrics.observe("llm_call_seconds", seconds, model=model_name, cache=cache_status, status=status)
+        if first_chunk_seconds is not None:
+            metrics.observe("llm_first_chunk_seconds", first_chunk_seconds, model=model_name)
+        prompt_tokens, response_tokens, source = _usage_tokens(response, prompt, text)
+        if cache_status != "hit":
+            metrics.increment("llm_tokens", prompt_tokens, model=model_name, tipo="prompt", origem=source)
+            metrics.increment("llm_tokens", response_tokens, model=model_name, tipo="resposta", origem=source)
+        metrics.log_event(
+            "llm_call", seconds=round(seconds, 6), model=model_name, cache=cache_status, stream=stream,
+            status=status, prompt_tokens=prompt_tokens, response_tokens=response_tokens, tokens_origem=source,
+            first_chunk_seconds=None if first_chunk_seconds is None else round(first_chunk_seconds, 6),
+        )
+
+    def __getattr__(self, name):
+        # Demais atributos (count_tokens, start_chat...) vêm do modelo original.
+        # Nomes privados e o próprio `model` (copy/pickle, __init__ que falhou) não são repassados:
+        # sem isso, `self.model` chamaria __getattr__ de novo até estourar a recursão.
+        if name.startswith("_") or "model" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Retorna o cache de respostas compartilhado do processo.
+
+    Configuração via variáveis de ambiente (ou .env):
+    - LLM_CACHE_PATH: arquivo SQLite (padrão .cache/llm_responses.sqlite3).
+    - LLM_CACHE_TTL_HOURS: validade das respostas, em horas (padrão 168).
+    - LLM_CACHE_MAX_MB: tamanho máximo do texto armazenado, em MB (padrão 200).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                os.getenv("LLM_CACHE_PATH") or DEFAULT_CACHE_PATH,
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL_HOURS", DEFAULT_TTL_SECONDS / 3600)) * 3600,
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_MB", DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+            )
+        return _default_cache
@@ -0,0 +1,426 @@
+# services/llm_scheduler.py
+"""
+Fila única, por processo, para as chamadas ao Gemini de todas as sessões.
+
+- Limites de requisições e de tokens por minuto (LLM_RPM, LLM_TPM), em "baldes de fichas":
+  rajadas cabem até o limite do minuto e, depois, as chamadas esperam a reposição.
+- Prioridade: chamadas interativas (app) passam à frente das de processamento em lote.
+- Chamadas idênticas em andamento (mesmo modelo, configuração e prompt) são feitas uma vez só;
+  as demais recebem a mesma resposta (inclusive em streaming, trecho a trecho).
+- Erros de cota (429) e indisponibilidade (500/503) são repetidos após uma pausa, usando o tempo
+  sugerido pela API quando houver. A pausa vale para a fila toda, já que a cota é compartilhada.
+  Esgotadas as tentativas, ou excedido o tempo máximo na fila, a chamada levanta
+  `QuotaExceededError`, com uma mensagem legível.
+
+Configuração via variáveis de ambiente (ou .env):
+- LLM_RPM / LLM_TPM: requisições e tokens (estimados) por minuto; 0 desliga o limite.
+  Padrões: 15 e 1.000.000, a cota gratuita do Gemini 1.5 Flash. Ajuste conforme o plano contratado.
+- LLM_MAX_CONCURRENCY: chamadas simultâneas (padrão 8).
+- LLM_MAX_RETRIES: novas tentativas após erro de cota ou indisponibilidade (padrão 3).
+- LLM_QUEUE_TIMEOUT_SECONDS: espera máxima na fila (padrão 120).
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+from services.context_packer import estimate_tokens
+from services.llm_cache import cache_key
+from utils.metrics import get_metrics
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+DEFAULT_RPM = 15
+DEFAULT_TPM = 1_000_000
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 120
+# Pausa da primeira nova tentativa sem sugestão da API; dobra a cada tentativa, até o máximo.
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 60.0
+
+# Códigos HTTP que valem nova tentativa: cota excedida e indisponibilidade temporária.
+RETRYABLE_STATUS = {429, 500, 503}
+_RETRY_HINTS = [
+    re.compile(r"retry in ([\d.]+)\s*s", re.I),                   # "Please retry in 23.5s"
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.I),     # detalhe RetryInfo do gRPC
+]
+
+
+class QuotaExceededError(Exception):
+    """Chamada não atendida por limite de uso da API; `retry_after` sugere quando tentar de novo."""
+
+    def __init__(self, message: str, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def error_status(error: Exception):
+    """Código HTTP de um erro da API (google.api_core usa o atributo `code`), ou None."""
+    code = getattr(error, "code", None)
+    if callable(code):  # erros gRPC expõem code() como método
+        code = getattr(error, "http_status", None)
+    try:
+        return int(code) if code is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after_seconds(error: Exception):
+    """Tempo de espera sugerido pela API (cabeçalho Retry-After ou texto do erro), ou None."""
+    response = getattr(error, "response", None)
+    header = getattr(response, "headers", {}).get("Retry-After") if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    for pattern in _RETRY_HINTS:
+        match = pattern.search(str(error))
+        if match:
+            return float(match.group(1))
+    return None
+
+
+def _try_again(seconds: float = None) -> str:
+    return f"Tente novamente em cerca de {seconds:.0f}s." if seconds and seconds >= 1 else "Tente novamente em instantes."
+
+
+class TokenBucket:
+    """Balde de fichas: até `limit` de uma vez, repostas continuamente ao longo de `period` segundos."""
+
+    def __init__(self, limit: float, period: float = 60.0):
+        self.capacity = float(limit)
+        self.rate = limit / period
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Segundos até haver `amount` fichas (pedidos maiores que o balde esperam o balde cheio)."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return missing / self.rate if missing > 0 else 0.0
+
+    def take(self, amount: float) -> None:
+        if self.rate > 0:
+            self.tokens -= min(amount, self.capacity)
+
+    def drain(self, now: float) -> None:
+        # Após um 429, o saldo local não reflete a cota real: recomeça do zero.
+        if self.rate > 0:
+            self._refill(now)
+            self.tokens = min(self.tokens, 0.0)
+
+
+class _SharedStream:
+    """Trechos de uma resposta em streaming, repassados a todas as chamadas idênticas em andamento."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def publish(self, chunk) -> None:
+        with self.condition:
+            self.chunks.append(chunk)
+            self.condition.notify_all()
+
+    def finish(self, error: Exception = None) -> None:
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.condition.notify_all()
+
+    def __iter__(self):
+        index = 0
+        while True:
+            with self.condition:
+                while index >= len(self.chunks) and not self.done:
+                    self.condition.wait()
+                if index >= len(self.chunks):
+                    if self.error is not None:
+                        raise self.error
+                    return
+                chunk = self.chunks[index]
+            index += 1
+            yield chunk
+
+
+class LLMScheduler:
+    """Admissão das chamadas ao LLM: prioridade, limites por minuto, concorrência e novas tentativas."""
+
+    def __init__(self, rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, max_retries: int = DEFAULT_MAX_RETRIES,
+                 queue_timeout: float = DEFAULT_QUEUE_TIMEOUT_SECONDS, period: float = 60.0):
+        # `period` só muda em simulações, para comprimir o "minuto" das cotas.
+        self.requests = TokenBucket(rpm, period)
+        self.tokens = TokenBucket(tpm, period)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.queue_timeout = queue_timeout
+
+        self._condition = threading.Condition()
+        self._queue = []  # heap de [prioridade, ordem de chegada]
+        self._order = itertools.count()
+        self._active = 0
+        self._paused_until = 0.0
+        self._in_flight = {}  # chave -> Future (chamada completa) ou _SharedStream
+        self._in_flight_lock = threading.Lock()
+
+    # --- Admissão ---
+
+    def _admit(self, tokens: int, priority: int, deadline: float) -> float:
+        """Espera a vez da chamada (primeira da fila, com fichas e vaga livre); devolve a espera."""
+        start = time.monotonic()
+        ticket = [priority, next(self._order)]
+        with self._condition:
+            heapq.heappush(self._queue, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._queue[0] is ticket and self._active < self.max_concurrency:
+                        wait = max(self._paused_until - now, self.requests.wait_time(1, now),
+                                   self.tokens.wait_time(tokens, now))
+                        if wait <= 0:
+                            heapq.heappop(self._queue)
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            self._active += 1
+                            # A próxima da fila pode ter sua vez agora.
+                            self._condition.notify_all()
+                            return now - start
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        raise QuotaExceededError(
+                            "Muitas solicitações à IA neste momento: o limite de uso da API foi atingido. "
+                            + _try_again(wait),
+                            retry_after=wait,
+                        )
+                    self._condition.wait(min(wait, remaining) if wait else remaining)
+            except BaseException:
+                if ticket in self._queue:
+                    self._queue.remove(ticket)
+                    heapq.heapify(self._queue)
+                    self._condition.notify_all()
+                raise
+
+    def _release(self) -> None:
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        """Pausa a fila após erro de cota/indisponibilidade; devolve a duração da pausa."""
+        hint = retry_after_seconds(error)
+        delay = hint if hint is not None else min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt)
+        now = time.monotonic()
+        with self._condition:
+            self._paused_until = max(self._paused_until, now + delay)
+            if error_status(error) == 429:
+                self.requests.drain(now)
+                self.tokens.drain(now)
+            self._condition.notify_all()
+        metrics = get_metrics()
+        metrics.increment("llm_retries", status=str(error_status(error)))
+        metrics.log_event("llm_backoff", level=logging.WARNING, seconds=round(delay, 3), tentativa=attempt + 1,
+                          status=error_status(error), sugerido_pela_api=hint is not None, erro=str(error)[:200])
+        return delay
+
+    def _raise_final(self, error: Exception, attempts: int):
+        """Repassa o erro; o de cota vira QuotaExceededError, com mensagem para o usuário."""
+        if error_status(error) != 429:
+            raise error
+        retry_after = retry_after_seconds(error)
+        raise QuotaExceededError(
+            f"Limite de uso da API do Gemini atingido após {attempts} tentativa(s). {_try_again(retry_after)}",
+            retry_after=retry_after,
+        ) from error
+
+    def _is_retryable(self, error: Exception, attempt: int) -> bool:
+        return error_status(error) in RETRYABLE_STATUS and attempt < self.max_retries
+
+    # --- Execução ---
+
+    def call(self, function, prompt_tokens: int, priority: int = PRIORITY_INTERACTIVE, key: str = None):
+        """Executa `function()` na vez da chamada; chamadas com a mesma `key` em andamento são unificadas."""
+        if key is not None:
+            with self._in_flight_lock:
+                shared = self._in_flight.get(key)
+                leader = shared is None
+                if leader:
+                    shared = self._in_flight[key] = Future()
+            if not leader:
+                get_metrics().increment("llm_coalesced", stream="false")
+                return shared.result()
+        try:
+            result = self._call_with_retries(function, prompt_tokens, priority)
+        except BaseException as e:
+            if key is not None:
+                self._finish_in_flight(key)
+                shared.set_exception(e)
+            raise
+        if key is not None:
+            self._finish_in_flight(key)
+            shared.set_result(result)
+        return result
+
+    def _call_with_retries(self, function, prompt_tokens: int, priority: int):
+        deadline = time.monotonic() + self.queue_timeout
+        attempt = 0
+        while True:
+            waited = self._admit(prompt_tokens, priority, deadline)
+            get_metrics().observe("llm_queue_seconds", waited, prioridade=str(priority))
+            try:
+                return function()
+            except Exception as e:
+                if not self._is_retryable(e, attempt):
+                    self._raise_final(e, attempt + 1)
+                self._backoff(e, attempt)
+                attempt += 1
+            finally:
+                self._release()
+
+    def stream(self, function, prompt_tokens: int, priority: int = PRIORITY_INTERACTIVE, key: str = None):
+        """
+        Versão em streaming de `call`: `function()` devolve um iterável de trechos.
+
+        Erros antes do primeiro trecho valem nova tentativa; depois dele, são repassados.
+        A vaga de concorrência fica ocupada até o fim do stream. Nada acontece até a
+        iteração começar (um stream criado e descartado não ocupa a fila).
+        """
+        shared = None
+        if key is not None:
+            with self._in_flight_lock:
+                existing = self._in_flight.get(key)
+                if existing is None:
+                    shared = self._in_flight[key] = _SharedStream()
+            if existing is not None:
+                get_metrics().increment("llm_coalesced", stream="true")
+                yield from existing
+                return
+
+        deadline = time.monotonic() + self.queue_timeout
+        attempt = 0
+        error = None
+        try:
+            while True:
+                waited = self._admit(prompt_tokens, priority, deadline)
+                get_metrics().observe("llm_queue_seconds", waited, prioridade=str(priority))
+                started = False
+                try:
+                    for chunk in function():
+                        started = True
+                        if shared is not None:
+                            shared.publish(chunk)
+                        yield chunk
+                    return
+                except Exception as e:
+                    if started or not self._is_retryable(e, attempt):
+                        self._raise_final(e, attempt + 1)
+                    self._backoff(e, attempt)
+                    attempt += 1
+                finally:
+                    self._release()
+        except GeneratorExit:
+            # Quem iniciou o stream desistiu (ex: sessão encerrada): as demais recebem um erro.
+            error = Exception("Geração interrompida por quem a iniciou; tente novamente.")
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            if shared is not None:
+                self._finish_in_flight(key)
+                shared.finish(error)
+
+    def _finish_in_flight(self, key: str) -> None:
+        with self._in_flight_lock:
+            self._in_flight.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._condition:
+            now = time.monotonic()
+            return {
+                "na_fila": len(self._queue),
+                "em_andamento": self._active,
+                "pausa_restante_s": round(max(0.0, self._paused_until - now), 1),
+                "requisicoes_disponiveis": round(self.requests.tokens, 1) if self.requests.rate > 0 else None,
+                "tokens_disponiveis": round(self.tokens.tokens) if self.tokens.rate > 0 else None,
+            }
+
+
+class ScheduledModel:
+    """
+    Envolve um `genai.GenerativeModel`, fazendo cada `generate_content` passar pelo `LLMScheduler`.
+
+    Fica entre o cache e o modelo real (CachedModel -> ScheduledModel -> modelo), para que
+    respostas em cache não consumam cota. Demais atributos são repassados ao modelo.
+    """
+
+    def __init__(self, model, scheduler: LLMScheduler, priority: int = PRIORITY_INTERACTIVE):
+        self.model = model
+        self.scheduler = scheduler
+        self.priority = priority
+
+    def with_priority(self, priority: int) -> "ScheduledModel":
+        return ScheduledModel(self.model, self.scheduler, priority)
+
+    def generate_content(self, contents, *, generation_config=None, stream: bool = False, priority: int = None,
+                         **kwargs):
+        priority = self.priority if priority is None else priority
+
+        def call():
+            return self.model.generate_content(contents, generation_config=generation_config, stream=stream, **kwargs)
+
+        if not isinstance(contents, str):
+            # Conteúdo multimodal: sem unificação de chamadas e com estimativa mínima de tokens.
+            key, tokens = None, 1
+        else:
+            model_name = getattr(self.model, "model_name", type(self.model).__name__)
+            key = cache_key(model_name, [getattr(self.model, "_generation_config", None), generation_config],
+                            contents, stream=stream, **kwargs)
+            tokens = estimate_tokens(contents)
+        if stream:
+            return self.scheduler.stream(call, tokens, priority, key)
+        return self.scheduler.call(call, tokens, priority, key)
+
+    def __getattr__(self, name):
+        # Como em CachedModel: sem `self.model` (copy/pickle, __init__ que falhou), repassar
+        # o atributo chamaria __getattr__ de novo, até estourar a recursão.
+        if name.startswith("_") or "model" not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    """Fila compartilhada do processo, configurada pelas variáveis de ambiente."""
+    global _default_scheduler
+    if _default_scheduler is None:
+        with _default_scheduler_lock:
+            if _default_scheduler is None:
+                _default_scheduler = LLMScheduler(
+                    rpm=float(os.getenv("LLM_RPM", DEFAULT_RPM)),
+                    tpm=float(os.getenv("LLM_TPM", DEFAULT_TPM)),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+                    max_retries=int(os.getenv("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+                    queue_timeout=float(os.getenv("LLM_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS)),
+                )
+    return _default_scheduler
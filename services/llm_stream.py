@@ -0,0 +1,60 @@
+# services/llm_stream.py
+
+import time
+
+from services.llm_scheduler import QuotaExceededError
+
+
+class TextStream:
+    """
+    Iterável de fragmentos de texto de uma chamada `generate_content(..., stream=True)`.
+
+    Pode ser passado diretamente para `st.write_stream`. Ao ser consumido, registra o tempo
+    até o primeiro fragmento (`time_to_first_token`), o tempo total e o texto completo.
+    Se `error_prefix` for informado, erros da API viram um último fragmento
+    "<error_prefix>: <erro>" em vez de exceção, como nas funções não-streaming dos serviços.
+    QuotaExceededError é sempre propagada, para que o app mostre o aviso de limite de uso.
+    `prompt` também pode ser uma função sem argumentos, chamada só ao iniciar a iteração
+    (ex: quando montar o prompt exige chamadas prévias ao LLM, como na fase "map").
+    """
+
+    def __init__(self, model, prompt, error_prefix: str = None, **kwargs):
+        self.model = model
+        self.prompt = prompt
+        self.error_prefix = error_prefix
+        self.kwargs = kwargs
+        self.time_to_first_token = None
+        self.total_time = None
+        self.text = ""
+
+    def __iter__(self):
+        start = time.perf_counter()
+        parts = []
+        try:
+            prompt = self.prompt() if callable(self.prompt) else self.prompt
+            for chunk in self.model.generate_content(prompt, stream=True, **self.kwargs):
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Fragmentos sem texto (ex: apenas metadados de término) são ignorados.
+                    continue
+                if not text:
+                    continue
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.perf_counter() - start
+                parts.append(text)
+                yield text
+        except Exception as e:
+            if self.error_prefix is None or isinstance(e, QuotaExceededError):
+                raise
+            message = f"{self.error_prefix}: {str(e)}"
+            parts.append(message)
+            yield message
+        finally:
+            self.total_time = time.perf_counter() - start
+            self.text = "".join(parts)
+
+
+def stream_text(model, prompt, error_prefix: str = None, **kwargs) -> TextStream:
+    """Inicia (de forma preguiçosa) uma geração em streaming; a chamada à API ocorre ao iterar."""
+    return TextStream(model, prompt, error_prefix=error_prefix, **kwargs)
@@ -0,0 +1,121 @@
+# services/long_document.py
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+# Documentos até este tamanho vão inteiros em uma única chamada ao LLM.
+SINGLE_CALL_MAX_CHARS = int(os.getenv("LLM_SINGLE_CALL_MAX_CHARS", 60000))
+# Tamanho máximo de cada parte enviada na fase "map".
+CHUNK_MAX_CHARS = int(os.getenv("LLM_CHUNK_MAX_CHARS", 20000))
+# Número máximo de chamadas simultâneas ao LLM na fase "map".
+MAP_MAX_WORKERS = int(os.getenv("LLM_MAP_MAX_WORKERS", 4))
+
+# Pontos de corte, do mais ao menos estrutural. Cada regex marca o fim de um trecho (m.end()).
+_BOUNDARIES = [
+    # Início de títulos de seção: "DOS FATOS", "II - DO DIREITO", "3. DOS PEDIDOS", "CAPÍTULO I"...
+    re.compile(
+        r"(?m)^(?=[ \t]*(?:(?:[IVXLC]+|\d+(?:\.\d+)*)[ \t]*[-–.)][ \t]*)?"
+        r"(?:DOS?|DAS?|CAP[IÍ]TULO|T[IÍ]TULO|SE[CÇ][AÃ]O|PRELIMINAR(?:MENTE)?|M[EÉ]RITO|S[IÍ]NTESE)\b)"
+    ),
+    re.compile(r"\n[ \t]*\n"),  # parágrafos
+    re.compile(r"\n"),  # linhas
+    re.compile(r"[.;:!?][ \t]+"),  # frases
+]
+
+
+def split_document(text: str, max_chars: int = CHUNK_MAX_CHARS) -> list:
+    """
+    Divide o documento em partes de até `max_chars` caracteres, cortando preferencialmente em
+    títulos de seção, depois em parágrafos, linhas e frases (corte bruto só em último caso).
+
+    A divisão não perde nada: "".join(split_document(text)) == text.
+    """
+    chunks = []
+    current = ""
+    for piece in _pieces(text, max_chars, 0):
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _pieces(text: str, max_chars: int, level: int) -> list:
+    if len(text) <= max_chars:
+        return [text]
+    if level == len(_BOUNDARIES):
+        return [text[start:start + max_chars] for start in range(0, len(text), max_chars)]
+
+    cuts = [m.end() for m in _BOUNDARIES[level].finditer(text) if 0 < m.end() < len(text)]
+    pieces = []
+    start = 0
+    for end in cuts + [len(text)]:
+        if end > start:
+            pieces.extend(_pieces(text[start:end], max_chars, level + 1))
+            start = end
+    return pieces
+
+
+def _build_map_prompt(chunk: str, index: int, total: int, focus: str) -> str:
+    return f"""
+    Você receberá a parte {index} de {total} de um documento jurídico extenso.
+    Extraia desta parte, de forma objetiva e fiel ao texto, tudo o que for relevante para {focus}:
+    fatos e datas, partes envolvidas, valores, pedidos, provas mencionadas, fundamentos legais
+    citados e decisões já proferidas. Não invente informações; se a parte não tiver nada
+    relevante, responda apenas "Sem informações relevantes".
+
+    Parte {index} de {total}:
+    {chunk}
+    """
+
+
+def _extract_partials(model, chunks: list, focus: str, max_workers: int) -> list:
+    total = len(chunks)
+
+    def extract(numbered):
+        index, chunk = numbered
+        return model.generate_content(_build_map_prompt(chunk, index, total, focus)).text
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, total))) as executor:
+        # executor.map preserva a ordem das partes.
+        return list(executor.map(extract, enumerate(chunks, start=1)))
+
+
+def prepare_document_context(model, document_text: str, focus: str, max_workers: int = None,
+                             single_call_max_chars: int = None, chunk_max_chars: int = None) -> str:
+    """
+    Devolve o texto a ser colocado no prompt final ("reduce") no lugar do documento.
+
+    Documentos curtos voltam inalterados. Documentos longos são divididos em partes, cada
+    parte é resumida por uma chamada ao LLM (até `max_workers` chamadas simultâneas) e os
+    extratos, na ordem original, substituem o documento. Se os extratos ainda forem longos
+    demais, o processo se repete sobre eles. Assim o documento é coberto por inteiro, sem truncamento.
+    Os limites não informados vêm das configurações do módulo.
+    """
+    max_workers = max_workers or MAP_MAX_WORKERS
+    single_call_max_chars = single_call_max_chars or SINGLE_CALL_MAX_CHARS
+    chunk_max_chars = chunk_max_chars or CHUNK_MAX_CHARS
+    text = document_text
+    rounds = 0
+    while len(text) > single_call_max_chars:
+        previous_length = len(text)
+        chunks = split_document(text, chunk_max_chars)
+        partials = _extract_partials(model, chunks, focus, max_workers)
+        text = "\n\n".join(
+            f"[Extrato da parte {index} de {len(chunks)}]\n{partial.strip()}"
+            for index, partial in enumerate(partials, start=1)
+        )
+        rounds += 1
+        if len(chunks) == 1 or len(text) >= previous_length:
+            # Uma única parte, ou extratos que não encolhem: outra rodada não ajudaria.
+            break
+
+    if rounds:
+        return (
+            "(Documento extenso: abaixo estão os extratos de todas as suas partes, na ordem original.)\n\n"
+            + text
+        )
+    return text
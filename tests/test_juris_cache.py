@@ -0,0 +1,30 @@
+# tests/test_juris_cache.py
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from utils.juris_cache import JurisCache, search_key
+
+
+def test_search_key_normaliza_caixa_acentos_e_espacos():
+    assert search_key("  Prescrição   Intercorrente ", "Civil") == search_key("prescricao intercorrente", "civil")
+
+
+def test_search_key_mantem_negacoes_e_numeros_de_artigo():
+    pares = [
+        ("art. 5 CF", "art. 7 CF"),
+        ("prescrição com citação", "prescrição sem citação"),
+        ("dano moral não configurado", "dano moral configurado"),
+    ]
+    for termo, outro in pares:
+        assert search_key(termo, "Civil") != search_key(outro, "Civil")
+
+
+def test_buscas_diferentes_nao_compartilham_resultado():
+    cache = JurisCache()
+    for termo in ("dano moral configurado", "dano moral não configurado"):
+        resultado = cache.get_or_fetch(search_key(termo, "Civil"), lambda termo=termo: {"termo": termo, "resultados": []})
+        assert resultado["termo"] == termo
+    assert cache.stats()["misses"] == 2
@@ -1,22 +1,27 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 
-def calculate_legal_dates(start_date, area):
-    """Calcula prazos processuais conforme área jurídica"""
-    if area == "Criminal":
-        return {
-            "Resposta": start_date + timedelta(days=10),
-            "Recurso": start_date + timedelta(days=5)
-        }
-    elif area == "Civil":
-        return {
-            "Resposta": start_date + timedelta(days=15),
-            "Recurso": start_date + timedelta(days=10)
-        }
-    else:  # Previdenciário
-        return {
-            "Resposta": start_date + timedelta(days=20),
-            "Recurso": start_date + timedelta(days=15)
-        }
+import numpy as np
+
+from utils.deadlines import legal_deadlines
+
+def calculate_legal_dates(start_date, area, uf=None, tribunal=None):
+    """Calcula prazos processuais conforme área jurídica (dias úteis; dias corridos no Criminal)"""
+    deadlines = legal_deadlines([start_date], area, uf=uf, tribunal=tribunal)
+    result = {}
+    for name, dates in deadlines.items():
+        day = dates[0].astype(object)
+        # Mantém o tipo recebido: datetime continua datetime, com o mesmo horário.
+        result[name] = datetime.combine(day, start_date.time()) if isinstance(start_date, datetime) else day
+    return result
+
+def calculate_legal_dates_batch(start_dates, areas, uf=None, tribunal=None):
+    """
+    Versão em lote de `calculate_legal_dates` para uma carteira inteira de processos.
+
+    `areas`, `uf` e `tribunal` podem ser um valor só ou um por data.
+    Devolve {"Resposta": array, "Recurso": array} de numpy.datetime64[D].
+    """
+    return legal_deadlines(start_dates, areas, uf=uf, tribunal=tribunal)
 
 def calculate_penalty_risk(score):
     """Calcula risco penal baseado em score"""
@@ -25,3 +30,8 @@ def calculate_penalty_risk(score):
     elif score > 50:
         return "Médio risco"
     return "Baixo risco"
+
+def calculate_penalty_risk_batch(scores):
+    """Versão vetorizada de `calculate_penalty_risk`: um rótulo de risco por score"""
+    scores = np.asarray(scores, dtype=float)
+    return np.where(scores > 80, "Alto risco", np.where(scores > 50, "Médio risco", "Baixo risco"))
@@ -0,0 +1,300 @@
+# utils/deadlines.py
+"""
+Cálculo de prazos processuais em dias úteis, com feriados e recesso, para um ou milhares de casos.
+
+Regras aplicadas:
+- Áreas não criminais (CPC art. 219 e 224): contam-se só os dias úteis, excluído o dia da
+  intimação. Intimação em dia sem expediente vale como feita no primeiro dia útil seguinte.
+- Criminal (CPP art. 798): dias corridos, com início no primeiro dia útil após a intimação
+  (Súmula 310 do STF) e vencimento prorrogado para o dia útil seguinte.
+- Os prazos ficam suspensos de 20 de dezembro a 20 de janeiro (CPC art. 220 e CPP art. 798-A).
+  Sem a suspensão (ex: réu preso), o vencimento só é prorrogado no recesso forense (20/12 a 06/01).
+
+Os calendários (feriados nacionais, estaduais e do tribunal, incluindo os móveis, calculados a
+partir da Páscoa) são montados uma vez por UF/tribunal como `numpy.busdaycalendar`, e o cálculo
+em lote é feito com `numpy.busday_offset`, um grupo de UF/tribunal por vez.
+
+Feriados municipais e suspensões de expediente publicadas pelos tribunais podem ser informados
+num JSON em DEADLINE_HOLIDAYS_PATH:
+    {"nacional": ["2025-02-28"], "uf": {"SP": ["2025-01-25"]}, "tribunal": {"TJSP": ["2025-03-05"]}}
+"""
+
+import json
+import os
+import threading
+from datetime import date, timedelta
+
+import numpy as np
+
+# Prazos (em dias) por área; áreas não listadas usam os de DEFAULT_AREA.
+DEADLINE_RULES = {
+    "Criminal": {"Resposta": 10, "Recurso": 5},
+    "Civil": {"Resposta": 15, "Recurso": 10},
+    "Previdenciário": {"Resposta": 20, "Recurso": 15},
+}
+DEFAULT_AREA = "Previdenciário"
+# Áreas com prazos em dias corridos; nas demais, dias úteis.
+CALENDAR_DAY_AREAS = {"Criminal"}
+
+# Anos cobertos pelos calendários. Datas fora do intervalo são recusadas, pois os feriados seriam ignorados.
+FIRST_YEAR = 2000
+LAST_YEAR = 2100
+
+# Suspensão dos prazos (inclusive) e recesso forense, sem expediente: (mês, dia).
+SUSPENSION_START = (12, 20)
+SUSPENSION_END = (1, 20)
+FORENSIC_RECESS_END = (1, 6)
+
+# Feriados nacionais fixos: (mês, dia, primeiro ano de vigência).
+NATIONAL_HOLIDAYS = [
+    (1, 1, FIRST_YEAR),    # Confraternização Universal
+    (4, 21, FIRST_YEAR),   # Tiradentes
+    (5, 1, FIRST_YEAR),    # Dia do Trabalho
+    (9, 7, FIRST_YEAR),    # Independência
+    (10, 12, FIRST_YEAR),  # Nossa Senhora Aparecida
+    (11, 2, FIRST_YEAR),   # Finados
+    (11, 15, FIRST_YEAR),  # Proclamação da República
+    (11, 20, 2024),        # Dia Nacional de Zumbi e da Consciência Negra (Lei 14.759/2023)
+    (12, 25, FIRST_YEAR),  # Natal
+]
+# Feriados móveis com suspensão do expediente forense: dias em relação ao domingo de Páscoa.
+NATIONAL_EASTER_OFFSETS = [-48, -47, -2, 60]  # Carnaval (segunda e terça), Sexta-feira Santa, Corpus Christi
+
+# Feriados estaduais fixos (mês, dia). Confira com o calendário oficial do tribunal de cada UF.
+STATE_HOLIDAYS = {
+    "AC": [(6, 15), (9, 5), (11, 17)],
+    "AL": [(6, 24), (6, 29), (9, 16)],
+    "AM": [(9, 5)],
+    "AP": [(3, 19), (10, 5)],
+    "BA": [(7, 2)],
+    "CE": [(3, 19), (3, 25)],
+    "DF": [(11, 30)],
+    "MA": [(7, 28)],
+    "MS": [(10, 11)],
+    "PA": [(8, 15)],
+    "PB": [(8, 5)],
+    "PE": [(3, 6)],
+    "PI": [(10, 19)],
+    "PR": [(12, 19)],
+    "RJ": [(4, 23)],
+    "RN": [(10, 3)],
+    "RO": [(1, 4), (6, 18)],
+    "RR": [(10, 5)],
+    "RS": [(9, 20)],
+    "SE": [(7, 8)],
+    "SP": [(7, 9)],
+    "TO": [(9, 8), (10, 5)],
+}
+
+# Justiça Federal e tribunais superiores (Lei 5.010/1966, art. 62): Semana Santa de quarta a
+# sexta, Dia dos Cursos Jurídicos, Todos os Santos e Dia da Justiça.
+FEDERAL_COURT_PREFIXES = ("TRF", "JF", "STJ", "STF", "TST", "TRT")
+FEDERAL_COURT_EASTER_OFFSETS = [-4, -3]
+FEDERAL_COURT_HOLIDAYS = [(8, 11), (11, 1), (12, 8)]
+
+
+def easter_sunday(year: int) -> date:
+    """Domingo de Páscoa no calendário gregoriano (algoritmo de Meeus/Jones/Butcher)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def is_federal_court(tribunal: str) -> bool:
+    return (tribunal or "").upper().startswith(FEDERAL_COURT_PREFIXES)
+
+
+def _extra_holidays(uf: str, tribunal: str) -> list:
+    path = os.getenv("DEADLINE_HOLIDAYS_PATH")
+    if not path:
+        return []
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError) as e:
+        raise Exception(f"Arquivo de feriados inválido ({path}): {str(e)}")
+    days = list(data.get("nacional", []))
+    days += data.get("uf", {}).get(uf, [])
+    days += data.get("tribunal", {}).get(tribunal, [])
+    return [date.fromisoformat(day) for day in days]
+
+
+def holidays(uf: str = None, tribunal: str = None, first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR) -> list:
+    """Feriados (nacionais, da UF e do tribunal) entre `first_year` e `last_year`, em ordem."""
+    uf = (uf or "").upper()
+    tribunal = (tribunal or "").upper()
+    federal = is_federal_court(tribunal)
+    days = set()
+    for year in range(first_year, last_year + 1):
+        days.update(date(year, month, day) for month, day, since in NATIONAL_HOLIDAYS if year >= since)
+        easter = easter_sunday(year)
+        offsets = NATIONAL_EASTER_OFFSETS + (FEDERAL_COURT_EASTER_OFFSETS if federal else [])
+        days.update(easter + timedelta(days=offset) for offset in offsets)
+        # Na Justiça Federal valem os feriados estaduais da sede da seção judiciária.
+        days.update(date(year, month, day) for month, day in STATE_HOLIDAYS.get(uf, []))
+        if federal:
+            days.update(date(year, month, day) for month, day in FEDERAL_COURT_HOLIDAYS)
+    days.update(day for day in _extra_holidays(uf, tribunal) if first_year <= day.year <= last_year)
+    return sorted(days)
+
+
+def _period(first_year: int, last_year: int, end: tuple) -> list:
+    # Dias de 20/12 até `end` (mês, dia) do ano seguinte, para todos os anos do calendário.
+    days = []
+    for year in range(first_year - 1, last_year + 1):
+        start = date(year, *SUSPENSION_START)
+        stop = date(year + 1, *end)
+        days.extend(start + timedelta(days=offset) for offset in range((stop - start).days + 1))
+    return days
+
+
+class DeadlineCalendar:
+    """
+    Calendários de uma UF/tribunal, pré-calculados para FIRST_YEAR..LAST_YEAR:
+    - `business`: dias úteis fora da suspensão de prazos (contagem em dias úteis e vencimentos);
+    - `court_open`: dias com expediente, inclusive na suspensão (prazos que não se suspendem);
+    - `running`: dias corridos fora da suspensão (contagem criminal).
+    """
+
+    def __init__(self, uf: str = None, tribunal: str = None):
+        self.uf = (uf or "").upper()
+        self.tribunal = (tribunal or "").upper()
+        self.holidays = np.array(holidays(self.uf, self.tribunal), dtype="datetime64[D]")
+        suspension = np.array(_period(FIRST_YEAR, LAST_YEAR, SUSPENSION_END), dtype="datetime64[D]")
+        recess = np.array(_period(FIRST_YEAR, LAST_YEAR, FORENSIC_RECESS_END), dtype="datetime64[D]")
+        self.business = np.busdaycalendar(weekmask="1111100", holidays=np.union1d(self.holidays, suspension))
+        self.court_open = np.busdaycalendar(weekmask="1111100", holidays=np.union1d(self.holidays, recess))
+        self.running = np.busdaycalendar(weekmask="1111111", holidays=suspension)
+        self.running_all = np.busdaycalendar(weekmask="1111111")
+
+    def add_business_days(self, start_dates, days, suspend_in_recess: bool = True) -> np.ndarray:
+        """Vencimento contando `days` dias úteis após cada data de intimação."""
+        calendar = self.business if suspend_in_recess else self.court_open
+        return np.busday_offset(start_dates, days, roll="forward", busdaycal=calendar)
+
+    def add_calendar_days(self, start_dates, days, suspend_in_recess: bool = True) -> np.ndarray:
+        """Vencimento contando `days` dias corridos, do primeiro dia útil após a intimação."""
+        open_days = self.business if suspend_in_recess else self.court_open
+        running = self.running if suspend_in_recess else self.running_all
+        first = np.busday_offset(start_dates, 1, roll="forward", busdaycal=open_days)
+        last = np.busday_offset(first, np.asarray(days) - 1, roll="forward", busdaycal=running)
+        return np.busday_offset(last, 0, roll="forward", busdaycal=open_days)
+
+    def business_days_between(self, start_dates, end_dates) -> np.ndarray:
+        """Dias úteis de cada data inicial (inclusive) até a final (exclusive); negativo se já passou."""
+        return np.busday_count(start_dates, end_dates, busdaycal=self.business)
+
+
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+
+def get_calendar(uf: str = None, tribunal: str = None) -> DeadlineCalendar:
+    """Calendário compartilhado da UF/tribunal, montado na primeira consulta."""
+    key = ((uf or "").upper(), (tribunal or "").upper())
+    calendar = _calendars.get(key)
+    if calendar is None:
+        with _calendars_lock:
+            calendar = _calendars.get(key)
+            if calendar is None:
+                calendar = _calendars[key] = DeadlineCalendar(*key)
+    return calendar
+
+
+def _as_dates(values) -> np.ndarray:
+    dates = np.asarray(values, dtype="datetime64[D]")
+    valid = dates[~np.isnat(dates)]
+    if valid.size and (valid.min() < np.datetime64(f"{FIRST_YEAR}-01-01")
+                       or valid.max() > np.datetime64(f"{LAST_YEAR - 1}-12-31")):
+        raise Exception(f"Datas fora do intervalo coberto pelos calendários ({FIRST_YEAR}-{LAST_YEAR - 1})")
+    return dates
+
+
+def _factorize(values, size: int):
+    """Valores distintos (em maiúsculas) e o código de cada linha; escalares viram um código só."""
+    if values is None or isinstance(values, str):
+        return [(values or "").upper()], np.zeros(size, dtype=np.intp)
+    values = np.asarray(values)
+    if values.dtype.kind != "U":
+        # Valores ausentes (None, NaN de planilhas) viram "": calendário só com os feriados nacionais.
+        values = np.array([value if isinstance(value, str) else "" for value in values.tolist()], dtype=str)
+    if values.shape != (size,):
+        raise ValueError("uf e tribunal devem ser escalares ou ter um valor por data")
+    unique, codes = np.unique(values, return_inverse=True)
+    return [str(value).upper() for value in unique], codes
+
+
+def _calendar_groups(uf, tribunal, size: int) -> list:
+    """Linhas de cada combinação de UF e tribunal; um único grupo se ambos forem escalares."""
+    if (uf is None or isinstance(uf, str)) and (tribunal is None or isinstance(tribunal, str)):
+        return [((uf, tribunal), slice(None))]
+    ufs, uf_codes = _factorize(uf, size)
+    tribunals, tribunal_codes = _factorize(tribunal, size)
+    combined = uf_codes * len(tribunals) + tribunal_codes
+    order = np.argsort(combined, kind="stable")
+    present, starts = np.unique(combined[order], return_index=True)
+    return [
+        ((ufs[code // len(tribunals)], tribunals[code % len(tribunals)]), rows)
+        for code, rows in zip(present, np.split(order, starts[1:]))
+    ]
+
+
+def compute_deadlines(start_dates, days, calendar_days=False, uf=None, tribunal=None,
+                      suspend_in_recess: bool = True) -> np.ndarray:
+    """
+    Vencimentos de muitos prazos numa chamada.
+
+    Args:
+        start_dates: datas de intimação (date, "AAAA-MM-DD" ou datetime64); NaT gera NaT.
+        days: duração de cada prazo (escalar ou um valor por data), no mínimo 1. Uma matriz
+            (prazos x datas) calcula vários prazos por caso de uma vez.
+        calendar_days: True para dias corridos (escalar ou um valor por data).
+        uf, tribunal: escalares ou um valor por data; cada combinação usa o seu calendário.
+        suspend_in_recess: se os prazos ficam suspensos de 20/12 a 20/01.
+
+    Returns:
+        np.ndarray de datetime64[D] com os vencimentos, no formato de `days` (na ordem das datas).
+    """
+    dates = _as_dates(start_dates)
+    days = np.asarray(days, dtype=np.int64)
+    days = np.broadcast_to(days, np.broadcast_shapes(days.shape, dates.shape))
+    if (days < 1).any():
+        raise ValueError("Prazos devem ter pelo menos 1 dia")
+    running = np.broadcast_to(np.asarray(calendar_days, dtype=bool), dates.shape)
+
+    result = np.empty(days.shape, dtype="datetime64[D]")
+    for (uf_key, tribunal_key), rows in _calendar_groups(uf, tribunal, dates.size):
+        calendar = get_calendar(uf_key, tribunal_key)
+        group_dates, group_days, group_running = dates[rows], days[..., rows], running[rows]
+        group_result = calendar.add_business_days(group_dates, group_days, suspend_in_recess)
+        if group_running.any():
+            group_result[..., group_running] = calendar.add_calendar_days(
+                group_dates[group_running], group_days[..., group_running], suspend_in_recess)
+        result[..., rows] = group_result
+    return result
+
+
+def legal_deadlines(start_dates, areas, uf=None, tribunal=None) -> dict:
+    """
+    Prazos de resposta e recurso (DEADLINE_RULES) de cada caso.
+
+    `areas` pode ser uma área só ou uma por data. Devolve {"Resposta": array, "Recurso": array}.
+    """
+    dates = _as_dates(start_dates)
+    areas = np.broadcast_to(np.asarray(areas, dtype=str), dates.shape)
+    # Regras calculadas uma vez por área distinta e espalhadas para as linhas via `inverse`.
+    unique, inverse = np.unique(areas, return_inverse=True)
+    rules = [DEADLINE_RULES.get(area, DEADLINE_RULES[DEFAULT_AREA]) for area in unique]
+    running = np.array([area in CALENDAR_DAY_AREAS for area in unique], dtype=bool)[inverse]
+    names = list(DEADLINE_RULES[DEFAULT_AREA])
+    days = np.array([[rule[name] for rule in rules] for name in names], dtype=np.int64)[:, inverse]
+    deadlines = compute_deadlines(dates, days, running, uf=uf, tribunal=tribunal)
+    return dict(zip(names, deadlines))
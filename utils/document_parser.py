@@ -1,31 +1,302 @@
-import PyPDF2
-from docx import Document
+import mmap
+import multiprocessing
+import os
+import shutil
+import re
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from io import BytesIO
+from typing import Iterator, NamedTuple, Optional
+from xml.etree.ElementTree import iterparse
 
-def parse_legal_document(file) -> str:
-    """Extrai texto de arquivos PDF ou DOCX"""
+from utils.metrics import log_event, observe
+from utils.parse_cache import get_parse_cache, hash_file
+
+# Versão da lógica de extração. Incremente sempre que a saída dos extratores mudar,
+# para que textos antigos no cache não sejam reaproveitados.
+PARSER_VERSION = "2"
+# Uploads não posicionáveis (sem seek) são copiados para um arquivo temporário;
+# até este tamanho a cópia fica em memória, acima disso vai para o disco.
+SPOOL_MAX_MEMORY = 32 * 1024 * 1024
+# Extração paralela de PDFs: abaixo deste número de páginas o custo de iniciar os
+# processos supera o ganho, e a extração continua serial.
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", 300))
+# Número de processos da extração paralela (0 = número de núcleos disponíveis).
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", 0))
+# Cada processo recebe vários blocos de páginas, para equilibrar páginas lentas (com imagens, tabelas).
+PDF_CHUNKS_PER_WORKER = 4
+# Extrator de DOCX: "stream" (leitura incremental do XML, padrão) ou "python-docx".
+DOCX_ENGINE = os.getenv("DOCX_ENGINE", "stream")
+
+# Namespace WordprocessingML e as tags usadas pelo extrator incremental de DOCX.
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_W_P, _W_T, _W_TAB, _W_BR, _W_CR = _W + "p", _W + "t", _W + "tab", _W + "br", _W + "cr"
+_W_TBL, _W_TR, _W_TC = _W + "tbl", _W + "tr", _W + "tc"
+
+
+class PageText(NamedTuple):
+    """
+    Trecho extraído de um documento: número da página, total de páginas e texto.
+
+    Em DOCX, que não tem páginas, cada trecho é um parágrafo ou linha de tabela e o total é None.
+    """
+    number: int
+    total: Optional[int]
+    text: str
+
+
+def parse_legal_document(file, use_cache: bool = True) -> str:
+    """Extrai texto de arquivos PDF ou DOCX, reaproveitando extrações anteriores do mesmo arquivo"""
+    return "".join(page.text for page in iter_legal_document(file, use_cache=use_cache))
+
+def iter_legal_document(file, use_cache: bool = True) -> Iterator[PageText]:
+    """
+    Extrai texto de arquivos PDF ou DOCX página a página.
+
+    Permite mostrar progresso e uma prévia antes do fim da extração. Se o arquivo já estiver
+    no cache de extração, todo o texto é entregue de uma vez, como uma única página.
+    O texto só é gravado no cache se o gerador for consumido até o fim.
+    """
     try:
-        if file.name.endswith('.pdf'):
-            return _extract_from_pdf(file)
-        elif file.name.endswith('.docx'):
-            return _extract_from_docx(file)
+        extension = file.name.rsplit('.', 1)[-1].lower()
+        if extension == 'pdf':
+            extractor = _iter_pdf_pages
+        elif extension == 'docx':
+            extractor = _iter_docx
         else:
             raise ValueError("Formato de arquivo não suportado")
+
+        if not use_cache:
+            yield from _timed_pages(extractor(file), extension, "desligado")
+            return
+
+        start = time.perf_counter()
+        cache = get_parse_cache()
+        # Os extratores de DOCX diferem na ordem de cabeçalhos/rodapés e na junção das tabelas:
+        # o texto de um não pode ser servido quando o outro está configurado.
+        salt = f"{PARSER_VERSION}:{extension}" + (f":{DOCX_ENGINE}" if extension == 'docx' else "")
+        key = hash_file(file, salt=salt)
+        text = cache.get(key)
+        if text is not None:
+            observe("parse_seconds", time.perf_counter() - start, formato=extension, cache="hit", status="ok")
+            yield PageText(1, 1, text)
+            return
+
+        parts = []
+        for page in _timed_pages(extractor(file), extension, "miss"):
+            parts.append(page.text)
+            yield page
+        cache.put(key, "".join(parts))
     except Exception as e:
         raise Exception(f"Falha ao extrair texto: {str(e)}")
 
-def _extract_from_pdf(file) -> str:
-    text = ""
+def _timed_pages(pages: Iterator[PageText], extension: str, cache_status: str) -> Iterator[PageText]:
+    # Mede só o tempo gasto extraindo, sem o tempo de quem consome as páginas (ex: a interface).
+    busy = 0.0
+    count = chars = 0
+    status = "erro"
+    try:
+        while True:
+            start = time.perf_counter()
+            page = next(pages, None)
+            busy += time.perf_counter() - start
+            if page is None:
+                break
+            count += 1
+            chars += len(page.text)
+            yield page
+        status = "ok"
+    except GeneratorExit:
+        status = "interrompido"
+        raise
+    finally:
+        observe("parse_seconds", busy, formato=extension, cache=cache_status, status=status)
+        log_event("parse", seconds=round(busy, 6), formato=extension, cache=cache_status, status=status,
+                  paginas=count, caracteres=chars)
+
+@contextmanager
+def _seekable_source(file, allow_mmap: bool = True):
+    """
+    Fornece um fluxo posicionável sobre o arquivo sem duplicar o conteúdo em memória.
+
+    Arquivos em disco são mapeados em memória (mmap); objetos já posicionáveis, como o
+    UploadedFile do Streamlit, são lidos diretamente; os demais são copiados para um
+    arquivo temporário "spooled". `allow_mmap=False` é usado por leitores que exigem a
+    interface completa de arquivo (o zipfile precisa de `seekable()`, ausente no mmap).
+    """
     try:
-        reader = PyPDF2.PdfReader(BytesIO(file.read()))
-        for page in reader.pages:
-            text += page.extract_text() or ""
+        fileno = file.fileno() if allow_mmap else None
+    except (AttributeError, OSError, ValueError):
+        fileno = None
+
+    if fileno is not None:
+        with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as mapped:
+            yield mapped
+    elif getattr(file, "seekable", lambda: False)():
+        file.seek(0)
+        yield file
+    else:
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as spooled:
+            shutil.copyfileobj(file, spooled)
+            spooled.seek(0)
+            yield spooled
+
+def _iter_pdf_pages(file, workers: int = None, min_parallel_pages: int = None) -> Iterator[PageText]:
+    workers = workers or PDF_WORKERS or os.cpu_count() or 1
+    if min_parallel_pages is None:
+        min_parallel_pages = PDF_PARALLEL_MIN_PAGES
+    try:
+        # Importado só quando chega um PDF, para não pesar na inicialização do app.
+        import PyPDF2
+
+        with _seekable_source(file) as source:
+            reader = PyPDF2.PdfReader(source)
+            total = len(reader.pages)
+            if workers > 1 and total >= min_parallel_pages:
+                yield from _iter_pdf_pages_parallel(source, total, workers)
+                return
+            for number, page in enumerate(reader.pages, start=1):
+                yield PageText(number, total, page.extract_text() or "")
     except Exception as e:
         raise Exception(f"Erro no PDF: {str(e)}")
-    return text
+
+def _iter_pdf_pages_parallel(source, total: int, workers: int) -> Iterator[PageText]:
+    """
+    Divide o intervalo de páginas em blocos, extrai os blocos em um pool de processos e
+    entrega as páginas na ordem original, à medida que os blocos ficam prontos.
+
+    Os processos leem o PDF de um arquivo temporário, em vez de receberem os bytes do
+    documento serializados a cada bloco.
+    """
+    chunk_size = max(1, -(-total // (workers * PDF_CHUNKS_PER_WORKER)))
+    ranges = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+        source.seek(0)
+        shutil.copyfileobj(source, tmp)
+        tmp.flush()
+
+        # "spawn" evita herdar por fork o estado das threads do servidor do Streamlit.
+        executor = ProcessPoolExecutor(
+            max_workers=min(workers, len(ranges)),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        try:
+            paths = [tmp.name] * len(ranges)
+            starts, stops = zip(*ranges)
+            for start, texts in zip(starts, executor.map(_extract_page_range, paths, starts, stops)):
+                for offset, text in enumerate(texts):
+                    yield PageText(start + offset + 1, total, text)
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+def _extract_page_range(path: str, start: int, stop: int) -> list:
+    # Executado nos processos do pool: abre o PDF uma vez por bloco de páginas.
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(path)
+    return [reader.pages[index].extract_text() or "" for index in range(start, stop)]
+
+def _extract_from_pdf(file) -> str:
+    return "".join(page.text for page in _iter_pdf_pages(file))
+
+def _iter_docx(file) -> Iterator[PageText]:
+    """
+    Lê o DOCX diretamente do zip, parte por parte, com um parser XML incremental.
+
+    Ao contrário do python-docx, não monta o documento inteiro em memória e inclui tabelas,
+    cabeçalhos, rodapés e notas. Parágrafos e linhas de tabela saem na ordem do documento.
+    """
+    if DOCX_ENGINE == "python-docx":
+        yield PageText(1, 1, _extract_from_docx(file))
+        return
+    try:
+        with _seekable_source(file, allow_mmap=False) as source, zipfile.ZipFile(source) as archive:
+            number = 0
+            for part in _docx_text_parts(archive.namelist()):
+                with archive.open(part) as stream:
+                    for block in _iter_docx_blocks(stream):
+                        number += 1
+                        yield PageText(number, None, block if number == 1 else "\n" + block)
+    except Exception as e:
+        raise Exception(f"Erro no DOCX: {str(e)}")
+
+def _docx_text_parts(names: list) -> list:
+    # Ordem de leitura: cabeçalhos, corpo, notas de rodapé, notas de fim e rodapés.
+    def numbered(prefix):
+        pattern = re.compile(rf"word/{prefix}(\d*)\.xml$")
+        found = [(int(m.group(1) or 0), name) for name in names if (m := pattern.match(name))]
+        return [name for _, name in sorted(found)]
+
+    body = ["word/document.xml"] if "word/document.xml" in names else []
+    notes = [name for name in ("word/footnotes.xml", "word/endnotes.xml") if name in names]
+    return numbered("header") + body + notes + numbered("footer")
+
+def _iter_docx_blocks(stream) -> Iterator[str]:
+    """
+    Emite o texto de cada parágrafo fora de tabelas e de cada linha de tabela (células
+    separadas por " | "). Elementos já processados são removidos da árvore, de modo que
+    a memória usada não cresce com o tamanho do documento.
+    """
+    ancestors = []
+    tables = []  # pilha de tabelas abertas: células da linha atual e parágrafos da célula atual
+
+    for event, elem in iterparse(stream, events=("start", "end")):
+        if event == "start":
+            ancestors.append(elem)
+            if elem.tag == _W_TBL:
+                tables.append({"row": [], "cell": []})
+            continue
+
+        ancestors.pop()
+        tag = elem.tag
+        if tag == _W_P:
+            text = _docx_paragraph_text(elem)
+            if tables:
+                if text:
+                    tables[-1]["cell"].append(text)
+            elif text:
+                yield text
+        elif tag == _W_TC:
+            table = tables[-1]
+            table["row"].append(" ".join(table["cell"]))
+            table["cell"] = []
+        elif tag == _W_TR:
+            table = tables[-1]
+            line = " | ".join(cell for cell in table["row"] if cell)
+            table["row"] = []
+            if line:
+                if len(tables) > 1:
+                    # Tabela aninhada: a linha vira conteúdo da célula da tabela externa.
+                    tables[-2]["cell"].append(line)
+                else:
+                    yield line
+        elif tag == _W_TBL:
+            tables.pop()
+        else:
+            continue
+
+        if ancestors:
+            ancestors[-1].remove(elem)
+
+def _docx_paragraph_text(paragraph) -> str:
+    parts = []
+    for node in paragraph.iter():
+        if node.tag == _W_T:
+            parts.append(node.text or "")
+        elif node.tag == _W_TAB:
+            parts.append("\t")
+        elif node.tag in (_W_BR, _W_CR):
+            parts.append("\n")
+    return "".join(parts)
 
 def _extract_from_docx(file) -> str:
     try:
+        from docx import Document
+
         doc = Document(BytesIO(file.read()))
         return "\n".join([para.text for para in doc.paragraphs if para.text])
     except Exception as e:
@@ -0,0 +1,336 @@
+# utils/document_store.py
+
+import atexit
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zlib
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from utils.metrics import increment, log_event
+
+# Limite padrão dos documentos mantidos em memória (bytes já comprimidos).
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+# Nível do zlib: 6 é o padrão da biblioteca; níveis maiores quase não reduzem texto jurídico.
+COMPRESSION_LEVEL = 6
+# Tamanho padrão da prévia exibida na página.
+PREVIEW_CHARS = 5000
+
+
+def document_key(text: str) -> str:
+    """Endereço de um texto no store: SHA-256 do conteúdo em UTF-8."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class DocumentHandle:
+    """
+    Referência a um documento do store: é o que cada sessão guarda em st.session_state.
+
+    O texto só é descomprimido quando `text()` é chamado. Quando o handle deixa de ser usado
+    (outra peça carregada, sessão encerrada), a referência ao documento é devolvida ao store.
+    """
+
+    __slots__ = ("key", "length", "_store", "_finalizer", "__weakref__")
+
+    def __init__(self, store, key: str, length: int):
+        self.key = key
+        self.length = length  # em caracteres
+        self._store = store
+        self._finalizer = weakref.finalize(self, store._schedule_release, key)
+
+    def text(self) -> str:
+        """Texto completo do documento."""
+        return self._store.text(self.key)
+
+    def preview(self, chars: int = PREVIEW_CHARS) -> str:
+        """Primeiros `chars` caracteres, sem descomprimir o documento inteiro."""
+        return self._store.preview(self.key, chars)
+
+    def release(self) -> None:
+        """Devolve a referência imediatamente, sem esperar o coletor de lixo."""
+        self._finalizer()
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __bool__(self) -> bool:
+        return self.length > 0
+
+    def __repr__(self) -> str:
+        return f"DocumentHandle({self.key[:12]}..., {self.length} caracteres)"
+
+
+class _Entry:
+    __slots__ = ("chars", "raw_bytes", "compressed_bytes", "refs", "on_disk")
+
+    def __init__(self, chars: int, raw_bytes: int, compressed_bytes: int):
+        self.chars = chars
+        self.raw_bytes = raw_bytes
+        self.compressed_bytes = compressed_bytes
+        self.refs = 0
+        self.on_disk = False
+
+
+class DocumentStore:
+    """
+    Armazena o texto dos documentos carregados, endereçado pelo SHA-256 do conteúdo.
+
+    - A mesma peça carregada em várias sessões é guardada uma vez só (contagem de referências);
+      o documento é apagado quando o último handle é liberado.
+    - O texto fica comprimido com zlib; a prévia descomprime apenas o início.
+    - Os documentos em memória respeitam `max_memory_bytes`; os menos usados recentemente
+      vão para `spill_dir` e voltam para a memória quando são lidos de novo.
+
+    As referências são devolvidas por `weakref.finalize`, que pode rodar em qualquer thread
+    no meio de outra operação: por isso a liberação só é enfileirada e processada na próxima
+    operação do store, já com o lock adquirido.
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_MEMORY_BYTES, spill_dir: str = None,
+                 compression_level: int = COMPRESSION_LEVEL):
+        self.max_memory_bytes = max_memory_bytes
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.compression_level = compression_level
+
+        self._entries = {}  # chave -> _Entry, para todo documento com referências
+        self._resident = OrderedDict()  # chave -> bytes comprimidos, do menos para o mais recente
+        self._spilling = {}  # chave -> bytes comprimidos, enquanto são gravados no disco
+        self._memory_bytes = 0
+        self._pending_releases = deque()
+        self._lock = threading.Lock()
+
+        self.puts = 0
+        self.deduplicated = 0
+        self.spills = 0
+        self.disk_reads = 0
+
+    def put(self, text: str) -> DocumentHandle:
+        """Guarda o texto (ou reaproveita o já guardado) e devolve um handle para ele."""
+        raw = text.encode("utf-8")
+        key = hashlib.sha256(raw).hexdigest()  # o mesmo que document_key(), sem codificar duas vezes
+        with self._lock:
+            self._drain_releases()
+            self.puts += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refs += 1
+                self.deduplicated += 1
+                increment("document_store_puts", resultado="duplicado")
+                return DocumentHandle(self, key, entry.chars)
+
+        # A compressão fica fora do lock: um documento grande não trava as outras sessões.
+        data = zlib.compress(raw, self.compression_level)
+        with self._lock:
+            self._drain_releases()
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _Entry(len(text), len(raw), len(data))
+                self._entries[key] = entry
+                victims = self._make_resident(key, data)
+                increment("document_store_puts", resultado="novo")
+            else:
+                # Outra sessão guardou o mesmo texto enquanto este era comprimido.
+                victims = []
+                self.deduplicated += 1
+                increment("document_store_puts", resultado="duplicado")
+            entry.refs += 1
+            handle = DocumentHandle(self, key, entry.chars)
+        self._spill(victims)
+        return handle
+
+    def text(self, key: str) -> str:
+        """Texto completo do documento `key`."""
+        return zlib.decompress(self._load(key)).decode("utf-8")
+
+    def preview(self, key: str, chars: int = PREVIEW_CHARS) -> str:
+        """Primeiros `chars` caracteres do documento `key`."""
+        # Um caractere ocupa até 4 bytes em UTF-8; um caractere cortado no fim é descartado.
+        head = zlib.decompressobj().decompress(self._load(key), 4 * chars)
+        return head.decode("utf-8", errors="ignore")[:chars]
+
+    def stats(self) -> dict:
+        """Ocupação e contadores, para dimensionar DOCUMENT_STORE_MAX_MB."""
+        with self._lock:
+            self._drain_releases()
+            entries = self._entries.values()
+            raw_bytes = sum(entry.raw_bytes for entry in entries)
+            compressed_bytes = sum(entry.compressed_bytes for entry in entries)
+            return {
+                "documents": len(self._entries),
+                "references": sum(entry.refs for entry in entries),
+                "referenced_bytes": sum(entry.raw_bytes * entry.refs for entry in entries),
+                "raw_bytes": raw_bytes,
+                "compressed_bytes": compressed_bytes,
+                "compression_ratio": raw_bytes / compressed_bytes if compressed_bytes else 0.0,
+                "resident_documents": len(self._resident),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "puts": self.puts,
+                "deduplicated": self.deduplicated,
+                "spills": self.spills,
+                "disk_reads": self.disk_reads,
+                "spill_dir": str(self.spill_dir) if self.spill_dir else None,
+            }
+
+    def _schedule_release(self, key: str) -> None:
+        # Chamado pelo finalizador do handle; deque.append é seguro sem o lock.
+        self._pending_releases.append(key)
+
+    def _drain_releases(self) -> None:
+        # Deve ser chamado com o lock adquirido.
+        while self._pending_releases:
+            key = self._pending_releases.popleft()
+            entry = self._entries.get(key)
+            if entry is None:
+                continue
+            entry.refs -= 1
+            if entry.refs > 0:
+                continue
+            del self._entries[key]
+            data = self._resident.pop(key, None)
+            if data is not None:
+                self._memory_bytes -= len(data)
+            if entry.on_disk:
+                self._delete_disk(key)
+
+    def _make_resident(self, key: str, data: bytes) -> list:
+        """
+        Coloca o documento na memória e tira os menos usados até caber no limite.
+        Deve ser chamado com o lock adquirido; devolve os que ainda precisam ser gravados no disco.
+        """
+        self._resident[key] = data
+        self._memory_bytes += len(data)
+        victims = []
+        while self._memory_bytes > self.max_memory_bytes and self._resident:
+            victim, victim_data = self._resident.popitem(last=False)
+            self._memory_bytes -= len(victim_data)
+            if not self._entries[victim].on_disk:
+                # Continua legível em `_spilling` até a gravação terminar.
+                self._spilling[victim] = victim_data
+                victims.append((victim, victim_data))
+        return victims
+
+    def _spill(self, victims: list) -> None:
+        for key, data in victims:
+            try:
+                self._write_disk(key, data)
+            except OSError as e:
+                # Sem disco (cheio, sem permissão): o documento volta para a memória, acima do limite.
+                with self._lock:
+                    self._spilling.pop(key, None)
+                    if key in self._entries and key not in self._resident:
+                        self._resident[key] = data
+                        self._resident.move_to_end(key, last=False)
+                        self._memory_bytes += len(data)
+                log_event("document_store_spill_failed", level=logging.WARNING, erro=str(e))
+                continue
+            with self._lock:
+                self._spilling.pop(key, None)
+                self.spills += 1
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.on_disk = True
+                elif key not in self._spilling:
+                    self._delete_disk(key)  # liberado durante a gravação
+            increment("document_store_spills")
+
+    def _load(self, key: str) -> bytes:
+        with self._lock:
+            self._drain_releases()
+            if key not in self._entries:
+                raise Exception(f"Documento {key[:12]} não está mais disponível no armazenamento.")
+            data = self._resident.get(key)
+            if data is not None:
+                self._resident.move_to_end(key)
+                return data
+            data = self._spilling.get(key)
+            if data is not None:
+                return data
+
+        data = self._read_disk(key)
+        with self._lock:
+            self.disk_reads += 1
+            victims = []
+            if key in self._entries and key not in self._resident and len(data) <= self.max_memory_bytes:
+                victims = self._make_resident(key, data)
+        increment("document_store_disk_reads")
+        self._spill(victims)
+        return data
+
+    def _spill_path(self, key: str) -> Path:
+        with self._lock:
+            if self.spill_dir is None:
+                # Sem DOCUMENT_STORE_DIR: diretório temporário, apagado quando o processo termina.
+                self.spill_dir = Path(tempfile.mkdtemp(prefix="documentos-"))
+                atexit.register(shutil.rmtree, self.spill_dir, ignore_errors=True)
+        return self.spill_dir / key[:2] / f"{key}.z"
+
+    def _read_disk(self, key: str) -> bytes:
+        try:
+            return self._spill_path(key).read_bytes()
+        except FileNotFoundError:
+            raise Exception(f"Documento {key[:12]} não foi encontrado em {self.spill_dir}.")
+
+    def _write_disk(self, key: str, data: bytes) -> None:
+        path = self._spill_path(key)
+        for attempt in range(3):
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                # Escrita atômica: uma leitura concorrente nunca encontra o arquivo pela metade.
+                fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+                break
+            except (FileNotFoundError, FileExistsError):
+                # `_delete_disk` removeu o subdiretório vazio durante o mkdir ou antes do mkstemp.
+                if attempt == 2:
+                    raise
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _delete_disk(self, key: str) -> None:
+        # Deve ser chamado com o lock adquirido (não usa `_spill_path`, que também o adquire).
+        if self.spill_dir is None:
+            return
+        path = self.spill_dir / key[:2] / f"{key}.z"
+        try:
+            path.unlink()
+            # Com DOCUMENT_STORE_DIR persistente, subdiretórios vazios não se acumulam.
+            path.parent.rmdir()
+        except OSError:
+            pass  # arquivo já removido, ou o subdiretório ainda tem outros documentos
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """
+    Retorna o store compartilhado pelas sessões do processo.
+
+    Configuração via variáveis de ambiente (ou .env):
+    - DOCUMENT_STORE_MAX_MB: limite dos documentos em memória, já comprimidos, em MB (padrão 64).
+    - DOCUMENT_STORE_DIR: diretório para os documentos que excedem o limite
+      (padrão: diretório temporário, apagado ao encerrar o processo).
+    """
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            max_mb = float(os.getenv("DOCUMENT_STORE_MAX_MB", DEFAULT_MEMORY_BYTES // (1024 * 1024)))
+            _default_store = DocumentStore(
+                max_memory_bytes=int(max_mb * 1024 * 1024),
+                spill_dir=os.getenv("DOCUMENT_STORE_DIR") or None,
+            )
+        return _default_store
@@ -0,0 +1,150 @@
+# utils/http_client.py
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Conexões mantidas abertas por host (reaproveitadas entre buscas e sessões do Streamlit).
+POOL_MAXSIZE = 20
+# Timeouts padrão (conexão, leitura), em segundos; podem ser ajustados por host.
+DEFAULT_TIMEOUT = (3.05, 10)
+# Status HTTP considerados transitórios, que justificam nova tentativa.
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class HttpClient:
+    """
+    Cliente HTTP compartilhado: pool de conexões, timeouts por host e novas tentativas com
+    backoff exponencial e jitter ("full jitter"), respeitando o cabeçalho Retry-After.
+
+    É seguro usar a mesma instância em várias threads.
+    """
+
+    def __init__(self, timeouts: dict = None, default_timeout=DEFAULT_TIMEOUT, max_retries: int = 3,
+                 backoff_base: float = 0.25, backoff_max: float = 8.0, pool_maxsize: int = POOL_MAXSIZE):
+        self.timeouts = dict(timeouts or {})
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_maxsize, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def timeout_for(self, url: str):
+        return self.timeouts.get(urlsplit(url).hostname, self.default_timeout)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Atraso antes da tentativa `attempt` (1, 2, ...): aleatório entre 0 e base * 2^(attempt-1)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    def request(self, method: str, url: str, deadline: float = None, **kwargs) -> requests.Response:
+        """
+        Faz a requisição com novas tentativas em erros de conexão, timeouts e status transitórios.
+
+        `deadline` (instante de `time.monotonic()`) limita o tempo total, incluindo as esperas:
+        nenhuma tentativa começa, nem espera, além dele. Levanta `requests.RequestException`
+        quando as tentativas se esgotam.
+        """
+        timeout = kwargs.pop("timeout", None) or self.timeout_for(url)
+        attempt = 0
+        while True:
+            attempt_timeout = _clip_timeout(timeout, deadline)
+            try:
+                response = self.session.request(method, url, timeout=attempt_timeout, **kwargs)
+                if response.status_code not in RETRY_STATUS:
+                    response.raise_for_status()
+                    return response
+                error = requests.HTTPError(f"{response.status_code} em {url}", response=response)
+                delay = _retry_after(response)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+                delay = None
+
+            attempt += 1
+            if attempt > self.max_retries:
+                raise error
+            delay = self.backoff_delay(attempt) if delay is None else min(delay, self.backoff_max)
+            if deadline is not None and time.monotonic() + delay >= deadline:
+                raise error
+            time.sleep(delay)
+
+    def get_json(self, url: str, deadline: float = None, **kwargs):
+        return self.request("GET", url, deadline=deadline, **kwargs).json()
+
+    def fan_out(self, calls: dict, deadline_seconds: float, max_workers: int = 8) -> dict:
+        """
+        Executa várias chamadas em paralelo com um prazo total.
+
+        `calls` mapeia um nome (ex: "TJSP") para uma função que recebe o `deadline` absoluto.
+        Retorna {nome: {"ok": bool, "data"|"error": ..., "seconds": float}}; fontes que falham
+        ou estouram o prazo não impedem o retorno das demais (resultado parcial).
+        """
+        deadline = time.monotonic() + deadline_seconds
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(calls))))
+        try:
+            futures = {executor.submit(call, deadline): name for name, call in calls.items()}
+            done, _ = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+            results = {}
+            for future, name in futures.items():
+                if future not in done:
+                    future.cancel()
+                    results[name] = {"ok": False, "error": f"prazo de {deadline_seconds:.1f}s excedido",
+                                     "seconds": time.monotonic() - started}
+                elif future.exception() is not None:
+                    results[name] = {"ok": False, "error": str(future.exception()),
+                                     "seconds": time.monotonic() - started}
+                else:
+                    results[name] = {"ok": True, "data": future.result(),
+                                     "seconds": time.monotonic() - started}
+            return results
+        finally:
+            # Não espera chamadas atrasadas: elas terminam sozinhas, limitadas pelo próprio deadline.
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _clip_timeout(timeout, deadline: float):
+    # Reduz o timeout de leitura para não ultrapassar o prazo total.
+    if deadline is None:
+        return timeout
+    remaining = max(0.05, deadline - time.monotonic())
+    if isinstance(timeout, tuple):
+        return (min(timeout[0], remaining), min(timeout[1], remaining))
+    return min(timeout, remaining)
+
+
+def _retry_after(response: requests.Response):
+    # Retry-After pode vir em segundos ou como data HTTP.
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Cliente compartilhado do processo (um único pool de conexões para todas as sessões)."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
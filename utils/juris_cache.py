@@ -0,0 +1,183 @@
+# utils/juris_cache.py
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from utils.text_processing import fold_accents
+
+# Resultado considerado atual por este tempo (segundos).
+DEFAULT_TTL_SECONDS = 3600
+# Depois do TTL, o resultado ainda é servido por este tempo enquanto é atualizado em segundo plano.
+DEFAULT_STALE_SECONDS = 24 * 3600
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+
+def search_key(search_term: str, area: str = None) -> tuple:
+    """
+    Chave da busca: o termo em minúsculas, sem acentos e com espaços normalizados, e a área.
+    "Danos  Morais" e "danos morais" compartilham a mesma entrada; stopwords e números são
+    mantidos, pois mudam a busca ("dano moral não configurado", "art. 5 CF").
+    """
+    term = " ".join(fold_accents(search_term or "").lower().split())
+    return (term, (area or "").strip().lower())
+
+
+class JurisCache:
+    """
+    Cache compartilhado de resultados de busca de jurisprudência.
+
+    - Resultado dentro do TTL: devolvido direto.
+    - Resultado vencido há menos de `stale_seconds`: devolvido na hora, e uma única atualização
+      roda em segundo plano (stale-while-revalidate).
+    - Sem resultado: buscas idênticas simultâneas esperam a mesma chamada (coalescência).
+
+    Limitado pelo número de entradas e pelo total de bytes (tamanho do JSON), com remoção LRU.
+    Resultados com "error" não são armazenados; resultados parciais ("fontes_com_erro") são
+    armazenados já vencidos, para que a próxima busca tente de novo as fontes que falharam.
+    """
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, stale_seconds: float = DEFAULT_STALE_SECONDS,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()  # chave -> (resultado, tamanho em bytes, instante do armazenamento)
+        self._bytes = 0
+        self._inflight = {}  # chave -> Future da busca em andamento
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Resultado para `key`, chamando `fetch()` só quando necessário (no máximo uma chamada
+        em andamento por chave). Exceções de `fetch` são propagadas a quem estiver esperando.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, _, stored_at = entry
+                age = time.monotonic() - stored_at
+                if age <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age <= self.ttl_seconds + self.stale_seconds:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._inflight:
+                        future = self._inflight[key] = Future()
+                        self.refreshes += 1
+                        threading.Thread(target=self._run, args=(key, fetch, future, True), daemon=True).start()
+                    return value
+            waiting = self._inflight.get(key)
+            if waiting is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+        if waiting is not None:
+            return waiting.result()
+        return self._run(key, fetch, future, False)
+
+    def _run(self, key, fetch, future: Future, background: bool):
+        try:
+            value = fetch()
+        except Exception as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+                if background:
+                    self.refresh_errors += 1
+            future.set_exception(e)
+            if background:
+                return None
+            raise
+        with self._lock:
+            self._inflight.pop(key, None)
+            if not (isinstance(value, dict) and value.get("error")):
+                self._store(key, value)
+            elif background:
+                # Atualização falhou: mantém o resultado antigo até vencer de vez.
+                self.refresh_errors += 1
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "refresh_errors": self.refresh_errors,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+            }
+
+    def _store(self, key, value) -> None:
+        # Deve ser chamado com o lock adquirido.
+        size = len(json.dumps(value, ensure_ascii=False, default=str).encode("utf-8"))
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        if size > self.max_bytes:
+            return
+        stored_at = time.monotonic()
+        if isinstance(value, dict) and value.get("fontes_com_erro"):
+            stored_at -= self.ttl_seconds
+        self._entries[key] = (value, size, stored_at)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted_size, _) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_juris_cache() -> JurisCache:
+    """
+    Cache compartilhado do processo (todas as sessões do Streamlit).
+
+    Configuração via variáveis de ambiente (ou .env):
+    - JURIS_CACHE_TTL_SECONDS: tempo em que o resultado é considerado atual (padrão 3600).
+    - JURIS_CACHE_STALE_SECONDS: tempo extra em que o resultado vencido é servido enquanto
+      é atualizado em segundo plano (padrão 86400; 0 desativa).
+    - JURIS_CACHE_MAX_ENTRIES / JURIS_CACHE_MAX_MB: limites de entradas e de tamanho.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = JurisCache(
+                ttl_seconds=float(os.getenv("JURIS_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                stale_seconds=float(os.getenv("JURIS_CACHE_STALE_SECONDS", DEFAULT_STALE_SECONDS)),
+                max_entries=int(os.getenv("JURIS_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+                max_bytes=int(float(os.getenv("JURIS_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024),
+            )
+        return _default_cache
@@ -0,0 +1,364 @@
+# utils/juris_index.py
+"""
+Índice local de ementas (SQLite FTS5), para buscas de jurisprudência sem chamada externa.
+
+Ingestão a partir de dumps JSONL (um acórdão por linha), incremental:
+    python -m utils.juris_index ingest dump1.jsonl dump2.jsonl --db dados/jurisprudencia.sqlite3
+
+Campos reconhecidos em cada linha: processo (obrigatório, chave única), ementa (obrigatório),
+relator, decisao, area, tribunal, data.
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+
+from utils.metrics import increment
+from utils.text_processing import fold_accents, tokenize
+
+FIELDS = ("processo", "relator", "ementa", "decisao", "area", "tribunal", "data")
+INGEST_BATCH_SIZE = 20000
+# Limite de candidatos ranqueados por busca. Quando todas as ementas que casam com a busca cabem
+# no limite, o ranking (BM25, com o IDF de todo o índice) é exato. Termos muito comuns ("danos
+# morais") casam com centenas de milhares de ementas: aí só as RANK_WINDOW ocorrências mais
+# recentes são ranqueadas, e uma ementa mais antiga, ainda que mais relevante, fica de fora.
+# Com 1 milhão de ementas, ranquear tudo pelo bm25() do FTS5 leva de 130 a 330 ms (mediana);
+# com o limite padrão, menos de 10 ms. JURIS_RANK_WINDOW=0 ranqueia todas as ocorrências.
+RANK_WINDOW = int(os.getenv("JURIS_RANK_WINDOW", 300))
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ementas (
+    id INTEGER PRIMARY KEY,
+    processo TEXT NOT NULL UNIQUE,
+    relator TEXT,
+    ementa TEXT NOT NULL,
+    decisao TEXT,
+    area TEXT,
+    tribunal TEXT,
+    data TEXT
+);
+-- Tabela FTS "external content": o texto fica só em 'ementas'; a FTS guarda o índice invertido.
+-- remove_diacritics 2 faz a busca ignorar acentos e cedilha ("acao" encontra "ação").
+-- A área também é indexada, para que o filtro por área seja feito dentro da própria FTS.
+CREATE VIRTUAL TABLE IF NOT EXISTS ementas_fts USING fts5(
+    ementa,
+    area,
+    content='ementas',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+-- Vocabulário da FTS: em quantas ementas cada termo aparece (usado no IDF do ranking).
+CREATE VIRTUAL TABLE IF NOT EXISTS ementas_vocab USING fts5vocab(ementas_fts, 'row');
+-- Cópia do vocabulário gravada por optimize(): a fts5vocab conta as ementas de um termo percorrendo
+-- a lista invertida inteira (dezenas de ms para termos comuns); aqui a consulta é pela chave.
+-- O termo '' (nunca gerado pelo tokenizador) guarda o número de ementas na hora da cópia.
+CREATE TABLE IF NOT EXISTS ementas_df (term TEXT PRIMARY KEY, doc INTEGER NOT NULL) WITHOUT ROWID;
+"""
+
+
+def _variants(token: str) -> tuple:
+    # Plural simples por formas exatas (prefixos como "dano"* são bem mais lentos na FTS5).
+    variants = [token]
+    if len(token) >= 5 and token.endswith("ais"):
+        variants += [token[:-3] + "al"]
+    elif len(token) >= 5 and token.endswith("s"):
+        variants += [token[:-1]]
+    elif len(token) >= 4:
+        variants += [token + "s"]
+    return tuple(variants)
+
+
+def parse_query_terms(search_term: str) -> list:
+    """
+    Termos da busca sem acentos e stopwords, cada um com suas variantes de número:
+    "danos morais" -> [("danos", "dano"), ("morais", "moral")].
+    """
+    return [_variants(token) for token in dict.fromkeys(tokenize(search_term))]
+
+
+def normalize_area(area: str) -> str:
+    """Área comparada como a FTS5 compara: sem diferença de maiúsculas e acentos ("civel" = "Cível")."""
+    return " ".join(fold_accents(area or "").lower().split())
+
+
+def build_match_query(terms: list, area: str = None, any_term: bool = False) -> str:
+    """Consulta FTS5 para os termos de `parse_query_terms`, restrita à área quando informada."""
+    if not terms:
+        return ""
+    groups = ["(" + " OR ".join(f'"{variant}"' for variant in variants) + ")" for variants in terms]
+    match = "ementa : (" + (" OR " if any_term else " AND ").join(groups) + ")"
+    if area:
+        match += ' AND area : "' + area.replace('"', '""') + '"'
+    return match
+
+
+def _fast_fold(text: str) -> str:
+    # Equivalente rápido de fold_accents(...).lower() para o ranking: descarta o que não é ASCII
+    # após a decomposição (acentos e cedilha), o que basta para contar os termos da busca.
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+
+
+class JurisIndex:
+    """Índice FTS5 de ementas. Uma conexão por thread (o Streamlit atende sessões em threads)."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+        self._total = None  # número de ementas, usado no IDF (contar a cada busca seria lento)
+        self._idf_cache = {}
+        self._df_complete = None  # ementas_df cobre todas as ementas (nada ingerido desde optimize())
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Leitura via mmap e cache maior: as páginas do índice invertido ficam na memória do SO.
+            conn.execute("PRAGMA mmap_size=1073741824")
+            conn.execute("PRAGMA cache_size=-65536")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM ementas").fetchone()[0]
+
+    def ingest(self, records, batch_size: int = INGEST_BATCH_SIZE) -> dict:
+        """
+        Insere registros (dicts) em lotes. Processos já indexados são ignorados, o que torna
+        a ingestão incremental: reprocessar um dump só acrescenta o que é novo.
+        """
+        conn = self._conn()
+        inserted = skipped = 0
+        batch = []
+
+        def flush():
+            nonlocal inserted, skipped
+            with conn:
+                last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM ementas").fetchone()[0]
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO ementas (processo, relator, ementa, decisao, area, tribunal, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+                new_rows = conn.total_changes - before
+                # Novos registros recebem ids maiores que o último existente.
+                conn.execute(
+                    "INSERT INTO ementas_fts (rowid, ementa, area) "
+                    "SELECT id, ementa, COALESCE(area, '') FROM ementas WHERE id > ?",
+                    (last_id,),
+                )
+            inserted += new_rows
+            skipped += len(batch) - new_rows
+            batch.clear()
+
+        for record in records:
+            if not record.get("processo") or not record.get("ementa"):
+                skipped += 1
+                continue
+            batch.append(tuple(record.get(field) for field in FIELDS))
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        self._total = None
+        self._idf_cache = {}
+        self._df_complete = None
+        return {"inserted": inserted, "skipped": skipped}
+
+    def ingest_jsonl(self, path: str, batch_size: int = INGEST_BATCH_SIZE) -> dict:
+        """Ingestão de um dump JSONL, lido em streaming (o arquivo não é carregado inteiro)."""
+        def records():
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        return self.ingest(records(), batch_size)
+
+    def optimize(self) -> None:
+        """
+        Compacta o índice invertido e grava a frequência de cada termo usada no ranking
+        (recomendado após grandes ingestões).
+        """
+        with self._conn() as conn:
+            conn.execute("INSERT INTO ementas_fts (ementas_fts) VALUES ('optimize')")
+            conn.execute("DELETE FROM ementas_df")
+            conn.execute("INSERT INTO ementas_df (term, doc) SELECT term, doc FROM ementas_vocab")
+            conn.execute("INSERT INTO ementas_df (term, doc) SELECT '', COUNT(*) FROM ementas")
+        self._total = None
+        self._idf_cache = {}
+        self._df_complete = None
+
+    def search(self, search_term: str, area: str = None, limit: int = 3) -> list:
+        """
+        Busca ementas que contenham todos os termos; se nenhuma contiver, aceita qualquer termo.
+        Resultados ordenados por relevância (BM25) e filtrados pela área quando informada.
+        Se houver mais de RANK_WINDOW ocorrências, só as mais recentes são ranqueadas.
+        """
+        terms = parse_query_terms(search_term)
+        if not terms:
+            return []
+        for any_term in (False, True):
+            match = build_match_query(terms, area, any_term)
+            if RANK_WINDOW > 0:
+                candidates = self._conn().execute(
+                    "SELECT e.processo, e.relator, e.ementa, e.decisao, e.area, e.tribunal, e.data "
+                    "FROM ementas e JOIN (SELECT rowid FROM ementas_fts WHERE ementas_fts MATCH ? "
+                    "ORDER BY rowid DESC LIMIT ?) AS hits ON e.id = hits.rowid ORDER BY e.id DESC",
+                    (match, RANK_WINDOW + 1),
+                ).fetchall()
+                if len(candidates) > RANK_WINDOW:
+                    # Há mais ocorrências do que o limite: ranking parcial (ver RANK_WINDOW).
+                    candidates = candidates[:RANK_WINDOW]
+                    increment("juris_rank_truncated")
+                ranked = self._rank(candidates, terms)[:limit] if candidates else []
+            else:
+                # Peso 0 na coluna `area`: o filtro por área não altera a relevância.
+                ranked = self._conn().execute(
+                    "SELECT e.processo, e.relator, e.ementa, e.decisao, e.area, e.tribunal, e.data "
+                    "FROM ementas_fts f JOIN ementas e ON e.id = f.rowid WHERE ementas_fts MATCH ? "
+                    "ORDER BY bm25(ementas_fts, 1.0, 0.0), e.id DESC LIMIT ?",
+                    (match, limit),
+                ).fetchall()
+            if ranked:
+                return [{key: row[key] for key in row.keys() if row[key] is not None} for row in ranked]
+        return []
+
+    def iter_ementas(self, batch_size: int = INGEST_BATCH_SIZE):
+        """Percorre (id, ementa, area) em ordem de id, em lotes (sem carregar a tabela inteira)."""
+        last_id = 0
+        while True:
+            rows = self._conn().execute(
+                "SELECT id, ementa, area FROM ementas WHERE id > ? ORDER BY id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield row["id"], row["ementa"], row["area"]
+            last_id = rows[-1]["id"]
+
+    def get_by_ids(self, ids: list) -> list:
+        """Registros dos ids informados, na mesma ordem (ids inexistentes são ignorados)."""
+        if not ids:
+            return []
+        placeholders = ", ".join("?" * len(ids))
+        rows = self._conn().execute(
+            "SELECT id, processo, relator, ementa, decisao, area, tribunal, data "
+            f"FROM ementas WHERE id IN ({placeholders})",
+            [int(i) for i in ids],
+        ).fetchall()
+        by_id = {row["id"]: {key: row[key] for key in row.keys() if key != "id" and row[key] is not None}
+                 for row in rows}
+        return [by_id[int(i)] for i in ids if int(i) in by_id]
+
+    def _idf(self, variants: tuple) -> float:
+        # Documentos com alguma das variantes (soma aproximada), lido da tabela gravada por
+        # optimize() e guardado até a próxima ingestão. Se houve ingestão depois do último
+        # optimize(), termos ausentes da tabela são contados no vocabulário da FTS (bem mais lento).
+        idf = self._idf_cache.get(variants)
+        if idf is None:
+            conn = self._conn()
+            if self._total is None:
+                self._total = self.count()
+            if self._df_complete is None:
+                copied = conn.execute("SELECT doc FROM ementas_df WHERE term = ''").fetchone()
+                self._df_complete = copied is not None and copied[0] == self._total
+            placeholders = ", ".join("?" * len(variants))
+            found = dict(conn.execute(
+                f"SELECT term, doc FROM ementas_df WHERE term IN ({placeholders})", variants,
+            ).fetchall())
+            missing = [variant for variant in variants if variant not in found]
+            docs = sum(found.values())
+            if missing and not self._df_complete:
+                placeholders = ", ".join("?" * len(missing))
+                docs += conn.execute(
+                    f"SELECT COALESCE(SUM(doc), 0) FROM ementas_vocab WHERE term IN ({placeholders})",
+                    missing,
+                ).fetchone()[0]
+            total = self._total or 1
+            idf = math.log(1 + (total - docs + 0.5) / (docs + 0.5))
+            self._idf_cache[variants] = idf
+        return idf
+
+    def _rank(self, rows: list, terms: list) -> list:
+        # BM25 sobre os candidatos, contando as variantes de cada termo no texto sem acentos.
+        patterns = [
+            (re.compile(r"\b(?:" + "|".join(map(re.escape, variants)) + r")\b"), self._idf(variants))
+            for variants in terms
+        ]
+        texts = [_fast_fold(row["ementa"]) for row in rows]
+        lengths = [text.count(" ") + 1 for text in texts]
+        avg_length = sum(lengths) / len(lengths)
+        scores = []
+        for text, length in zip(texts, lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / avg_length)
+            score = 0.0
+            for pattern, idf in patterns:
+                freq = len(pattern.findall(text))
+                if freq:
+                    score += idf * freq * (BM25_K1 + 1) / (freq + norm)
+            scores.append(score)
+        # Empates: a mais recente primeiro (as linhas já vêm da mais recente para a mais antiga).
+        order = sorted(range(len(rows)), key=lambda i: -scores[i])
+        return [rows[i] for i in order]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_juris_index(path: str = None):
+    """
+    Índice local configurado em JURIS_INDEX_PATH, ou None se não houver (ou o arquivo não existir).
+    """
+    path = path or os.getenv("JURIS_INDEX_PATH")
+    if not path or not os.path.exists(path):
+        return None
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = JurisIndex(path)
+        return _indexes[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice local de jurisprudência (SQLite FTS5)")
+    parser.add_argument("--db", default=os.getenv("JURIS_INDEX_PATH", "jurisprudencia.sqlite3"))
+    sub = parser.add_subparsers(dest="command", required=True)
+    ingest = sub.add_parser("ingest", help="ingere um ou mais dumps JSONL")
+    ingest.add_argument("files", nargs="+")
+    search = sub.add_parser("search", help="busca de teste")
+    search.add_argument("term")
+    search.add_argument("--area")
+    search.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args()
+
+    index = JurisIndex(args.db)
+    if args.command == "ingest":
+        for path in args.files:
+            start = time.perf_counter()
+            result = index.ingest_jsonl(path)
+            print(f"{path}: {result['inserted']} inseridos, {result['skipped']} ignorados "
+                  f"em {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        index.optimize()
+        print(f"Total no índice: {index.count()}", file=sys.stderr)
+    else:
+        start = time.perf_counter()
+        results = index.search(args.term, args.area, args.limit)
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        print(f"{(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+# utils/juris_similarity.py
+"""
+Busca de precedentes por similaridade de texto, sem modelo externo.
+
+Cada ementa vira um vetor TF-IDF "hasheado" (termos e pares de termos projetados, com sinal,
+em JURIS_VECTOR_DIM dimensões), normalizado para que o produto escalar seja o cosseno.
+Os vetores ficam numa matriz NumPy em disco, aberta via memmap: o app sobe sem carregá-la,
+e o sistema operacional mantém em memória só as páginas usadas.
+
+Construção (refazer após novas ingestões no índice):
+    python -m utils.juris_similarity build --db dados/jurisprudencia.sqlite3
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import sys
+import threading
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+from utils.juris_index import JurisIndex, get_juris_index, normalize_area
+from utils.text_processing import tokenize
+
+VECTOR_DIM = int(os.getenv("JURIS_VECTOR_DIM", 256))
+# Espaço de hash dos termos para as frequências de documento (IDF): 2^20 posições.
+IDF_BUCKETS = 1 << 20
+# Linhas da matriz processadas por vez (na construção e nas buscas).
+BLOCK_ROWS = 65536
+# Número máximo de termos considerados por texto (documentos enviados podem ser enormes).
+MAX_FEATURES_TEXT_CHARS = 200_000
+
+def _bucket(feature: str) -> int:
+    # crc32 é estável entre processos (ao contrário de hash(), que muda a cada execução).
+    # Sem cache: o hash é barato, e um dicionário de termos cresceria com o processo do app.
+    return zlib.crc32(feature.encode("utf-8"))
+
+
+def _singular(token: str) -> str:
+    # Plural simples -> singular, para que "danos morais" e "dano moral" gerem os mesmos termos.
+    if len(token) >= 5:
+        if token.endswith(("oes", "aes")):
+            return token[:-3] + "ao"
+        if token.endswith("ais"):
+            return token[:-3] + "al"
+        if token.endswith("eis"):
+            return token[:-3] + "el"
+    if len(token) >= 4 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def text_features(text: str) -> Counter:
+    """Termos normalizados (no singular) e pares de termos consecutivos, com suas frequências."""
+    tokens = [_singular(token) for token in tokenize(text[:MAX_FEATURES_TEXT_CHARS])]
+    features = Counter(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    return features
+
+
+def _hashed_features(text: str):
+    # (hashes, pesos tf sublineares) dos termos do texto.
+    features = text_features(text)
+    if not features:
+        return np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.float32)
+    hashes = np.fromiter((_bucket(f) for f in features), dtype=np.uint32, count=len(features))
+    tf = np.fromiter((1.0 + math.log(c) for c in features.values()), dtype=np.float32, count=len(features))
+    return hashes, tf
+
+
+def _project(hashes: np.ndarray, weights: np.ndarray, dim: int):
+    # Posição na matriz densa e sinal (+1/-1) do termo, ambos derivados do mesmo hash.
+    columns = (hashes % dim).astype(np.int64)
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0).astype(np.float32)
+    return columns, weights * signs
+
+
+class SimilarityIndex:
+    """Matriz de vetores (memmap) das ementas de um JurisIndex, com busca top-k em lote."""
+
+    def __init__(self, directory: str, index: JurisIndex = None):
+        self.directory = Path(directory)
+        meta = json.loads((self.directory / "meta.json").read_text(encoding="utf-8"))
+        self.dim = meta["dim"]
+        self.count = meta["count"]
+        self.areas = meta["areas"]
+        self.index = index
+        # Cada construção grava os arquivos num subdiretório próprio, indicado no meta.json
+        # (versões anteriores gravavam direto em `directory`).
+        data_dir = self.directory / meta.get("generation", "")
+        if self.count:
+            self.vectors = np.memmap(data_dir / "vectors.f32", dtype=np.float32, mode="r",
+                                     shape=(self.count, self.dim))
+        else:
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self.ids = np.load(data_dir / "ids.npy", mmap_mode="r")
+        self.area_codes = np.load(data_dir / "areas.npy", mmap_mode="r")
+        self.idf = np.load(data_dir / "idf.npy", mmap_mode="r")
+
+    def embed(self, texts: list) -> np.ndarray:
+        """Vetores normalizados dos textos (uma linha por texto), no mesmo espaço das ementas."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            hashes, tf = _hashed_features(text)
+            if not len(hashes):
+                continue
+            columns, values = _project(hashes, tf * self.idf[hashes % IDF_BUCKETS], self.dim)
+            np.add.at(matrix[row], columns, values)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def top_k(self, queries: np.ndarray, k: int = 3, area: str = None):
+        """
+        Para cada vetor de consulta, os k vizinhos mais próximos: (índices das linhas, similaridades).
+        Todas as consultas são resolvidas juntas, bloco a bloco (uma multiplicação matricial por bloco).
+        """
+        m = len(queries)
+        best_rows = np.full((m, 0), -1, dtype=np.int64)
+        best_scores = np.full((m, 0), -np.inf, dtype=np.float32)
+        area_codes = None
+        if area:
+            wanted = normalize_area(area)
+            area_codes = [code for code, name in enumerate(self.areas) if normalize_area(name) == wanted]
+            if not area_codes:
+                return np.empty((m, 0), dtype=np.int64), np.empty((m, 0), dtype=np.float32)
+
+        for start in range(0, self.count, BLOCK_ROWS):
+            block = self.vectors[start:start + BLOCK_ROWS]
+            scores = queries @ block.T
+            if area_codes is not None:
+                scores[:, ~np.isin(self.area_codes[start:start + BLOCK_ROWS], area_codes)] = -np.inf
+            take = min(k, scores.shape[1])
+            part = np.argpartition(-scores, take - 1, axis=1)[:, :take]
+            best_rows = np.concatenate([best_rows, part + start], axis=1)
+            best_scores = np.concatenate([best_scores, np.take_along_axis(scores, part, axis=1)], axis=1)
+            if best_rows.shape[1] > k:
+                keep = np.argpartition(-best_scores, k - 1, axis=1)[:, :k]
+                best_rows = np.take_along_axis(best_rows, keep, axis=1)
+                best_scores = np.take_along_axis(best_scores, keep, axis=1)
+
+        order = np.argsort(-best_scores, axis=1)
+        return np.take_along_axis(best_rows, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+    def search_many(self, texts: list, k: int = 3, area: str = None) -> list:
+        """Precedentes mais semelhantes a cada texto: lista (por texto) de registros com 'similaridade'."""
+        rows, scores = self.top_k(self.embed(texts), k, area)
+        results = []
+        for query_rows, query_scores in zip(rows, scores):
+            hits = [(int(self.ids[r]), float(s)) for r, s in zip(query_rows, query_scores) if s > 0]
+            records = self.index.get_by_ids([i for i, _ in hits]) if self.index else [{"id": i} for i, _ in hits]
+            results.append([dict(record, similaridade=round(s, 4)) for record, (_, s) in zip(records, hits)])
+        return results
+
+    def search(self, text: str, k: int = 3, area: str = None) -> list:
+        return self.search_many([text], k, area)[0]
+
+
+def build_vectors(index: JurisIndex, directory: str, dim: int = VECTOR_DIM) -> dict:
+    """
+    Gera a matriz de vetores de todas as ementas do índice.
+
+    Duas passadas: a primeira conta em quantas ementas cada termo aparece (IDF); a segunda
+    grava os vetores, bloco a bloco, direto no memmap. Os arquivos vão para um subdiretório novo,
+    e a troca é feita ao final substituindo o meta.json de uma vez (os.replace): quem abrir o
+    índice durante a construção lê o meta.json anterior, com os arquivos que ele aponta.
+    """
+    directory = Path(directory)
+    generation = f"v{time.time_ns()}"
+    data_dir = directory / generation
+    data_dir.mkdir(parents=True)
+    count = index.count()
+
+    doc_freq = np.zeros(IDF_BUCKETS, dtype=np.int64)
+    for _, ementa, _ in index.iter_ementas():
+        hashes, _ = _hashed_features(ementa)
+        doc_freq[np.unique(hashes % IDF_BUCKETS)] += 1
+    idf = np.log(1 + (count - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+
+    vectors = np.memmap(data_dir / "vectors.f32", dtype=np.float32, mode="w+", shape=(max(count, 1), dim))
+    ids = np.zeros(count, dtype=np.int64)
+    area_codes = np.zeros(count, dtype=np.int16)
+    areas = []
+    row = 0
+    batch_rows, batch_columns, batch_values = [], [], []
+
+    def flush(first_row, last_row):
+        # Soma todos os termos do bloco de uma vez (bincount), normaliza e grava no memmap.
+        size = last_row - first_row
+        flat = np.concatenate(batch_rows) * dim + np.concatenate(batch_columns)
+        block = np.bincount(flat, weights=np.concatenate(batch_values), minlength=size * dim)
+        block = block.reshape(size, dim).astype(np.float32)
+        block /= np.maximum(np.linalg.norm(block, axis=1, keepdims=True), 1e-12)
+        vectors[first_row:last_row] = block
+        batch_rows.clear()
+        batch_columns.clear()
+        batch_values.clear()
+
+    block_start = 0
+    for ementa_id, ementa, area in index.iter_ementas():
+        if row >= count:
+            break  # ementas ingeridas durante a construção ficam para a próxima
+        hashes, tf = _hashed_features(ementa)
+        columns, values = _project(hashes, tf * idf[hashes % IDF_BUCKETS], dim)
+        batch_rows.append(np.full(len(columns), row - block_start, dtype=np.int64))
+        batch_columns.append(columns)
+        batch_values.append(values)
+        ids[row] = ementa_id
+        area = area or ""
+        if area not in areas:
+            areas.append(area)
+        area_codes[row] = areas.index(area)
+        row += 1
+        if row - block_start >= BLOCK_ROWS:
+            flush(block_start, row)
+            block_start = row
+    if row > block_start:
+        flush(block_start, row)
+    vectors.flush()
+    del vectors
+
+    for name, array in (("ids.npy", ids[:row]), ("areas.npy", area_codes[:row]), ("idf.npy", idf)):
+        np.save(data_dir / name, array)
+
+    previous = _current_generation(directory)
+    meta = {"dim": dim, "count": row, "areas": areas, "built_at": time.time(), "generation": generation}
+    (directory / "meta.json.tmp").write_text(json.dumps(meta, ensure_ascii=False), encoding="utf-8")
+    os.replace(directory / "meta.json.tmp", directory / "meta.json")
+
+    # A geração anterior fica para quem leu o meta.json antigo e ainda vai abrir os arquivos;
+    # as mais antigas (e os arquivos do formato sem gerações) são removidas.
+    for path in directory.iterdir():
+        if path.is_dir() and path.name.startswith("v") and path.name not in (generation, previous):
+            shutil.rmtree(path, ignore_errors=True)
+        elif path.name in ("vectors.f32", "ids.npy", "areas.npy", "idf.npy") and previous:
+            path.unlink(missing_ok=True)
+    return meta
+
+
+def _current_generation(directory: Path):
+    # Subdiretório apontado pelo meta.json atual ("" no formato antigo, None se não houver índice).
+    try:
+        return json.loads((directory / "meta.json").read_text(encoding="utf-8")).get("generation", "")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def default_vectors_dir(index_path: str = None):
+    """JURIS_VECTORS_DIR, ou "<JURIS_INDEX_PATH>.vectors" ao lado do índice local."""
+    index_path = index_path or os.getenv("JURIS_INDEX_PATH")
+    return os.getenv("JURIS_VECTORS_DIR") or (f"{index_path}.vectors" if index_path else None)
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_similarity_index(directory: str = None):
+    """Índice de similaridade configurado, ou None se os vetores ainda não foram gerados."""
+    directory = directory or default_vectors_dir()
+    if not directory or not os.path.exists(os.path.join(directory, "meta.json")):
+        return None
+    with _engines_lock:
+        engine = _engines.get(directory)
+        built_at = os.path.getmtime(os.path.join(directory, "meta.json"))
+        # Recarrega quando os vetores são reconstruídos com o app no ar.
+        if engine is None or engine[0] != built_at:
+            engine = _engines[directory] = (built_at, SimilarityIndex(directory, get_juris_index()))
+        return engine[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Busca de jurisprudência por similaridade")
+    parser.add_argument("--db", default=os.getenv("JURIS_INDEX_PATH", "jurisprudencia.sqlite3"))
+    parser.add_argument("--dir", help="diretório dos vetores (padrão: <db>.vectors)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="gera os vetores de todas as ementas do índice")
+    build.add_argument("--dim", type=int, default=VECTOR_DIM)
+    search = sub.add_parser("search", help="busca de teste")
+    search.add_argument("text")
+    search.add_argument("--area")
+    search.add_argument("--limit", type=int, default=3)
+    args = parser.parse_args()
+
+    index = JurisIndex(args.db)
+    directory = args.dir or default_vectors_dir(args.db)
+    if args.command == "build":
+        start = time.perf_counter()
+        meta = build_vectors(index, directory, args.dim)
+        print(f"{meta['count']} vetores ({meta['dim']} dimensões) em {time.perf_counter() - start:.1f}s",
+              file=sys.stderr)
+    else:
+        engine = SimilarityIndex(directory, index)
+        start = time.perf_counter()
+        results = engine.search(args.text, args.limit, args.area)
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        print(f"{(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,8 +2,15 @@
 
 import requests
 import json
+import logging
+import time
 import os # Importar para usar os.getenv para chaves de APIs externas
 
+from utils.http_client import get_http_client
+from utils.juris_cache import get_juris_cache, search_key
+from utils.juris_index import get_juris_index
+from utils.metrics import log_event, observe, timer
+
 # ⚠️ IMPORTANTE: URL de API Real para BUSCA GERAL e ATUALIZADA.
 # Para uma busca GERAL ROBUSTA E COM EMENTAS COMPLETAS DE TODOS OS TJs,
 # uma API PAGA de Lawtech (como Jusbrasil API, Legal One, etc.) é ALTAMENTE RECOMENDADA.
@@ -18,8 +25,132 @@ import os # Importar para usar os.getenv para chaves de APIs externas
 # Ele serve apenas para indicar onde você colocaria a URL de uma API real no futuro.
 URL_API_REAL_PARA_FUTURO = "https://api.sua-api-juridica-geral-real.com/v1/busca"
 
+# Fontes reais de jurisprudência, consultadas em paralelo quando configuradas.
+# JURIS_SOURCES aceita uma lista JSON (ou o caminho de um arquivo .json com a lista), ex:
+# [{"nome": "TJSP", "url": "https://.../busca", "timeout": 5}, {"nome": "DataJud", "url": "https://..."}]
+# Cada fonte recebe os parâmetros "query", "limit" e "domain" (área).
+# JURIS_DEADLINE_SECONDS limita o tempo total da busca; fontes atrasadas são ignoradas.
+JURIS_DEADLINE_SECONDS = float(os.getenv("JURIS_DEADLINE_SECONDS", 8))
+JURIS_RESULTS_PER_SOURCE = 3
+
+
+def _configured_sources() -> list:
+    raw = os.getenv("JURIS_SOURCES", "").strip()
+    if not raw:
+        return []
+    if not raw.startswith("["):
+        with open(raw, encoding="utf-8") as f:
+            raw = f.read()
+    return json.loads(raw)
+
+
+def _parse_source_results(data: dict, source_name: str) -> list:
+    """Mapeia a resposta de uma fonte para o formato do app ('processo', 'relator', 'ementa', 'decisao')."""
+    if isinstance(data.get("resultados"), list):
+        # A fonte já responde no formato do app.
+        return [dict(item, fonte=item.get("fonte", source_name)) for item in data["resultados"]]
+    processed_results = []
+    for doc in data.get("data", {}).get("jurisprudences", []):
+        processed_results.append({
+            "processo": doc.get("numero_processo_completo", "N/A"),
+            "relator": doc.get("nome_do_relator", "N/A"),
+            "ementa": doc.get("texto_da_ementa_completa", "N/A"),
+            "decisao": doc.get("tipo_da_decisao_final", "N/A"),
+            "fonte": source_name,
+        })
+    return processed_results
+
+
+def _fetch_from_sources(sources: list, search_term: str, area: str = None) -> dict:
+    """Consulta todas as fontes em paralelo, com prazo total, e junta os resultados parciais."""
+    client = get_http_client()
+    external_api_key = os.getenv("EXTERNAL_LEGAL_API_KEY")
+    headers = {"Authorization": f"Bearer {external_api_key}"} if external_api_key else {}
+    params = {"query": search_term, "limit": JURIS_RESULTS_PER_SOURCE}
+    if area:
+        params["domain"] = area
 
-def fetch_jurisprudence(search_term: str, area: str = None) -> dict:
+    def make_call(source):
+        def call(deadline):
+            # Prazo da fonte: o menor entre o prazo total e o "timeout" próprio da fonte, se houver.
+            if source.get("timeout"):
+                deadline = min(deadline, time.monotonic() + float(source["timeout"]))
+            data = client.get_json(source["url"], deadline=deadline, headers=headers, params=params)
+            return _parse_source_results(data, source["nome"])
+        return call
+
+    outcomes = client.fan_out(
+        {source["nome"]: make_call(source) for source in sources},
+        deadline_seconds=JURIS_DEADLINE_SECONDS,
+    )
+    resultados = []
+    fontes_com_erro = {}
+    for nome, outcome in outcomes.items():
+        observe("juris_source_seconds", outcome["seconds"], fonte=nome, status="ok" if outcome["ok"] else "erro")
+        if outcome["ok"]:
+            resultados.extend(outcome["data"])
+        else:
+            fontes_com_erro[nome] = outcome["error"]
+            log_event("juris_source_error", level=logging.WARNING, fonte=nome, erro=outcome["error"])
+
+    if fontes_com_erro and not resultados:
+        return {"error": f"Nenhuma fonte respondeu: {fontes_com_erro}", "resultados": []}
+    return {
+        "termo": search_term,
+        "area": area,
+        "resultados": resultados,
+        "fontes_com_erro": fontes_com_erro,
+    }
+
+
+def fetch_jurisprudence(search_term: str, area: str = None, use_cache: bool = True) -> dict:
+    """
+    Busca jurisprudência, com cache compartilhado por termo normalizado e área (ver
+    utils/juris_cache.py): buscas repetidas voltam na hora e buscas idênticas simultâneas
+    fazem uma única consulta às fontes. `use_cache=False` força a consulta.
+    """
+    with timer("juris_search", cache="usado" if use_cache else "desligado") as measured:
+        if not use_cache:
+            results = _fetch_jurisprudence_uncached(search_term, area)
+        else:
+            results = get_juris_cache().get_or_fetch(
+                search_key(search_term, area),
+                lambda: _fetch_jurisprudence_uncached(search_term, area),
+            )
+        measured.set(area=area, resultados=len(results.get("resultados", [])), erro=bool(results.get("error")))
+    return results
+
+
+def fetch_similar_jurisprudence(text: str, area: str = None, limit: int = JURIS_RESULTS_PER_SOURCE) -> dict:
+    """
+    Precedentes mais semelhantes a um texto (termo de busca ou o próprio documento enviado),
+    pelo índice de similaridade local (ver utils/juris_similarity.py). Encontra ementas com
+    redação diferente da consulta, que a busca por palavras-chave não traz.
+
+    Retorna o mesmo formato de `fetch_jurisprudence`, com a "similaridade" (0 a 1) de cada resultado.
+    """
+    # Importado aqui: NumPy só é carregado quando a busca por similaridade é usada.
+    from utils.juris_similarity import get_similarity_index
+
+    engine = get_similarity_index()
+    if engine is None:
+        return {"error": "Índice de similaridade não configurado (gere com 'python -m utils.juris_similarity build').",
+                "resultados": []}
+    try:
+        with timer("juris_similarity") as measured:
+            resultados = engine.search(text, limit, area)
+            measured.set(area=area, consulta_caracteres=len(text), resultados=len(resultados))
+    except Exception as e:
+        log_event("juris_similarity_error", level=logging.WARNING, erro=str(e))
+        return {"error": f"Erro na busca por similaridade: {e}", "resultados": []}
+    return {
+        "termo": text[:200],
+        "area": area,
+        "resultados": [dict(item, fonte="similaridade local") for item in resultados],
+    }
+
+
+def _fetch_jurisprudence_uncached(search_term: str, area: str = None) -> dict:
     """
     Busca jurisprudência (simulada por enquanto) que representaria uma busca geral e atualizada.
 
@@ -32,9 +163,28 @@ def fetch_jurisprudence(search_term: str, area: str = None) -> dict:
         dict: Um dicionário contendo os resultados da jurisprudência simulada, formatados para o app.
               Retorna {"error": "mensagem de erro", "resultados": []} em caso de falha.
     """
-    print(f"DEBUG: Buscando jurisprudência GERAL e ATUAL (simulado) para '{search_term}' na área '{area}'...")
-
     try:
+        # Índice local (JURIS_INDEX_PATH, ver utils/juris_index.py): busca offline em milissegundos.
+        # Sem resultados no índice, segue para as fontes remotas ou o mock.
+        index = get_juris_index()
+        if index is not None:
+            with timer("juris_lookup", origem="indice_local") as measured:
+                resultados = index.search(search_term, area, limit=JURIS_RESULTS_PER_SOURCE)
+                measured.set(resultados=len(resultados))
+            if resultados:
+                return {
+                    "termo": search_term,
+                    "area": area,
+                    "resultados": [dict(item, fonte="índice local") for item in resultados],
+                }
+
+        # Fontes reais configuradas (JURIS_SOURCES): consulta paralela com pool de conexões,
+        # novas tentativas e prazo por fonte. Sem configuração, segue para o mock abaixo.
+        sources = _configured_sources()
+        if sources:
+            with timer("juris_lookup", origem="fontes"):
+                return _fetch_from_sources(sources, search_term, area)
+
         # --- LÓGICA DE CHAMADA À API REAL ---
         # ⚠️ PASSO 1: OBTENHA UMA CHAVE DE API, SE A API REAL EXIGIR.
         # Configure-a como 'EXTERNAL_LEGAL_API_KEY' no Streamlit Secrets (Cloud) ou no seu .env (local).
@@ -61,6 +211,7 @@ def fetch_jurisprudence(search_term: str, area: str = None) -> dict:
 
         # --- CÓDIGO TEMPORÁRIO: MOCK DE RESPOSTA PARA BUSCA GERAL E ATUALIZADA ---
         # Este mock simula resultados de diferentes TJs e com datas mais recentes.
+        log_event("juris_lookup", origem="simulado", termo=search_term, area=area)
         mock_data = {
             "termo": search_term,
             "area": area,
@@ -123,11 +274,11 @@ def fetch_jurisprudence(search_term: str, area: str = None) -> dict:
         # ----------------------------------------------------------------------
 
     except requests.exceptions.RequestException as e:
-        print(f"ERRO: Erro de conexão ou requisição com a API jurídica externa: {e}")
+        log_event("juris_error", level=logging.WARNING, tipo="conexao", erro=str(e))
         return {"error": f"Erro de conexão com a API jurídica: {e}", "resultados": []}
     except json.JSONDecodeError:
-        print(f"ERRO: Resposta inválida da API (não é JSON).")
+        log_event("juris_error", level=logging.WARNING, tipo="json_invalido")
         return {"error": "Resposta da API não é um JSON válido.", "resultados": []}
     except Exception as e:
-        print(f"ERRO: Ocorreu um erro inesperado na busca de jurisprudência: {e}")
+        log_event("juris_error", level=logging.WARNING, tipo="inesperado", erro=str(e))
         return {"error": f"Erro inesperado: {e}", "resultados": []}
@@ -0,0 +1,245 @@
+# utils/metrics.py
+"""
+Instrumentação leve: tempos por etapa, contadores (ex: tokens) e logs estruturados em JSON.
+
+    with timer("parse", formato="pdf"):
+        ...
+    increment("llm_tokens", 1200, tipo="prompt")
+    log_event("juris_source_error", fonte="TJSP", erro="timeout")
+
+Os tempos ficam em histogramas no próprio processo (p50/p95/p99 sobre as amostras mais
+recentes) e podem ser exportados no formato texto do Prometheus (`prometheus_text`).
+
+Configuração via variáveis de ambiente (ou .env):
+- METRICS_ENABLED: "0" desliga tudo; `timer` passa a devolver um contexto vazio (padrão "1").
+- METRICS_LOG_JSON: "1" escreve os eventos como JSON, um por linha, em stderr (padrão "0").
+  Os eventos sempre passam pelo logger "assistente.metrics", que pode ser configurado à parte.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+# Amostras mantidas por série para o cálculo dos percentis.
+HISTOGRAM_SAMPLES = 2048
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "assistente_"
+
+logger = logging.getLogger("assistente.metrics")
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "samples")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=HISTOGRAM_SAMPLES)
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def quantiles(self) -> dict:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+# Nomes usados pelo próprio evento do timer; não podem ser campos extras de `set()`.
+_RESERVED_FIELDS = frozenset({"event", "level", "seconds", "status"})
+
+
+class _Timer:
+    """Mede o bloco e registra em `<nome>_seconds`, com o status "ok" ou "erro"."""
+
+    __slots__ = ("registry", "name", "labels", "fields", "start")
+
+    def __init__(self, registry, name: str, labels: dict):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.fields = {}
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        status = "ok" if exc_type is None else "erro"
+        self.registry.observe(f"{self.name}_seconds", seconds, **{**self.labels, "status": status})
+        # Um só dicionário: campos com o nome de um rótulo o substituem no log, e `seconds` e
+        # `status` são sempre os medidos aqui (sem "multiple values for keyword argument").
+        fields = {**self.labels, **self.fields, "seconds": round(seconds, 6), "status": status}
+        self.registry.log_event(self.name, **fields)
+        return False
+
+    def set(self, **fields) -> None:
+        """Campos extras para o log do evento (ex: páginas, tamanho do prompt)."""
+        reserved = _RESERVED_FIELDS.intersection(fields)
+        if reserved:
+            raise ValueError(f"Campos reservados do evento: {', '.join(sorted(reserved))}")
+        self.fields.update(fields)
+
+
+class _NullTimer:
+    """Usado quando as métricas estão desligadas: não mede nem registra nada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **fields) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Histogramas e contadores do processo, seguros para uso por várias threads."""
+
+    def __init__(self, enabled: bool = True, log_json: bool = False):
+        self.enabled = enabled
+        self._histograms = {}  # (nome, rótulos ordenados) -> _Histogram
+        self._counters = {}  # (nome, rótulos ordenados) -> valor
+        self._lock = threading.Lock()
+        if log_json and not any(getattr(h, "_metrics_json", False) for h in logger.handlers):
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            handler._metrics_json = True
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+
+    def timer(self, name: str, **labels):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram()
+            histogram.add(value)
+
+    def increment(self, name: str, amount: float = 1, **labels) -> None:
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def log_event(self, event: str, level: int = logging.INFO, **fields) -> None:
+        """Evento estruturado: uma linha JSON com o nome do evento, o horário e os campos."""
+        if not self.enabled or not logger.isEnabledFor(level):
+            return
+        record = {"ts": round(time.time(), 3), "event": event}
+        record.update(fields)
+        logger.log(level, json.dumps(record, ensure_ascii=False, default=str))
+
+    def snapshot(self) -> dict:
+        """Resumo para exibição: por série, contagem, soma e percentis; e os contadores."""
+        with self._lock:
+            histograms = {key: (h.count, h.total, h.quantiles()) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        return {
+            "histogramas": [
+                {"nome": name, **dict(labels), "n": count, "soma": round(total, 6),
+                 **{f"p{int(q * 100)}": round(value, 6) for q, value in quantiles.items()}}
+                for (name, labels), (count, total, quantiles) in sorted(histograms.items())
+            ],
+            "contadores": [
+                {"nome": name, **dict(labels), "valor": value}
+                for (name, labels), value in sorted(counters.items())
+            ],
+        }
+
+    def prometheus_text(self) -> str:
+        """Exportação no formato texto do Prometheus (histogramas como "summary")."""
+        with self._lock:
+            histograms = {key: (h.count, h.total, h.quantiles()) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = []
+        typed = set()
+        for (name, labels), (count, total, quantiles) in sorted(histograms.items()):
+            metric = METRIC_PREFIX + name
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} summary")
+                typed.add(metric)
+            for q, value in quantiles.items():
+                lines.append(f"{metric}{_labels(labels, quantile=q)} {value:.6g}")
+            lines.append(f"{metric}_sum{_labels(labels)} {total:.6g}")
+            lines.append(f"{metric}_count{_labels(labels)} {count}")
+        for (name, labels), value in sorted(counters.items()):
+            metric = METRIC_PREFIX + name + "_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{_labels(labels)} {value:.6g}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _labels(labels: tuple, **extra) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    escaped = (
+        f'{key}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for key, value in items
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    """Registro compartilhado do processo (METRICS_ENABLED, METRICS_LOG_JSON)."""
+    global _default_metrics
+    if _default_metrics is None:
+        with _default_metrics_lock:
+            if _default_metrics is None:
+                _default_metrics = Metrics(
+                    enabled=os.getenv("METRICS_ENABLED", "1") != "0",
+                    log_json=os.getenv("METRICS_LOG_JSON", "0") == "1",
+                )
+    return _default_metrics
+
+
+def timer(name: str, **labels):
+    return get_metrics().timer(name, **labels)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    get_metrics().observe(name, value, **labels)
+
+
+def increment(name: str, amount: float = 1, **labels) -> None:
+    get_metrics().increment(name, amount, **labels)
+
+
+def log_event(event: str, level: int = logging.INFO, **fields) -> None:
+    get_metrics().log_event(event, level, **fields)
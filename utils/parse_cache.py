@@ -0,0 +1,175 @@
+# utils/parse_cache.py
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# Tamanho padrão da camada em memória (bytes de texto extraído, não do arquivo original).
+DEFAULT_MEMORY_BYTES = 256 * 1024 * 1024
+# Tamanho dos blocos lidos ao calcular o hash do arquivo enviado.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def hash_file(file, salt: str = "") -> str:
+    """
+    Calcula o SHA-256 do conteúdo de um arquivo (ou objeto semelhante), lendo em blocos.
+
+    O ponteiro do arquivo é devolvido ao início ao final, para que a extração possa ler
+    o mesmo objeto em seguida (ex: UploadedFile do Streamlit).
+    """
+    digest = hashlib.sha256(salt.encode("utf-8"))
+    file.seek(0)
+    while True:
+        chunk = file.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """
+    Cache de texto extraído, endereçado pelo conteúdo do arquivo.
+
+    Possui duas camadas:
+    - Memória: LRU limitado pelo total de bytes (UTF-8) do texto armazenado.
+    - Disco (opcional): um arquivo por chave em `disk_dir`, sobrevive a reinícios do processo.
+
+    É seguro para uso concorrente pelas várias sessões do Streamlit (threads do mesmo processo).
+    """
+
+    def __init__(self, max_memory_bytes: int = DEFAULT_MEMORY_BYTES, disk_dir: str = None):
+        self.max_memory_bytes = max_memory_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+        self._entries = OrderedDict()  # chave -> (texto, tamanho em bytes)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+
+    def get(self, key: str):
+        """Retorna o texto armazenado para `key`, ou None se não houver."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        text = self._read_disk(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store_memory(key, text)
+        return text
+
+    def put(self, key: str, text: str) -> None:
+        """Armazena o texto extraído nas camadas de memória e disco."""
+        with self._lock:
+            self._store_memory(key, text)
+        self._write_disk(key, text)
+
+    def clear(self) -> None:
+        """Esvazia a camada em memória (a camada em disco é preservada)."""
+        with self._lock:
+            self._entries.clear()
+            self._memory_bytes = 0
+
+    def stats(self) -> dict:
+        """Contadores de uso, para dimensionar o cache."""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "memory_bytes": self._memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "evictions": self.evictions,
+                "evicted_bytes": self.evicted_bytes,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+            }
+
+    def _store_memory(self, key: str, text: str) -> None:
+        # Deve ser chamado com o lock adquirido.
+        size = len(text.encode("utf-8"))
+        if size > self.max_memory_bytes:
+            # Documento maior que o cache inteiro: fica apenas no disco (se houver).
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous[1]
+        self._entries[key] = (text, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self._memory_bytes -= evicted_size
+            self.evictions += 1
+            self.evicted_bytes += evicted_size
+
+    def _disk_path(self, key: str) -> Path:
+        # Subdiretórios pelos dois primeiros caracteres evitam diretórios com milhares de arquivos.
+        return self.disk_dir / key[:2] / f"{key}.txt"
+
+    def _read_disk(self, key: str):
+        if not self.disk_dir:
+            return None
+        try:
+            return self._disk_path(key).read_text(encoding="utf-8")
+        except (FileNotFoundError, UnicodeDecodeError):
+            return None
+
+    def _write_disk(self, key: str, text: str) -> None:
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Escrita atômica: outro processo nunca lê um arquivo pela metade.
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as tmp:
+                tmp.write(text)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_parse_cache() -> ParseCache:
+    """
+    Retorna o cache compartilhado do processo.
+
+    Configuração via variáveis de ambiente (ou .env):
+    - PARSE_CACHE_MAX_MB: limite da camada em memória, em MB (padrão 256).
+    - PARSE_CACHE_DIR: diretório da camada em disco (desativada se não definido).
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            max_mb = int(os.getenv("PARSE_CACHE_MAX_MB", DEFAULT_MEMORY_BYTES // (1024 * 1024)))
+            _default_cache = ParseCache(
+                max_memory_bytes=max_mb * 1024 * 1024,
+                disk_dir=os.getenv("PARSE_CACHE_DIR") or None,
+            )
+        return _default_cache
@@ -0,0 +1,32 @@
+# utils/text_processing.py
+
+import re
+import unicodedata
+
+# Palavras muito frequentes em português (já sem acentos), ignoradas nas buscas e rankings.
+STOPWORDS_PT = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era essa esse
+esta este eu foi for ha isso isto ja la lhe mais mas me mesmo na nas nao nem no nos o os ou para pela
+pelas pelo pelos por qual quando que se sem ser seu seus so sua suas tambem te tem ter um uma umas uns
+""".split())
+
+_TOKEN = re.compile(r"\w+")
+
+
+def fold_accents(text: str) -> str:
+    """Remove acentos e cedilha: "Ação Cível" -> "Acao Civel"."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str, min_length: int = 2) -> list:
+    """
+    Quebra o texto em termos normalizados para busca: minúsculas, sem acentos e sem stopwords.
+
+    Ex: "Danos morais à consumidora" -> ["danos", "morais", "consumidora"]
+    """
+    return [
+        token
+        for token in _TOKEN.findall(fold_accents(text).lower())
+        if len(token) >= min_length and token not in STOPWORDS_PT
+    ]